@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+from .handler import FixedWidthHandler
+from .utils import ValidationExecutor
+
+
+logger = logging.getLogger(__package__)
+
+# Shared executor for blocking I/O and parsing of all async handlers
+_executor = None
+# Per event loop concurrency limit, per-file locks and tasks holding them
+_loop_states = weakref.WeakKeyDictionary()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=AsyncFixedWidthHandler.max_workers,
+                                       thread_name_prefix='fixed-file-io')
+    return _executor
+
+
+class AsyncFixedWidthHandler:
+    """
+       asyncio front-end of FixedWidthHandler.
+
+       Blocking I/O and parsing run in a bounded executor shared by all
+       instances. Operations on the same file are serialized and the number of
+       operations in flight on one event loop is limited, so a single loop can
+       drive many files without a thread per file. Operations wait for their file
+       before taking a slot, so a busy file does not hold slots of other files.
+       iter_transactions holds its file until the iteration ends.
+
+       Attributes:
+           handler (FixedWidthHandler): Synchronous handler doing the work.
+           max_workers (int): Size of shared executor.
+           concurrency (int): Maximum number of operations in flight per event loop.
+           batch_size (int): Number of records fetched at once by iter_transactions.
+    """
+
+    max_workers = min(32, (os.cpu_count() or 1) + 4)
+    concurrency = 64
+    batch_size = 1024
+
+    def __init__(self, filepath, **kwargs):
+        self.handler = FixedWidthHandler(filepath, **kwargs)
+        self._key = os.path.abspath(filepath)
+
+    @property
+    def filepath(self) -> str:
+        return self.handler.filepath
+
+    def _state(self) -> (asyncio.Semaphore, asyncio.Lock, dict):
+        loop = asyncio.get_running_loop()
+        state = _loop_states.get(loop)
+        if state is None:
+            state = _loop_states[loop] = (asyncio.Semaphore(self.concurrency), {}, {})
+        semaphore, locks, owners = state
+        lock = locks.get(self._key)
+        if lock is None:
+            lock = locks[self._key] = asyncio.Lock()
+        return semaphore, lock, owners
+
+    @asynccontextmanager
+    async def _hold(self):
+        """Holds the per-file lock. Calls of the task already holding it, e.g. inside iter_transactions,
+        reuse it, so conflicting ones fail fast in locking instead of waiting for the task itself."""
+        _, lock, owners = self._state()
+        task = asyncio.current_task()
+        if owners.get(self._key) is task:
+            yield
+            return
+        async with lock:
+            owners[self._key] = task
+            try:
+                yield
+            finally:
+                del owners[self._key]
+
+    async def _execute(self, function, *args, **kwargs):
+        """Runs blocking function in the shared executor within the per-loop concurrency limit."""
+        semaphore, _, _ = self._state()
+        async with semaphore:
+            return await asyncio.get_running_loop().run_in_executor(_get_executor(),
+                                                                    partial(function, *args, **kwargs))
+
+    async def _run(self, function, *args, **kwargs):
+        """Runs blocking function in the shared executor, serialized per file."""
+        async with self._hold():
+            return await self._execute(function, *args, **kwargs)
+
+    async def read_file(self, **kwargs) -> (dict, list, dict):
+        return await self._run(self.handler.read_file, **kwargs)
+
+    async def iter_transactions(self, **filters):
+        """Yields transactions, fetching them from the file in batches.
+        The file is held for the whole iteration, so writes of other tasks wait until it ends."""
+        transactions = self.handler.iter_transactions(**filters)
+
+        def next_batch():
+            return [transaction for _, transaction in zip(range(self.batch_size), transactions)]
+
+        async with self._hold():
+            try:
+                while True:
+                    batch = await self._execute(next_batch)
+                    for transaction in batch:
+                        yield transaction
+                    if len(batch) < self.batch_size:
+                        return
+            finally:
+                transactions.close()
+
+    async def add_transaction(self, amount, currency) -> str:
+        return await self._run(self.handler.add_transaction, amount=amount, currency=currency)
+
+    async def add_transactions(self, transactions) -> int:
+        return await self._run(self.handler.add_transactions, list(transactions))
+
+    async def update_field(self, record_type, field_name, field_value, counter=None) -> None:
+        await self._run(self.handler.update_field, record_type=record_type, field_name=field_name,
+                        field_value=field_value, counter=counter)
+
+    async def delete_transaction(self, counter) -> None:
+        await self._run(self.handler.delete_transaction, counter)
+
+    async def compact(self) -> int:
+        return await self._run(self.handler.compact)
+
+    async def validate(self, max_errors=None):
+        """Streaming validation returning ValidationReport."""
+        validation = ValidationExecutor(self.filepath, transaction_schema=self.handler.transaction_schema)
+        return await self._run(validation.validate_stream, max_errors=max_errors)
@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager, nullcontext
+
+
+def _no_phase(name):
+    return nullcontext()
+
+
+def _fsync_directory(directory) -> None:
+    """Makes rename within the directory durable. Not supported on every platform."""
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+@contextmanager
+def write(path, mode='wb', encoding=None, durable=False, phase=_no_phase):
+    """Yields a temporary file next to path which replaces it only after the block completes,
+    so readers never see a partially written file. On error the temporary file is removed.
+    durable=True syncs data and the directory and keeps permissions of the replaced file,
+    so a crash never leaves a truncated file behind. phase(name) times 'open' and 'fsync' steps."""
+    directory = os.path.dirname(os.path.abspath(path))
+    with phase('open'):
+        descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, mode, encoding=encoding) as file:
+            yield file
+            if durable:
+                with phase('fsync'):
+                    file.flush()
+                    os.fsync(file.fileno())
+        if durable and os.path.exists(path):
+            shutil.copymode(path, temp_path)
+        os.replace(temp_path, path)
+        if durable:
+            with phase('fsync'):
+                _fsync_directory(directory)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
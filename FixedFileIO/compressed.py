@@ -0,0 +1,203 @@
+import io
+import json
+import logging
+import lzma
+import os
+import struct
+import zlib
+
+from . import constants as const
+
+
+logger = logging.getLogger(__package__)
+
+# Layout: MAGIC, compressed blocks, JSON block index, TRAILER pointing at the index
+MAGIC = b'FWZ1'
+TRAILER = struct.Struct('<QI4s')
+TRAILER_MAGIC = b'FWZI'
+
+CODECS = {
+    'zlib': (zlib.compress, zlib.decompress),
+    'lzma': (lzma.compress, lzma.decompress),
+}
+
+# Records per block, lookup by counter decompresses a single block
+BLOCK_RECORDS = 1024
+
+
+def is_compressed(filepath) -> bool:
+    """Whether the file is stored in block-compressed format."""
+    try:
+        with open(filepath, 'rb') as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def codec_of(filepath):
+    """Codec of compressed file, None for plain or missing files."""
+    if not is_compressed(filepath):
+        return None
+    with open(filepath, 'rb') as file:
+        return read_index(file)['codec']
+
+
+def read_index(file) -> dict:
+    """Reads block index of compressed file opened in binary mode."""
+    size = file.seek(0, os.SEEK_END)
+    if size < len(MAGIC) + TRAILER.size:
+        raise ValueError("Compressed file is truncated.")
+    file.seek(size - TRAILER.size)
+    index_offset, index_length, magic = TRAILER.unpack(file.read(TRAILER.size))
+    if magic != TRAILER_MAGIC:
+        raise ValueError("Compressed file has no block index.")
+    file.seek(index_offset)
+    index = json.loads(file.read(index_length))
+    if index['codec'] not in CODECS:
+        raise ValueError(f"Unknown codec {index['codec']}.")
+    return index
+
+
+class BlockReader(io.RawIOBase):
+    """
+       Seekable read-only view of uncompressed content of a block-compressed file.
+
+       Sequential reads decompress blocks one after another, seeking
+       decompresses only the block holding the position. The last
+       decompressed block is kept, so records of one block cost one
+       decompression.
+    """
+
+    def __init__(self, filepath):
+        super().__init__()
+        self._file = open(filepath, 'rb')
+        try:
+            index = read_index(self._file)
+        except Exception:
+            self._file.close()
+            raise
+        self._decompress = CODECS[index['codec']][1]
+        self.block_size = index['block_size']
+        self.blocks = index['blocks']
+        self.size = index['size']
+        self._position = 0
+        self._cached = (None, b'')
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("Negative seek position.")
+        self._position = offset
+        return offset
+
+    def _block(self, number) -> bytes:
+        if self._cached[0] != number:
+            offset, length, _ = self.blocks[number]
+            self._file.seek(offset)
+            self._cached = (number, self._decompress(self._file.read(length)))
+        return self._cached[1]
+
+    def readinto(self, buffer) -> int:
+        if self._position >= self.size:
+            return 0
+        number, start = divmod(self._position, self.block_size)
+        chunk = self._block(number)[start:start + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+class BlockWriter(io.RawIOBase):
+    """Compresses written bytes in blocks of block_records records into a binary file.
+    Closing writes the block index and trailer but leaves the target file open."""
+
+    def __init__(self, file, codec='zlib', block_records=BLOCK_RECORDS):
+        super().__init__()
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec {codec}. Allowed codecs are: {', '.join(CODECS)}")
+        self._file = file
+        self.codec = codec
+        self._compress = CODECS[codec][0]
+        self.block_size = block_records * const.RECORD_LENGTH
+        self.blocks = []
+        self.size = 0
+        self._buffer = bytearray()
+        self._file.write(MAGIC)
+
+    def writable(self) -> bool:
+        return True
+
+    def _flush_block(self, data) -> None:
+        compressed = self._compress(bytes(data))
+        self.blocks.append((self._file.tell(), len(compressed), len(data)))
+        self._file.write(compressed)
+
+    def write(self, data) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._flush_block(self._buffer[:self.block_size])
+            del self._buffer[:self.block_size]
+        self.size += len(data)
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            if self._buffer:
+                self._flush_block(self._buffer)
+                self._buffer.clear()
+            index = json.dumps({'codec': self.codec, 'block_size': self.block_size, 'size': self.size,
+                                'blocks': self.blocks}).encode('utf-8')
+            index_offset = self._file.tell()
+            self._file.write(index)
+            self._file.write(TRAILER.pack(index_offset, len(index), TRAILER_MAGIC))
+        super().close()
+
+
+def open_file(filepath, mode='r', encoding='utf-8'):
+    """Opens plain or block-compressed file for reading, plain files also for in-place writes."""
+    if not is_compressed(filepath):
+        return open(filepath, mode, encoding=None if 'b' in mode else encoding)
+    if mode not in ('r', 'rb'):
+        raise ValueError(f"Compressed file {filepath} cannot be modified in place.")
+    reader = io.BufferedReader(BlockReader(filepath), buffer_size=const.RECORD_LENGTH * 64)
+    return reader if mode == 'rb' else io.TextIOWrapper(reader, encoding=encoding)
+
+
+def text_writer(file, codec, block_records=BLOCK_RECORDS) -> io.TextIOWrapper:
+    """Text stream compressing written lines into binary file."""
+    return io.TextIOWrapper(io.BufferedWriter(BlockWriter(file, codec=codec, block_records=block_records)),
+                            encoding='utf-8', newline='\n')
+
+
+def compress_file(source, target, codec='zlib', block_records=BLOCK_RECORDS) -> None:
+    """Compresses plain fixed-width file."""
+    with open(source, 'rb') as plain, open(target, 'wb') as file:
+        with BlockWriter(file, codec=codec, block_records=block_records) as writer:
+            while chunk := plain.read(block_records * const.RECORD_LENGTH):
+                writer.write(chunk)
+    logger.info(f"File {source} compressed into {target}")
+
+
+def decompress_file(source, target) -> None:
+    """Restores plain fixed-width file from compressed one."""
+    with open_file(source, 'rb') as compressed, open(target, 'wb') as file:
+        while chunk := compressed.read(BLOCK_RECORDS * const.RECORD_LENGTH):
+            file.write(chunk)
+    logger.info(f"File {source} decompressed into {target}")
@@ -1,3 +1,13 @@
+# Every record is 120 characters followed by a newline
+LINE_LENGTH = 120
+RECORD_LENGTH = LINE_LENGTH + 1
+
+# Maximum number of transactions in a single file
+TRANSACTION_LIMIT = 20000
+
+# Seconds to wait for a shared or exclusive file lock
+LOCK_TIMEOUT = 30
+
 HEADER_SLICES = {
         'Field ID': (0, 2),
         'Name': (2, 30),
@@ -60,6 +70,9 @@ FIELD_TYPES = {
     "Control sum": int
 }
 
+# Numeric fields are zero-padded when formatted. Counter is kept as str to compare padded values
+ZERO_PADDED_FIELDS = frozenset({field for field, field_type in FIELD_TYPES.items() if field_type is int} | {"Counter"})
+
 # Address can have digits. Currencies are fixed
 FIELD_VALIDATIONS = {
     'Field ID': str.isdigit,
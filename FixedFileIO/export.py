@@ -0,0 +1,152 @@
+import csv
+import io
+import json
+import logging
+import struct
+import sys
+from array import array
+from itertools import islice
+
+from . import compressed
+from . import constants as const
+from .table import CURRENCY_CODES
+
+
+logger = logging.getLogger(__package__)
+
+FORMATS = ('csv', 'jsonl', 'columnar')
+# Records decoded and written at once
+CHUNK_RECORDS = 8192
+BUFFER_SIZE = 1 << 20
+
+# Columnar layout: MAGIC, header JSON, chunks of counter/amount/currency columns ended by empty chunk, footer JSON.
+# JSON parts and chunks are prefixed by their length / number of records
+COLUMNAR_MAGIC = b'FWC1'
+_LENGTH = struct.Struct('<I')
+
+
+def _key(field) -> str:
+    return field.lower().replace(' ', '_')
+
+
+def _record(record_type, values) -> dict:
+    """Export representation of a decoded record, numeric fields as ints and blank Reserved dropped."""
+    record = {'record_type': record_type}
+    for field, value in values.items():
+        if field == 'Field ID' or (field == 'Reserved' and not value):
+            continue
+        record[_key(field)] = int(value) if field in const.ZERO_PADDED_FIELDS and value.isdigit() else value
+    return record
+
+
+def iter_chunks(handler, chunk_records=CHUNK_RECORDS):
+    """Yields lists of (record_type, record) read from the file in chunks of chunk_records lines."""
+    schemas = {
+        handler.field_id_header: ('header', handler.header_schema),
+        handler.field_id_transaction: ('transaction', handler.transaction_schema),
+        handler.field_id_footer: ('footer', handler.footer_schema),
+    }
+    with compressed.open_file(handler.filepath, 'r', encoding='utf-8') as file:
+        while lines := list(islice(file, chunk_records)):
+            chunk = []
+            for line in lines:
+                record_type, schema = schemas.get(line[0:2], (None, None))
+                if schema is not None:
+                    chunk.append((record_type, _record(record_type, schema.decode(line))))
+            yield chunk
+
+
+def _columns(handler) -> list:
+    """CSV columns, fields of header, transaction and footer in schema order."""
+    columns = ['record_type']
+    for schema in (handler.header_schema, handler.transaction_schema, handler.footer_schema):
+        columns += [_key(field) for field in schema.fields if field != 'Field ID' and _key(field) not in columns]
+    return columns
+
+
+def _write_csv(handler, chunks, target) -> None:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=_columns(handler), lineterminator='\n')
+    writer.writeheader()
+    for chunk in chunks:
+        writer.writerows(record for _, record in chunk)
+        target.write(buffer.getvalue().encode('utf-8'))
+        buffer.seek(0)
+        buffer.truncate()
+    target.write(buffer.getvalue().encode('utf-8'))
+
+
+def _write_jsonl(chunks, target) -> None:
+    for chunk in chunks:
+        target.write(''.join(json.dumps(record) + '\n' for _, record in chunk).encode('utf-8'))
+
+
+def _write_json_part(target, value) -> None:
+    data = json.dumps(value).encode('utf-8')
+    target.write(_LENGTH.pack(len(data)))
+    target.write(data)
+
+
+def _write_columnar(chunks, target) -> None:
+    target.write(COLUMNAR_MAGIC)
+    _write_json_part(target, {'currencies': list(const.CURRENCIES)})
+    header, footer = None, None
+    for chunk in chunks:
+        counters, amounts, currencies = array('I'), array('q'), array('B')
+        for record_type, record in chunk:
+            if record_type == 'transaction':
+                counters.append(record['counter'])
+                amounts.append(record['amount'])
+                currencies.append(CURRENCY_CODES[record['currency']])
+            elif record_type == 'header':
+                header = record
+            else:
+                footer = record
+        if counters:
+            target.write(_LENGTH.pack(len(counters)))
+            for column in (counters, amounts, currencies):
+                target.write(column.tobytes())
+    target.write(_LENGTH.pack(0))
+    _write_json_part(target, {'header': header, 'footer': footer})
+
+
+def read_columnar(source) -> (dict, dict, dict):
+    """Reads columnar dump into header, {'counter', 'amount', 'currency'} arrays and footer."""
+    with open(source, 'rb') as file:
+        if file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"{source} is not a columnar dump.")
+
+        def json_part():
+            return json.loads(file.read(_LENGTH.unpack(file.read(_LENGTH.size))[0]))
+        meta = json_part()
+        columns = {'counter': array('I'), 'amount': array('q'), 'currency': array('B')}
+        while count := _LENGTH.unpack(file.read(_LENGTH.size))[0]:
+            for column in columns.values():
+                column.frombytes(file.read(count * column.itemsize))
+        records = json_part()
+    columns['currencies'] = meta['currencies']
+    return records['header'], columns, records['footer']
+
+
+def export_file(handler, target='-', fmt='csv', chunk_records=CHUNK_RECORDS, buffer_size=BUFFER_SIZE) -> None:
+    """Streams header, transactions and footer of handler's file into target path ('-' for stdout)
+    as csv, jsonl or columnar binary. At most chunk_records records are held in memory."""
+    if fmt not in FORMATS:
+        message = f"Unsupported export format '{fmt}'. Allowed formats are: {', '.join(FORMATS)}"
+        logger.error(message)
+        raise ValueError(message)
+    chunks = iter_chunks(handler, chunk_records=chunk_records)
+    output = sys.stdout.buffer if target == '-' else open(target, 'wb', buffering=buffer_size)
+    try:
+        match fmt:
+            case 'csv':
+                _write_csv(handler, chunks, output)
+            case 'jsonl':
+                _write_jsonl(chunks, output)
+            case 'columnar':
+                _write_columnar(chunks, output)
+        output.flush()
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+    logger.info(f"File {handler.filepath} exported as {fmt} into {'stdout' if target == '-' else target}")
@@ -1,7 +1,23 @@
 import logging
+import os
+import threading
+from contextlib import contextmanager
 
+from . import atomic
+from . import compressed
 from . import constants as const
+from . import locking
+from . import metrics
+from . import numpy_backend
+from . import query
 from . import utils
+from .export import export_file
+from .index import SidecarIndex
+from .schema import FOOTER_SCHEMA, HEADER_SCHEMA, TRANSACTION_SCHEMA
+from .session import Session
+from .table import TransactionTable
+from .validation_cache import ValidationCache
+from .view import MappedFile
 
 
 logger = logging.getLogger(__package__)
@@ -16,48 +32,126 @@ class FixedWidthHandler:
            field_id_header (str): Field ID for header records.
            field_id_transaction (str): Field ID for transaction records.
            field_id_footer (str): Field ID for footer records.
+           field_id_deleted (str): Field ID marking deleted transaction records.
            transaction_limit (int): Maximum number of transaction records allowed.
+           use_index (bool): Whether sidecar index is used and kept up to date.
+           header_schema (RecordSchema): Layout of header records.
+           transaction_schema (RecordSchema): Layout of transaction records.
+           footer_schema (RecordSchema): Layout of footer records.
+           lock_timeout (float): Seconds to wait for a file lock.
+           compression (str): Codec of block-compressed files written by the handler.
+           compact_threshold (float): Share of deleted records above which compaction starts in background,
+                                      None (default) leaves compaction to explicit compact() calls.
+
+       Readers hold a shared lock and writers an exclusive lock on <file>.lock,
+       so handlers in different processes never interleave partial writes.
+       Block-compressed files are read transparently and rewritten instead of modified in place.
+       Deleted transactions stay in the file as tombstones skipped by readers and validators
+       until compaction drops them and renumbers the rest, which changes counters of
+       transactions following any deleted one.
 
        Methods:
            read_file: Reads the fixed-width file
                       and returns its content as structured data.
+           read_header: Reads only the header record.
+           read_footer: Reads only the footer record.
+           iter_transactions: Yields transaction records one at a time.
+           get_transaction: Reads a single transaction by its counter.
+           transactions_by_currency: Yields transactions in given currency.
+           control_sum_range: Sums Amounts of a counter range.
+           query: Yields transactions matching currency, counter and amount filters.
+           stats: Computes per-currency aggregates in a single streaming pass.
+           read_mapped: Memory-maps the file and returns lazy record views.
+           export: Streams the file into CSV, JSON Lines or columnar binary.
            write_file: Writes structured data back to the fixed-width file format.
            add_transaction: Adds a new transaction record to the file.
+           add_transactions: Adds a batch of transaction records with a single write.
            update_field: Updates the value of a specific
                          field in a header, transaction, or footer record.
+           update_fields: Applies a batch of field updates in a single streaming rewrite.
+           delete_transaction: Marks a transaction as deleted in place.
+           compact: Drops deleted transactions and renumbers counters in a single streaming pass.
+           session: Opens a unit of work collecting adds and updates until commit.
        """
 
     field_id_header: str
     field_id_transaction: str
     field_id_footer: str
+    field_id_deleted: str
     transaction_limit: int
 
-    def __init__(self, filepath):
-        """Initializes the handler with file path and default settings."""
+    def __init__(self, filepath, header_schema=HEADER_SCHEMA, transaction_schema=TRANSACTION_SCHEMA,
+                 footer_schema=FOOTER_SCHEMA, use_index=False, lock_timeout=const.LOCK_TIMEOUT, compression=None,
+                 compact_threshold=None):
+        """Initializes the handler with file path and default settings.
+        Custom record layouts are defined by passing schemas of the same line length.
+        use_index=True keeps a sidecar index next to the file for lookups and range sums.
+        lock_timeout is the number of seconds to wait for a file lock, None waits forever.
+        compression ('zlib' or 'lzma') writes block-compressed files, otherwise files keep their format.
+        compact_threshold is the share of deleted records which triggers background compaction.
+        Compaction renumbers counters at a moment the caller does not control, so it is enabled only
+        when transactions are not addressed by counter afterwards. None (default) disables it."""
+        for schema in (header_schema, transaction_schema, footer_schema):
+            if schema.length != const.LINE_LENGTH:
+                raise ValueError(f"Schema length {schema.length} differs from required {const.LINE_LENGTH}.")
         self.filepath = filepath
+        self.header_schema = header_schema
+        self.transaction_schema = transaction_schema
+        self.footer_schema = footer_schema
+        self.use_index = use_index
+        self._index = None
+        self.lock_timeout = lock_timeout
+        self.compression = compression
+        self.compact_threshold = compact_threshold
+        self._compaction = None
+        self._lock_state = locking.new_lock_state()
         self.field_id_header = '01'
         self.field_id_transaction = '02'
         self.field_id_footer = '03'
-        self.transaction_limit = 20000
+        self.field_id_deleted = '04'
+        self.transaction_limit = const.TRANSACTION_LIMIT
+        # Cache of counter -> byte offset, verified on every lookup
+        self._counter_offsets = {}
 
-    def read_file(self) -> (dict, list, dict):
-        """Reads the fixed-width file, returning the header, list of transactions, and footer."""
-        header, transactions, footer = None, [], None
+    @locking.locked(shared=True)
+    def read_file(self, table=False, backend='python') -> (dict, list, dict):
+        """Reads the fixed-width file, returning the header, list of transactions, and footer.
+        With table=True transactions are returned as a columnar TransactionTable.
+        backend='numpy' parses the whole file at once when NumPy is installed."""
+        if backend == 'numpy':
+            if numpy_backend.HAS_NUMPY:
+                return self._read_file_numpy(table=table)
+            logger.warning("NumPy is not installed, falling back to pure-Python parser")
+        header, footer = None, None
+        transactions = TransactionTable(field_id=self.field_id_transaction,
+                                        schema=self.transaction_schema) if table else []
+        # Per-record logging is checked once, so disabled DEBUG costs nothing per record
+        debug = logger.isEnabledFor(logging.DEBUG)
         try:
-            with open(self.filepath, 'r', encoding='utf-8') as file:
-                for line in file:
-                    # Indices of Field ID
-                    field_id = line[0:2]
-                    if field_id == self.field_id_header:  # Header
-                        header = utils.get_values_as_dict(line, const.HEADER_SLICES)
-                        logger.debug(f"Load header: {header}")
-                    elif field_id == self.field_id_transaction:  # Transaction
-                        transaction = utils.get_values_as_dict(line, const.TRANSACTIONS_SLICES)
-                        transactions.append(transaction)
-                        logger.debug(f"Load transaction: {transaction}")
-                    elif field_id == self.field_id_footer:  # Footer
-                        footer = utils.get_values_as_dict(line, const.FOOTER_SLICES)
-                        logger.debug(f"Load footer: {footer}")
+            with metrics.registry.operation('read_file') as operation:
+                with metrics.registry.phase('open'):
+                    file = compressed.open_file(self.filepath, 'r', encoding='utf-8')
+                with file, metrics.registry.phase('parse'):
+                    for line in file:
+                        # Indices of Field ID
+                        field_id = line[0:2]
+                        if field_id == self.field_id_header:  # Header
+                            header = self.header_schema.decode(line)
+                            if debug:
+                                logger.debug("Load header: %s", header)
+                        elif field_id == self.field_id_transaction and table:  # Transaction into table
+                            transactions.append_line(line)
+                        elif field_id == self.field_id_transaction:  # Transaction
+                            transaction = self.transaction_schema.decode(line)
+                            transactions.append(transaction)
+                            if debug:
+                                logger.debug("Load transaction: %s", transaction)
+                        elif field_id == self.field_id_footer:  # Footer
+                            footer = self.footer_schema.decode(line)
+                            if debug:
+                                logger.debug("Load footer: %s", footer)
+                    if metrics.registry.enabled:
+                        operation.add(records=len(transactions), nbytes=os.path.getsize(self.filepath))
         except Exception as e:
             logger.error(f"Failed to read file {self.filepath}: {e}")
             raise
@@ -68,52 +162,287 @@ class FixedWidthHandler:
         logger.info("File successfully loaded")
         return header, transactions, footer
 
+    def _read_file_numpy(self, table) -> (dict, list, dict):
+        """Reads the file with a single np.frombuffer call."""
+        try:
+            with metrics.registry.operation('read_file') as operation, metrics.registry.phase('parse'):
+                data, records = numpy_backend.load_records(self.filepath, slices=self.transaction_schema.slices)
+                operation.add(records=len(records) - 2, nbytes=len(data))
+        except Exception as e:
+            logger.error(f"Failed to read file {self.filepath}: {e}")
+            raise
+        header = self.header_schema.decode(data[:const.LINE_LENGTH])
+        footer = self.footer_schema.decode(data[-const.RECORD_LENGTH:-1])
+        records = records[1:-1]
+        records = records[records['Field ID'] == self.field_id_transaction.encode('utf-8')]
+        # Check whether there are no more than 20000 transactions
+        if len(records) > self.transaction_limit:
+            logger.error(f"Number of transactions reached limit - {self.transaction_limit}")
+            raise utils.TransactionLimitError(self.transaction_limit)
+        transactions = numpy_backend.to_table(records, field_id=self.field_id_transaction,
+                                              schema=self.transaction_schema)
+        logger.info("File successfully loaded")
+        return header, transactions if table else [dict(row) for row in transactions], footer
+
+    @locking.locked(shared=True)
+    def read_header(self) -> dict:
+        """Reads the header record from the beginning of the file."""
+        try:
+            with compressed.open_file(self.filepath, 'r', encoding='utf-8') as file:
+                line = file.readline()
+        except Exception as e:
+            logger.error(f"Failed to read file {self.filepath}: {e}")
+            raise
+        if line[0:2] != self.field_id_header:
+            message = f"No header found at the beginning of {self.filepath}."
+            logger.error(message)
+            raise ValueError(message)
+        return self.header_schema.decode(line)
+
+    @locking.locked(shared=True)
+    def read_footer(self) -> dict:
+        """Reads the footer record from the end of the file."""
+        try:
+            with compressed.open_file(self.filepath, 'rb') as file:
+                _, footer = self._read_footer(file)
+        except Exception as e:
+            logger.error(f"Failed to read file {self.filepath}: {e}")
+            raise
+        return footer
+
+    @locking.locked(shared=True)
+    def iter_transactions(self, currency=None, start=None, stop=None):
+        """Yields transactions one at a time. Optionally filters by currency
+        and inclusive counter range before any record is built."""
+        counter_start, counter_end = self.transaction_schema.slices['Counter']
+        currency_start, currency_end = self.transaction_schema.slices['Currency']
+        try:
+            with compressed.open_file(self.filepath, 'r', encoding='utf-8') as file:
+                for line in file:
+                    if line[0:2] != self.field_id_transaction:
+                        continue
+                    if currency is not None and line[currency_start:currency_end] != currency:
+                        continue
+                    if start is not None or stop is not None:
+                        counter = int(line[counter_start:counter_end])
+                        if start is not None and counter < int(start):
+                            continue
+                        if stop is not None and counter > int(stop):
+                            continue
+                    yield self.transaction_schema.decode(line)
+        except Exception as e:
+            logger.error(f"Failed to read file {self.filepath}: {e}")
+            raise
+
+    def index(self) -> SidecarIndex:
+        """Returns fresh sidecar index, rebuilding it when it is missing or stale."""
+        if self._index is None or not self._index.is_fresh():
+            self._index = SidecarIndex.load(self.filepath)
+        if self._index is None:
+            self._index = SidecarIndex.build(self.filepath, schema=self.transaction_schema,
+                                             field_id=self.field_id_transaction.encode('utf-8'))
+            self._index.save()
+        return self._index
+
+    @locking.locked(shared=True)
+    def get_transaction(self, counter) -> dict:
+        """Reads a single transaction by its counter."""
+        counter = str(counter).zfill(const.MAX_LENGTHS['Counter'])
+        with compressed.open_file(self.filepath, 'rb') as file:
+            if not self.use_index:
+                return self._locate_transaction(file, counter)[1]
+            offset = self.index().offset(counter)
+            if offset is None:
+                message = f"No transaction with counter {counter} found."
+                logger.error(message)
+                raise ValueError(message)
+            return self.transaction_schema.decode(self._read_line(file, offset))
+
+    @locking.locked(shared=True)
+    def transactions_by_currency(self, currency):
+        """Yields transactions in given currency, reading only them when index is used."""
+        if not self.use_index:
+            yield from self.iter_transactions(currency=currency)
+            return
+        index = self.index()
+        with compressed.open_file(self.filepath, 'rb') as file:
+            for position in index.postings.get(currency, ()):
+                yield self.transaction_schema.decode(self._read_line(file, index.offsets[position]))
+
+    @locking.locked(shared=True)
+    def control_sum_range(self, start=None, stop=None) -> int:
+        """Sum of Amounts of transactions with counters in inclusive range [start, stop]."""
+        if self.use_index:
+            return self.index().range_sum(start=start, stop=stop)
+        return sum(int(transaction['Amount']) for transaction in self.iter_transactions(start=start, stop=stop))
+
+    @locking.locked(shared=True)
+    def query(self, currency=None, start=None, stop=None, min_amount=None, max_amount=None):
+        """Yields transactions matching currency and inclusive counter and amount ranges.
+        Filters are applied to raw bytes before any record is built."""
+        field_id = self.field_id_transaction.encode('utf-8')
+        for *_, line in query.scan(self.filepath, currency=currency, start=start, stop=stop,
+                                   min_amount=min_amount, max_amount=max_amount, field_id=field_id,
+                                   schema=self.transaction_schema):
+            yield self.transaction_schema.decode(line)
+
+    @locking.locked(shared=True)
+    def stats(self, top=0, currency=None, start=None, stop=None, min_amount=None, max_amount=None) -> dict:
+        """Per-currency count, sum, min and max with top-N amounts of matching transactions."""
+        with metrics.registry.operation('stats') as operation, metrics.registry.phase('parse'):
+            result = query.aggregate(self.filepath, top=top, currency=currency, start=start, stop=stop,
+                                     min_amount=min_amount, max_amount=max_amount,
+                                     field_id=self.field_id_transaction.encode('utf-8'),
+                                     schema=self.transaction_schema)
+            operation.add(records=result['count'])
+        return result
+
+    @locking.locked(shared=True)
+    def read_mapped(self) -> MappedFile:
+        """Memory-maps the file, returning lazy header, transactions and footer views.
+        Fields are decoded only when accessed, so opening does not depend on file size."""
+        if compressed.is_compressed(self.filepath):
+            message = f"Compressed file {self.filepath} cannot be memory-mapped."
+            logger.error(message)
+            raise ValueError(message)
+        try:
+            mapped = MappedFile(self.filepath, field_id_transaction=self.field_id_transaction,
+                                header_slices=self.header_schema.slices,
+                                transaction_slices=self.transaction_schema.slices,
+                                footer_slices=self.footer_schema.slices)
+        except OSError as e:
+            logger.error(f"Failed to map file {self.filepath}: {e}")
+            raise
+        logger.info("File successfully mapped")
+        return mapped
+
+    def _write_codec(self):
+        """Codec used for rewriting the file, compressed files stay compressed."""
+        return self.compression or compressed.codec_of(self.filepath)
+
+    def session(self, rewrite_ratio=None) -> Session:
+        """Unit of work loading the file once. Used as a context manager it commits
+        collected adds and updates on exit, writing only changed records when few changed."""
+        return Session(self, rewrite_ratio=rewrite_ratio)
+
+    @locking.locked(shared=True)
+    def export(self, target='-', fmt='csv') -> None:
+        """Streams header, transactions and footer into target path or stdout ('-')
+        as 'csv', 'jsonl' or 'columnar' binary, chunk by chunk."""
+        with metrics.registry.operation('export'):
+            export_file(self, target=target, fmt=fmt)
+
+    @contextmanager
+    def _atomic_write(self, codec=None):
+        """Yields a temporary file which replaces the original only after it is fully written
+        and synced, so a crash never leaves a truncated file behind.
+        With codec the yielded text stream is block-compressed."""
+        with atomic.write(self.filepath, 'wb' if codec else 'w', encoding=None if codec else 'utf-8',
+                          durable=True, phase=metrics.registry.phase) as file:
+            if codec:
+                with compressed.text_writer(file, codec) as writer:
+                    yield writer
+            else:
+                yield file
+
+    @locking.locked(shared=False)
     def write_file(self, header, transactions, footer) -> None:
-        """Writes the header, transactions, and footer back to the fixed-width file."""
+        """Writes the header, transactions, and footer back to the fixed-width file.
+        Transactions keep their counters, ones without Counter are numbered after the previous one.
+        Gaps between counters are filled with deleted records, so counters keep their positions.
+        Data goes to a temporary file first which then atomically replaces the original."""
         # Check whether there are no more than 20000 transactions
         if len(transactions) > self.transaction_limit:
             logger.error(f"Number of transactions reached limit - {self.transaction_limit}")
             raise utils.TransactionLimitError(self.transaction_limit)
+        # Per-record logging is checked once, so disabled DEBUG costs nothing per record
+        debug = logger.isEnabledFor(logging.DEBUG)
         try:
-            with open(self.filepath, 'w', encoding='utf-8') as file:
-                # Header
-                header_line = utils.format_record(header, const.HEADER_SLICES)
-                file.write(header_line + '\n')
-                logger.debug(f"Write {header_line} into {self.filepath}")
-
-                # Transactions
-                for transaction in transactions:
-                    transaction_line = utils.format_record(transaction, const.TRANSACTIONS_SLICES)
-                    file.write(transaction_line + '\n')
-                    logger.debug(f"Write {transaction_line} into {self.filepath}")
-
-                # Footer
-                footer['Control sum'] = sum(int(transaction['Amount']) for transaction in transactions)
-                footer_line = utils.format_record(footer, const.FOOTER_SLICES)
-                file.write(footer_line + '\n')
-                logger.debug(f"Write {footer_line} into {self.filepath}")
+            with metrics.registry.operation('write_file') as operation:
+                with metrics.registry.phase('format'):
+                    # Header
+                    lines = [self.header_schema.encode(header)]
+
+                    # Transactions
+                    if isinstance(transactions, TransactionTable):
+                        lines.extend(self._fill_gaps(transactions.format_lines()))
+                        footer['Control sum'] = transactions.control_sum()
+                    else:
+                        counter = 0
+                        for transaction in transactions:
+                            if str(transaction.get('Counter', '')).strip():
+                                counter = int(transaction['Counter'])
+                            else:
+                                counter += 1
+                                transaction['Counter'] = f"{counter:0{const.MAX_LENGTHS['Counter']}}"
+                        lines.extend(self._fill_gaps(self.transaction_schema.encode(transaction)
+                                                     for transaction in transactions))
+                        footer['Control sum'] = sum(int(transaction['Amount']) for transaction in transactions)
+
+                    # Footer
+                    lines.append(self.footer_schema.encode(footer))
+                    data = '\n'.join(lines) + '\n'
+                if debug:
+                    for line in lines:
+                        logger.debug("Write %s into %s", line, self.filepath)
+                with self._atomic_write(codec=self._write_codec()) as file, metrics.registry.phase('write'):
+                    file.write(data)
+                operation.add(records=len(transactions), nbytes=len(data))
         except Exception as e:
             logger.error(f"Failed to write file {self.filepath}: {e}")
             raise
         logger.info("File successfully wrote")
 
-    def add_transaction(self, amount, currency) -> None:
-        """Adds a new transaction record to the file."""
+    def _fill_gaps(self, lines):
+        """Yields transaction lines, preceding them with deleted records for counters missing in between."""
+        counter_start, counter_end = self.transaction_schema.slices['Counter']
+        last_counter = 0
+        for line in lines:
+            counter = int(line[counter_start:counter_end])
+            for missing in range(last_counter + 1, counter):
+                yield self.transaction_schema.encode({'Field ID': self.field_id_deleted, 'Counter': missing,
+                                                      'Amount': 0, 'Currency': const.CURRENCIES[0]})
+            last_counter = max(last_counter, counter)
+            yield line
+
+    def _read_footer(self, file) -> (int, dict):
+        """Locates the footer in a file opened in binary mode, returning its offset and values."""
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        if size < const.LINE_LENGTH:
+            raise ValueError(f"File {self.filepath} is too short to contain a footer.")
+        # Last line may come without trailing newline
+        file.seek(size - 1)
+        offset = size - const.LINE_LENGTH - (1 if file.read(1) == b'\n' else 0)
+        file.seek(offset)
+        line = file.read(const.LINE_LENGTH).decode('utf-8')
+        if line[0:2] != self.field_id_footer:
+            message = f"No footer found at the end of {self.filepath}."
+            logger.error(message)
+            raise ValueError(message)
+        return offset, self.footer_schema.decode(line)
+
+    def _new_transaction(self, amount, currency) -> dict:
+        """Validates amount and currency, returning a new transaction record without Counter."""
         # Currency validation
         if currency not in const.CURRENCIES:
             logger.error(const.CURRENCY_ERROR)
             raise ValueError(const.CURRENCY_ERROR)
 
-        header, transactions, footer = self.read_file()
-
-        # Next transaction's number
-        next_counter = str(len(transactions) + 1).zfill(6)
+        # Amount has to be a whole number, int() would silently truncate fractions and accept booleans
+        try:
+            whole = None if isinstance(amount, bool) else int(amount)
+        except (TypeError, ValueError):
+            whole = None
+        if whole is None or (not isinstance(amount, str) and whole != amount):
+            message = f"Amount {amount!r} is not a whole number."
+            logger.error(message)
+            raise ValueError(message)
 
-        # Add new transaction to list
         new_transaction = {
             'Field ID': self.field_id_transaction,
-            'Counter': next_counter,
-            'Amount': f"{amount:012}",
+            'Counter': '',
+            'Amount': f"{whole:012}",
             'Currency': currency,
             'Reserved': ''
         }
@@ -121,13 +450,131 @@ class FixedWidthHandler:
         if len(new_transaction['Amount']) > const.MAX_LENGTHS['Amount']:
             logger.error(f"Amount: {new_transaction['Amount']} exceeds maximum length of {const.MAX_LENGTHS['Amount']}")
             raise ValueError(f"Amount {new_transaction['Amount']} is too long")
-        transactions.append(new_transaction)
-        logger.debug(f"Add transaction: {new_transaction}")
+        utils.validate_field_value(field_name='Amount', value=new_transaction['Amount'])
+        return new_transaction
 
-        # Update Total Counter
-        footer['Total Counter'] = f"{len(transactions):06}"
-        logger.debug(f"Set new Total Counter: {footer['Total Counter']}")
-        self.write_file(header, transactions, footer)
+    def _new_transactions(self, transactions) -> list:
+        """Validates a batch of (amount, currency) rows, returning new transaction records."""
+        new_transactions = []
+        for row, (amount, currency) in enumerate(transactions, start=1):
+            try:
+                new_transactions.append(self._new_transaction(amount=amount, currency=currency))
+            except ValueError as e:
+                message = f"Row {row}: {e}"
+                logger.error(message)
+                raise ValueError(message) from e
+        return new_transactions
+
+    def add_transaction(self, amount, currency) -> str:
+        """Appends a new transaction record in place of the footer and regenerates the footer.
+        Returns Counter of the new transaction."""
+        new_transactions = self._new_transactions([(amount, currency)])
+        self._append_transactions(new_transactions)
+        return new_transactions[0]['Counter']
+
+    def add_transactions(self, transactions) -> int:
+        """Appends a batch of (amount, currency) transactions with a single write.
+        The whole batch is validated first, so nothing is written if any row is invalid.
+        Returns number of added transactions."""
+        new_transactions = self._new_transactions(transactions)
+        if not new_transactions:
+            return 0
+        return self._append_transactions(new_transactions)
+
+    @locking.locked(shared=False)
+    def _append_transactions(self, new_transactions) -> int:
+        """Writes validated transactions in place of the footer followed by regenerated footer."""
+        if compressed.is_compressed(self.filepath):
+            return self._rewrite_with(new_transactions)
+
+        index = self.index() if self.use_index else None
+        try:
+            with metrics.registry.operation('add_transactions') as operation, open(self.filepath, 'r+b') as file:
+                footer_offset, footer = self._read_footer(file)
+                total_counter = int(footer['Total Counter'] or 0)
+
+                # Check whether there are no more than 20000 transactions
+                if total_counter + len(new_transactions) > self.transaction_limit:
+                    logger.error(f"Number of transactions reached limit - {self.transaction_limit}")
+                    raise utils.TransactionLimitError(self.transaction_limit)
+
+                # Deleted transactions keep their counters, so numbering follows the last record
+                first_counter = (total_counter + 1 if footer_offset % const.RECORD_LENGTH
+                                 else footer_offset // const.RECORD_LENGTH)
+
+                # Assign next transactions' numbers
+                lines = []
+                for counter, new_transaction in enumerate(new_transactions, start=first_counter):
+                    new_transaction['Counter'] = f"{counter:06}"
+                    lines.append(self.transaction_schema.encode(new_transaction))
+                    logger.debug("Add transaction: %s", new_transaction)
+
+                # Update Total Counter and Control sum incrementally
+                footer['Total Counter'] = total_counter + len(new_transactions)
+                footer['Control sum'] = (int(footer['Control sum'] or 0)
+                                         + sum(int(new_transaction['Amount']) for new_transaction in new_transactions))
+                utils.check_fields_length(field_name='Control sum', value=footer['Control sum'])
+                logger.debug("Set new Total Counter: %s", footer['Total Counter'])
+
+                # Overwrite footer with new transactions followed by regenerated footer
+                lines.append(self.footer_schema.encode(footer))
+                data = ('\n'.join(lines) + '\n').encode('utf-8')
+                with metrics.registry.phase('write'):
+                    file.seek(footer_offset)
+                    file.write(data)
+                operation.add(records=len(new_transactions), nbytes=len(data))
+        except (OSError, UnicodeDecodeError) as e:
+            logger.error(f"Failed to append transactions to {self.filepath}: {e}")
+            raise
+        if index is not None:
+            for position, new_transaction in enumerate(new_transactions):
+                index.append(counter=new_transaction['Counter'],
+                             offset=footer_offset + position * const.RECORD_LENGTH,
+                             amount=new_transaction['Amount'],
+                             currency=new_transaction['Currency'])
+            index.save()
+        logger.info(f"{len(new_transactions)} transaction(s) successfully added")
+        return len(new_transactions)
+
+    def _rewrite_with(self, new_transactions) -> int:
+        """Appends transactions to a compressed file by streaming it into a new one, as blocks cannot be
+        patched in place. New transactions follow the last record, deleted ones included."""
+        counter_start, counter_end = self.transaction_schema.slices['Counter']
+        record_ids = (self.field_id_transaction, self.field_id_deleted)
+        last_counter, footer = 0, None
+        amount = sum(int(new_transaction['Amount']) for new_transaction in new_transactions)
+        with metrics.registry.operation('add_transactions') as operation, \
+                compressed.open_file(self.filepath, 'r', encoding='utf-8') as source, \
+                self._atomic_write(codec=self._write_codec()) as target:
+            operation.add(records=len(new_transactions))
+            for line in source:
+                field_id = line[0:2]
+                if field_id in record_ids:
+                    last_counter = int(line[counter_start:counter_end])
+                elif field_id == self.field_id_footer:
+                    footer = self.footer_schema.decode(line)
+                    total_counter = int(footer['Total Counter'] or 0)
+                    # Check whether there are no more than 20000 transactions
+                    if total_counter + len(new_transactions) > self.transaction_limit:
+                        logger.error(f"Number of transactions reached limit - {self.transaction_limit}")
+                        raise utils.TransactionLimitError(self.transaction_limit)
+                    for counter, new_transaction in enumerate(new_transactions, start=last_counter + 1):
+                        new_transaction['Counter'] = f"{counter:0{const.MAX_LENGTHS['Counter']}}"
+                        target.write(self.transaction_schema.encode(new_transaction) + '\n')
+                        logger.debug("Add transaction: %s", new_transaction)
+                    footer['Total Counter'] = total_counter + len(new_transactions)
+                    footer['Control sum'] = int(footer['Control sum'] or 0) + amount
+                    utils.check_fields_length(field_name='Control sum', value=footer['Control sum'])
+                    line = self.footer_schema.encode(footer) + '\n'
+                target.write(line)
+            # Missing footer aborts the rewrite, leaving original file untouched
+            if footer is None:
+                message = f"No footer found at the end of {self.filepath}."
+                logger.error(message)
+                raise ValueError(message)
+        self._index = None
+        logger.info(f"{len(new_transactions)} transaction(s) successfully added")
+        return len(new_transactions)
 
     def _update_header_field(self, header, field_name, value) -> None:
         """Updates a field value in the header record."""
@@ -168,10 +615,53 @@ class FixedWidthHandler:
         footer[field_name] = value
         logger.info(f"Value of {field_name} successfully updated into {value}")
 
-    def update_field(self, record_type, field_name, field_value, counter=None) -> None:
-        """Updates a field value in header, transaction, or footer based on record type."""
-        header, transactions, footer = self.read_file()
+    def _read_line(self, file, offset) -> str:
+        """Reads a single record starting at given byte offset."""
+        file.seek(offset)
+        return file.read(const.LINE_LENGTH).decode('utf-8')
+
+    def _write_line(self, file, offset, record, schema) -> None:
+        """Overwrites a single record starting at given byte offset."""
+        line = schema.encode_bytes(record)
+        file.seek(offset)
+        file.write(line)
+        logger.debug("Write %s into %s at %s", line, self.filepath, offset)
+
+    def _build_counter_offsets(self, file) -> dict:
+        """Scans transactions and maps their counters to byte offsets."""
+        counter_start, counter_end = self.transaction_schema.slices['Counter']
+        offsets = {}
+        offset = 0
+        file.seek(0)
+        for line in file:
+            if line[0:2] == self.field_id_transaction.encode():
+                offsets[line[counter_start:counter_end].decode('utf-8')] = offset
+            offset += len(line)
+        self._counter_offsets = offsets
+        return offsets
 
+    def _locate_transaction(self, file, counter) -> (int, dict):
+        """Finds transaction with given counter, returning its byte offset and values."""
+        counter_start, counter_end = self.transaction_schema.slices['Counter']
+        # Counters are sequential, so transaction's position comes straight from the counter
+        candidates = [int(counter) * const.RECORD_LENGTH]
+        if counter in self._counter_offsets:
+            candidates.append(self._counter_offsets[counter])
+        for offset in candidates:
+            line = self._read_line(file, offset)
+            # Verify that record under the offset is the one we are looking for
+            if line[0:2] == self.field_id_transaction and line[counter_start:counter_end] == counter:
+                return offset, self.transaction_schema.decode(line)
+        offset = self._build_counter_offsets(file).get(counter)
+        if offset is None:
+            message = f"No transaction with counter {counter} found."
+            logger.error(message)
+            raise ValueError(message)
+        return offset, self.transaction_schema.decode(self._read_line(file, offset))
+
+    @staticmethod
+    def _convert_value(record_type, field_name, field_value):
+        """Validates currency and converts value into expected type of the field."""
         # Currency validation
         if field_name == "Currency" and field_value not in const.CURRENCIES:
             logger.error(const.CURRENCY_ERROR)
@@ -192,21 +682,253 @@ class FixedWidthHandler:
             error_message = f"Cannot convert '{field_value}' to expected type for Field: '{field_name}'."
             logger.error(error_message)
             raise ValueError(error_message)
+        return value
 
-        match record_type:
-            case 'header':
-                self._update_header_field(header=header, field_name=field_name, value=value)
-            case 'transaction':
-                if counter is None:
-                    raise ValueError("Counter is required for updating a transaction.")
-                self._update_transaction_field(transactions=transactions,
-                                               field_name=field_name,
-                                               value=value,
-                                               counter=counter)
-            case 'footer':
-                self._update_footer_field(footer=footer, field_name=field_name, value=value)
-            case _:
-                message = f"Unknown record type: {record_type}"
+    @locking.locked(shared=False)
+    def update_fields(self, changes) -> int:
+        """Applies a batch of (record_type, field_name, field_value, counter) changes.
+        Every change is validated up front, then the file is rewritten in a single streaming
+        pass into a temporary file which replaces the original. Control sum is recomputed once.
+        Returns number of applied changes."""
+        header_changes, footer_changes, transaction_changes = {}, {}, {}
+        applied = 0
+        for row, (record_type, field_name, field_value, counter) in enumerate(changes, start=1):
+            try:
+                value = self._convert_value(record_type=record_type, field_name=field_name, field_value=field_value)
+                match record_type:
+                    case 'header':
+                        self._update_header_field(header=header_changes, field_name=field_name, value=value)
+                    case 'transaction':
+                        if counter is None or counter == '':
+                            raise ValueError("Counter is required for updating a transaction.")
+                        counter = str(counter).zfill(const.MAX_LENGTHS['Counter'])
+                        pending = transaction_changes.setdefault(counter, {})
+                        self._update_transaction_field(transactions=[dict(pending, Counter=counter)],
+                                                       field_name=field_name, value=value, counter=counter)
+                        pending[field_name] = value
+                    case 'footer':
+                        self._update_footer_field(footer=footer_changes, field_name=field_name, value=value)
+                    case _:
+                        raise ValueError(f"Unknown record type: {record_type}")
+            except ValueError as e:
+                message = f"Change {row}: {e}"
+                logger.error(message)
+                raise ValueError(message) from e
+            applied += 1
+
+        with metrics.registry.operation('update_fields') as operation, \
+                compressed.open_file(self.filepath, 'r', encoding='utf-8') as source, \
+                self._atomic_write(codec=self._write_codec()) as target:
+            operation.add(records=applied)
+            control_sum = 0
+            for line in source:
+                field_id = line[0:2]
+                if field_id == self.field_id_header and header_changes:
+                    header = self.header_schema.decode(line)
+                    header.update(header_changes)
+                    line = self.header_schema.encode(header) + '\n'
+                elif field_id == self.field_id_transaction:
+                    transaction = self.transaction_schema.decode(line)
+                    pending = transaction_changes.pop(transaction['Counter'], None)
+                    if pending:
+                        transaction.update(pending)
+                        line = self.transaction_schema.encode(transaction) + '\n'
+                    control_sum += int(transaction['Amount'])
+                elif field_id == self.field_id_footer:
+                    footer = self.footer_schema.decode(line)
+                    footer.update(footer_changes)
+                    footer['Control sum'] = control_sum
+                    utils.check_fields_length(field_name='Control sum', value=control_sum)
+                    line = self.footer_schema.encode(footer) + '\n'
+                target.write(line)
+            # Unknown counters abort the rewrite, leaving original file untouched
+            if transaction_changes:
+                message = f"No transaction with counter {', '.join(transaction_changes)} found."
                 logger.error(message)
                 raise ValueError(message)
-        self.write_file(header=header, transactions=transactions, footer=footer)
+        logger.info(f"{applied} change(s) successfully applied")
+        return applied
+
+    @locking.locked(shared=False)
+    def update_field(self, record_type, field_name, field_value, counter=None) -> None:
+        """Updates a field value in header, transaction, or footer based on record type.
+        Only the modified record (and footer when Amount changes) is overwritten in place."""
+        if compressed.is_compressed(self.filepath):
+            self.update_fields([(record_type, field_name, field_value, counter)])
+            return
+        value = self._convert_value(record_type=record_type, field_name=field_name, field_value=field_value)
+
+        index = self.index() if self.use_index else None
+        # Cached validation cannot tell in-place changes from appends, so it is dropped beforehand
+        ValidationCache.discard(self.filepath)
+        try:
+            with metrics.registry.operation('update_field') as operation, open(self.filepath, 'r+b') as file:
+                operation.add(records=1)
+                match record_type:
+                    case 'header':
+                        header = self.header_schema.decode(self._read_line(file, 0))
+                        self._update_header_field(header=header, field_name=field_name, value=value)
+                        self._write_line(file, 0, header, self.header_schema)
+                    case 'transaction':
+                        if counter is None:
+                            raise ValueError("Counter is required for updating a transaction.")
+                        counter = str(counter).zfill(const.MAX_LENGTHS['Counter'])
+                        offset, transaction = self._locate_transaction(file, counter)
+                        old_amount = int(transaction['Amount'])
+                        self._update_transaction_field(transactions=[transaction],
+                                                       field_name=field_name,
+                                                       value=value,
+                                                       counter=counter)
+                        self._write_line(file, offset, transaction, self.transaction_schema)
+                        # Patch Control sum by Amount's delta
+                        if field_name == 'Amount':
+                            footer_offset, footer = self._read_footer(file)
+                            footer['Control sum'] = int(footer['Control sum'] or 0) + value - old_amount
+                            utils.check_fields_length(field_name='Control sum', value=footer['Control sum'])
+                            self._write_line(file, footer_offset, footer, self.footer_schema)
+                    case 'footer':
+                        footer_offset, footer = self._read_footer(file)
+                        self._update_footer_field(footer=footer, field_name=field_name, value=value)
+                        self._write_line(file, footer_offset, footer, self.footer_schema)
+                    case _:
+                        message = f"Unknown record type: {record_type}"
+                        logger.error(message)
+                        raise ValueError(message)
+        except (OSError, UnicodeDecodeError) as e:
+            logger.error(f"Failed to update file {self.filepath}: {e}")
+            raise
+        if index is None:
+            return
+        if record_type == 'transaction' and field_name in ('Amount', 'Currency'):
+            index.update(counter=counter,
+                         amount=value if field_name == 'Amount' else None,
+                         currency=value if field_name == 'Currency' else None)
+        elif record_type == 'transaction':
+            # Other fields, e.g. Counter or Field ID, change what the index holds, so it is rebuilt on next use
+            self._index = None
+            SidecarIndex.discard(self.filepath)
+            return
+        index.save()
+
+    @locking.locked(shared=False)
+    def delete_transaction(self, counter) -> None:
+        """Marks transaction with given counter as deleted by switching its Field ID,
+        then patches Total Counter and Control sum of the footer. Only these two records
+        are overwritten, counters of other transactions stay unchanged. When compact_threshold is set,
+        compaction renumbering the counters starts in background once deleted records exceed it."""
+        counter = str(counter).zfill(const.MAX_LENGTHS['Counter'])
+        if compressed.is_compressed(self.filepath):
+            self._delete_by_rewrite(counter)
+            return
+
+        # Cached validation and index cannot tell which record disappeared
+        ValidationCache.discard(self.filepath)
+        self._index = None
+        try:
+            with metrics.registry.operation('delete_transaction') as operation, open(self.filepath, 'r+b') as file:
+                operation.add(records=1)
+                offset, transaction = self._locate_transaction(file, counter)
+                transaction['Field ID'] = self.field_id_deleted
+                self._write_line(file, offset, transaction, self.transaction_schema)
+                footer_offset, footer = self._read_footer(file)
+                total_counter = int(footer['Total Counter'] or 0) - 1
+                footer['Total Counter'] = total_counter
+                footer['Control sum'] = int(footer['Control sum'] or 0) - int(transaction['Amount'])
+                self._write_line(file, footer_offset, footer, self.footer_schema)
+        except (OSError, UnicodeDecodeError) as e:
+            logger.error(f"Failed to delete transaction from {self.filepath}: {e}")
+            raise
+        self._counter_offsets.pop(counter, None)
+        logger.info(f"Transaction {counter} marked as deleted")
+
+        # Records in the file, deleted ones included
+        records = footer_offset // const.RECORD_LENGTH - 1
+        if self.compact_threshold is not None and records - total_counter > self.compact_threshold * records:
+            self.compact(background=True)
+
+    def _delete_by_rewrite(self, counter) -> None:
+        """Marks transaction as deleted in a compressed file, as blocks cannot be patched in place.
+        Counters are kept like in plain files."""
+        counter_start, counter_end = self.transaction_schema.slices['Counter']
+        amount_start, amount_end = self.transaction_schema.slices['Amount']
+        amount = None
+        with metrics.registry.operation('delete_transaction') as operation, \
+                compressed.open_file(self.filepath, 'r', encoding='utf-8') as source, \
+                self._atomic_write(codec=self._write_codec()) as target:
+            operation.add(records=1)
+            for line in source:
+                field_id = line[0:2]
+                if field_id == self.field_id_transaction and line[counter_start:counter_end] == counter:
+                    amount = int(line[amount_start:amount_end])
+                    line = self.field_id_deleted + line[2:]
+                elif field_id == self.field_id_footer and amount is not None:
+                    footer = self.footer_schema.decode(line)
+                    footer['Total Counter'] = int(footer['Total Counter'] or 0) - 1
+                    footer['Control sum'] = int(footer['Control sum'] or 0) - amount
+                    line = self.footer_schema.encode(footer) + '\n'
+                target.write(line)
+            # Unknown counter aborts the rewrite, leaving original file untouched
+            if amount is None:
+                message = f"No transaction with counter {counter} found."
+                logger.error(message)
+                raise ValueError(message)
+        self._index = None
+        logger.info(f"Transaction {counter} marked as deleted")
+
+    def compact(self, background=False):
+        """Drops deleted transactions and renumbers the rest from 1 in a single streaming pass.
+        Counters of transactions following a deleted one change, so callers holding them have to look them up again.
+        With background=True compaction runs in a thread which is returned.
+        It is not a daemon thread, so interpreter exit waits for the rewrite to finish.
+        Otherwise returns number of dropped transactions."""
+        if not background:
+            return self._compact()
+        if self._compaction is None or not self._compaction.is_alive():
+            self._compaction = threading.Thread(target=self._compact_in_background,
+                                                name=f"compact-{os.path.basename(self.filepath)}")
+            self._compaction.start()
+        return self._compaction
+
+    def _compact_in_background(self) -> None:
+        try:
+            self._compact()
+        except Exception as e:
+            logger.error(f"Background compaction of {self.filepath} failed: {e}")
+
+    @locking.locked(shared=False)
+    def _compact(self) -> int:
+        """Rewrites the file without deleted transactions."""
+        with metrics.registry.operation('compact') as operation:
+            if not compressed.is_compressed(self.filepath):
+                with open(self.filepath, 'rb') as file:
+                    footer_offset, footer = self._read_footer(file)
+                # Nothing to drop when every record on fixed position is a live transaction
+                if (not footer_offset % const.RECORD_LENGTH
+                        and footer_offset // const.RECORD_LENGTH - 1 == int(footer['Total Counter'] or 0)):
+                    return 0
+
+            counter_start, counter_end = self.transaction_schema.slices['Counter']
+            amount_start, amount_end = self.transaction_schema.slices['Amount']
+            counter, control_sum, dropped = 0, 0, 0
+            with compressed.open_file(self.filepath, 'r', encoding='utf-8') as source, \
+                    self._atomic_write(codec=self._write_codec()) as target:
+                for line in source:
+                    field_id = line[0:2]
+                    if field_id == self.field_id_deleted:
+                        dropped += 1
+                        continue
+                    if field_id == self.field_id_transaction:
+                        counter += 1
+                        line = f"{line[:counter_start]}{counter:0{counter_end - counter_start}}{line[counter_end:]}"
+                        control_sum += int(line[amount_start:amount_end])
+                    elif field_id == self.field_id_footer:
+                        footer = self.footer_schema.decode(line)
+                        footer['Total Counter'] = counter
+                        footer['Control sum'] = control_sum
+                        line = self.footer_schema.encode(footer) + '\n'
+                    target.write(line)
+            operation.add(records=counter)
+        self._index = None
+        self._counter_offsets = {}
+        logger.info(f"File {self.filepath} compacted, {dropped} deleted transaction(s) dropped")
+        return dropped
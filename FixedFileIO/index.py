@@ -0,0 +1,168 @@
+import bisect
+import hashlib
+import json
+import logging
+import os
+from array import array
+
+from . import atomic
+from . import compressed
+from . import constants as const
+from .schema import TRANSACTION_SCHEMA
+
+
+logger = logging.getLogger(__package__)
+
+
+class SidecarIndex:
+    """
+       Persistent index of a fixed-width file stored next to it as <file>.idx.
+
+       Holds counter -> byte offset table, per-currency posting lists of
+       positions and cumulative Amount prefix sums. The index is fresh only
+       while size, mtime and footer hash of the data file match its stamp.
+
+       Attributes:
+           counters (array): Counters of transactions in file order.
+           offsets (array): Byte offsets of transactions in file order.
+           prefix_sums (array): prefix_sums[i] is the sum of first i amounts.
+           postings (dict): Currency -> array of positions of its transactions.
+           stamp (dict): Size, mtime and footer hash of the indexed file.
+    """
+
+    version = 1
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.path = filepath + '.idx'
+        self.counters = array('q')
+        self.offsets = array('q')
+        self.prefix_sums = array('q', [0])
+        self.postings = {}
+        self.stamp = None
+        self._positions = None
+
+    @staticmethod
+    def file_stamp(filepath) -> dict:
+        """Current size, mtime and footer hash of the data file."""
+        stat = os.stat(filepath)
+        with open(filepath, 'rb') as file:
+            file.seek(max(stat.st_size - const.RECORD_LENGTH, 0))
+            footer = file.read()
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                'footer_hash': hashlib.sha1(footer).hexdigest()}
+
+    def is_fresh(self) -> bool:
+        """Whether index matches the current state of the data file."""
+        try:
+            return self.stamp == self.file_stamp(self.filepath)
+        except OSError:
+            return False
+
+    @classmethod
+    def load(cls, filepath):
+        """Loads index from the sidecar, returning None when it is missing, unreadable or stale."""
+        index = cls(filepath)
+        try:
+            with open(index.path, 'rb') as file:
+                meta = json.loads(file.readline())
+                if meta.get('version') != cls.version:
+                    return None
+                count = meta['count']
+                for column, length in ((index.counters, count), (index.offsets, count),
+                                       (index.prefix_sums, count + 1)):
+                    del column[:]
+                    column.fromfile(file, length)
+                for currency, length in meta['postings'].items():
+                    index.postings[currency] = array('q')
+                    index.postings[currency].fromfile(file, length)
+        except (OSError, ValueError, KeyError, EOFError):
+            return None
+        index.stamp = meta['stamp']
+        return index if index.is_fresh() else None
+
+    @classmethod
+    def build(cls, filepath, schema=TRANSACTION_SCHEMA, field_id=b'02'):
+        """Builds index with a single scan of the data file, locating fields by transaction schema."""
+        index = cls(filepath)
+        counter_start, counter_end = schema.slices['Counter']
+        amount_start, amount_end = schema.slices['Amount']
+        currency_start, currency_end = schema.slices['Currency']
+        offset, total = 0, 0
+        with compressed.open_file(filepath, 'rb') as file:
+            for line in file:
+                if line[0:2] == field_id:
+                    currency = line[currency_start:currency_end].decode('utf-8')
+                    index.postings.setdefault(currency, array('q')).append(len(index.counters))
+                    index.counters.append(int(line[counter_start:counter_end]))
+                    index.offsets.append(offset)
+                    total += int(line[amount_start:amount_end])
+                    index.prefix_sums.append(total)
+                offset += len(line)
+        index.stamp = cls.file_stamp(filepath)
+        logger.info(f"Index of {filepath} built")
+        return index
+
+    @staticmethod
+    def discard(filepath) -> None:
+        """Removes the sidecar, e.g. when the file changed in a way the index cannot follow."""
+        try:
+            os.remove(filepath + '.idx')
+        except FileNotFoundError:
+            pass
+
+    def save(self) -> None:
+        """Writes index into the sidecar, stamping it with the current state of the data file."""
+        self.stamp = self.file_stamp(self.filepath)
+        meta = {'version': self.version, 'stamp': self.stamp, 'count': len(self.counters),
+                'postings': {currency: len(positions) for currency, positions in self.postings.items()}}
+        # Readers holding a shared lock may save concurrently, so each one writes its own temporary file
+        with atomic.write(self.path, 'wb') as file:
+            file.write(json.dumps(meta).encode('utf-8') + b'\n')
+            for column in (self.counters, self.offsets, self.prefix_sums, *self.postings.values()):
+                column.tofile(file)
+
+    def position(self, counter) -> int:
+        """Position of transaction with given counter in file order, None when missing."""
+        counter = int(counter)
+        # Counters are sequential, so position usually comes straight from the counter
+        position = counter - self.counters[0] if self.counters else -1
+        if 0 <= position < len(self.counters) and self.counters[position] == counter:
+            return position
+        if self._positions is None:
+            self._positions = {value: position for position, value in enumerate(self.counters)}
+        return self._positions.get(counter)
+
+    def offset(self, counter) -> int:
+        """Byte offset of transaction with given counter, None when missing."""
+        position = self.position(counter)
+        return None if position is None else self.offsets[position]
+
+    def range_sum(self, start=None, stop=None) -> int:
+        """Control sum of transactions with counters in inclusive range [start, stop]."""
+        first = 0 if start is None else bisect.bisect_left(self.counters, int(start))
+        last = len(self.counters) if stop is None else bisect.bisect_right(self.counters, int(stop))
+        return self.prefix_sums[last] - self.prefix_sums[first] if last > first else 0
+
+    def append(self, counter, offset, amount, currency) -> None:
+        """Registers a transaction appended at the end of the file."""
+        self.postings.setdefault(currency, array('q')).append(len(self.counters))
+        self.counters.append(int(counter))
+        self.offsets.append(offset)
+        self.prefix_sums.append(self.prefix_sums[-1] + int(amount))
+        self._positions = None
+
+    def update(self, counter, amount=None, currency=None) -> None:
+        """Registers change of Amount or Currency of an existing transaction."""
+        position = self.position(counter)
+        if amount is not None:
+            delta = int(amount) - (self.prefix_sums[position + 1] - self.prefix_sums[position])
+            for i in range(position + 1, len(self.prefix_sums)):
+                self.prefix_sums[i] += delta
+        if currency is not None:
+            for positions in self.postings.values():
+                i = bisect.bisect_left(positions, position)
+                if i < len(positions) and positions[i] == position:
+                    del positions[i]
+            positions = self.postings.setdefault(currency, array('q'))
+            positions.insert(bisect.bisect_left(positions, position), position)
@@ -0,0 +1,289 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from . import atomic
+from . import compressed
+from . import constants as const
+from . import locking
+from . import utils
+from .handler import FixedWidthHandler
+
+
+logger = logging.getLogger(__package__)
+
+
+class Journal:
+    """
+       Append-only journal of operations stored as JSON lines.
+
+       Group commit: appended operations are fsynced together once
+       commit_every operations are pending or commit_interval_ms elapsed
+       since the first pending one, whichever comes first. Every operation
+       gets a sequence number, so folded operations can be told apart.
+    """
+
+    def __init__(self, path, commit_every=1, commit_interval_ms=None):
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_interval_ms = commit_interval_ms
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._timer = None
+        self.operations = self._recover()
+        self.sequence = max((operation.get('seq', 0) for operation in self.operations), default=0)
+        self._file = open(path, 'ab')
+
+    def _recover(self) -> list:
+        """Reads journaled operations, cutting off a torn last record left by a crash."""
+        operations, valid_length = [], 0
+        try:
+            with open(self.path, 'rb') as file:
+                for line in file:
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        operations.append(json.loads(line))
+                    except ValueError:
+                        break
+                    valid_length += len(line)
+                torn = file.seek(0, os.SEEK_END) != valid_length
+        except FileNotFoundError:
+            return operations
+        if torn:
+            logger.warning(f"Discarding torn record at the end of journal {self.path}")
+            with open(self.path, 'r+b') as file:
+                file.truncate(valid_length)
+        return operations
+
+    def append(self, operation) -> None:
+        """Appends an operation, syncing to disk according to group commit settings."""
+        with self._lock:
+            self.sequence += 1
+            operation = dict(operation, seq=self.sequence)
+            self._file.write(json.dumps(operation).encode('utf-8') + b'\n')
+            self._file.flush()
+            self.operations.append(operation)
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._sync()
+            elif self.commit_interval_ms is not None and self._timer is None:
+                self._timer = threading.Timer(self.commit_interval_ms / 1000, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _sync(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending and not self._file.closed:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def sync(self) -> None:
+        """Forces pending operations to disk."""
+        with self._lock:
+            self._sync()
+
+    def clear(self) -> None:
+        """Drops all operations once they are folded into the base file."""
+        with self._lock:
+            self._sync()
+            self._file.truncate(0)
+            os.fsync(self._file.fileno())
+            self.operations = []
+
+    def discard_through(self, sequence) -> None:
+        """Drops operations up to given sequence number once they are folded into the base file.
+        Later operations are kept, the journal is replaced atomically."""
+        with self._lock:
+            self._sync()
+            operations = [operation for operation in self.operations if operation.get('seq', 0) > sequence]
+            try:
+                with atomic.write(self.path, 'wb', durable=True) as file:
+                    file.write(b''.join(json.dumps(operation).encode('utf-8') + b'\n' for operation in operations))
+                    self._file.close()
+            finally:
+                if self._file.closed:
+                    self._file = open(self.path, 'ab')
+            self.operations = operations
+
+    def close(self) -> None:
+        with self._lock:
+            self._sync()
+            self._file.close()
+
+
+def _file_hash(filepath) -> str:
+    """SHA-1 of file content."""
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as file:
+        while chunk := file.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class JournaledHandler:
+    """
+       Crash-safe wrapper of FixedWidthHandler.
+
+       Adds and updates are validated and appended to a journal next to the
+       file instead of modifying it. Reads merge the base file with the
+       journal. compact() folds the journal into the base file through
+       temporary file, fsync and rename. Opening replays an existing journal,
+       so operations acknowledged before a crash are recovered.
+
+       Before folding, a <file>.journal.fold marker records the last folded
+       sequence number and hash of the base file. If a crash interrupts
+       compaction and the base file no longer matches that hash, the fold
+       already happened, so operations up to the marked sequence are
+       dropped instead of replayed again.
+
+       Journaled adds are numbered after the last record of the base file,
+       deleted ones included, like appends of FixedWidthHandler.
+
+       Attributes:
+           handler (FixedWidthHandler): Handler of the base file.
+           journal (Journal): Journal of pending operations.
+    """
+
+    def __init__(self, filepath, commit_every=1, commit_interval_ms=None):
+        self.handler = FixedWidthHandler(filepath)
+        self.journal = Journal(filepath + '.journal', commit_every=commit_every,
+                               commit_interval_ms=commit_interval_ms)
+        self.marker_path = filepath + '.journal.fold'
+        with locking.hold(self.handler, shared=False):
+            self._finish_fold()
+            self._read_base()
+        if self.journal.operations:
+            logger.info(f"Recovered {len(self.journal.operations)} journaled operation(s) of {filepath}")
+
+    def _read_base(self) -> None:
+        """Reads live count and counter of the last record, deleted ones included, of the base file
+        and counts journaled adds on top of them."""
+        with compressed.open_file(self.handler.filepath, 'rb') as file:
+            footer_offset, footer = self.handler._read_footer(file)
+        self._total_counter = int(footer['Total Counter'] or 0)
+        self._base_counter = (self._total_counter if footer_offset % const.RECORD_LENGTH
+                              else footer_offset // const.RECORD_LENGTH - 1)
+        self._last_counter = self._base_counter
+        for operation in self.journal.operations:
+            if operation['op'] == 'add':
+                self._total_counter += 1
+                self._last_counter += 1
+
+    def _finish_fold(self) -> None:
+        """Completes compaction interrupted by a crash, dropping operations already folded into the base file."""
+        try:
+            with open(self.marker_path, encoding='utf-8') as file:
+                marker = json.load(file)
+        except FileNotFoundError:
+            return
+        if _file_hash(self.handler.filepath) != marker['base_hash']:
+            logger.warning(f"Dropping journaled operations folded into {self.handler.filepath} before a crash")
+            self.journal.discard_through(marker['sequence'])
+        os.remove(self.marker_path)
+
+    def _write_marker(self, sequence) -> None:
+        """Durably records that operations up to sequence are being folded into the current base file."""
+        data = json.dumps({'sequence': sequence, 'base_hash': _file_hash(self.handler.filepath)})
+        with atomic.write(self.marker_path, 'w', encoding='utf-8', durable=True) as file:
+            file.write(data)
+
+    def add_transaction(self, amount, currency) -> None:
+        """Validates and journals a new transaction."""
+        new_transaction = self.handler._new_transaction(amount=amount, currency=currency)
+        if self._total_counter >= self.handler.transaction_limit:
+            logger.error(f"Number of transactions reached limit - {self.handler.transaction_limit}")
+            raise utils.TransactionLimitError(self.handler.transaction_limit)
+        self.journal.append({'op': 'add', 'amount': int(new_transaction['Amount']), 'currency': currency})
+        self._total_counter += 1
+        self._last_counter += 1
+
+    def update_field(self, record_type, field_name, field_value, counter=None) -> None:
+        """Validates and journals a field update."""
+        value = self.handler._convert_value(record_type=record_type, field_name=field_name, field_value=field_value)
+        match record_type:
+            case 'header':
+                self.handler._update_header_field(header={}, field_name=field_name, value=value)
+            case 'transaction':
+                if counter is None:
+                    raise ValueError("Counter is required for updating a transaction.")
+                counter = str(counter).zfill(const.MAX_LENGTHS['Counter'])
+                if not 0 < int(counter) <= self._last_counter:
+                    message = f"No transaction with counter {counter} found."
+                    logger.error(message)
+                    raise ValueError(message)
+                if int(counter) <= self._base_counter:
+                    # Raises when transaction of the base file is missing or deleted
+                    self.handler.get_transaction(counter)
+                self.handler._update_transaction_field(transactions=[{'Counter': counter}], field_name=field_name,
+                                                       value=value, counter=counter)
+            case 'footer':
+                self.handler._update_footer_field(footer={}, field_name=field_name, value=value)
+            case _:
+                message = f"Unknown record type: {record_type}"
+                logger.error(message)
+                raise ValueError(message)
+        self.journal.append({'op': 'update', 'record_type': record_type, 'field': field_name,
+                             'value': field_value, 'counter': counter})
+
+    def read_file(self) -> (dict, list, dict):
+        """Reads the base file merged with journaled operations."""
+        return self._merge(list(self.journal.operations))
+
+    def _merge(self, operations) -> (dict, list, dict):
+        """Reads the base file with given journaled operations applied."""
+        header, transactions, footer = self.handler.read_file()
+        by_counter = {transaction['Counter']: transaction for transaction in transactions}
+        counter = self._base_counter
+        for operation in operations:
+            if operation['op'] == 'add':
+                transaction = self.handler._new_transaction(amount=operation['amount'], currency=operation['currency'])
+                counter += 1
+                transaction['Counter'] = f"{counter:0{const.MAX_LENGTHS['Counter']}}"
+                transactions.append(transaction)
+                by_counter[transaction['Counter']] = transaction
+                continue
+            value = const.FIELD_TYPES[operation['field']](operation['value'])
+            match operation['record_type']:
+                case 'header':
+                    header[operation['field']] = value
+                case 'transaction':
+                    by_counter[operation['counter']][operation['field']] = value
+                case 'footer':
+                    footer[operation['field']] = value
+        footer['Total Counter'] = f"{len(transactions):0{const.MAX_LENGTHS['Total Counter']}}"
+        footer['Control sum'] = f"{sum(int(t['Amount']) for t in transactions):0{const.MAX_LENGTHS['Control sum']}}"
+        return header, transactions, footer
+
+    def compact(self) -> int:
+        """Folds journal into the base file with an atomic rewrite. Returns number of folded operations."""
+        # Another writer landing between read and write would be lost, so both run under one lock
+        with locking.hold(self.handler, shared=False):
+            operations = list(self.journal.operations)
+            folded = len(operations)
+            if not folded:
+                return 0
+            header, transactions, footer = self._merge(operations)
+            self._write_marker(operations[-1]['seq'])
+            self.handler.write_file(header=header, transactions=transactions, footer=footer)
+            # Operations journaled meanwhile by other threads stay in the journal
+            self.journal.discard_through(operations[-1]['seq'])
+            os.remove(self.marker_path)
+            # Rewrite fills gaps between counters with deleted records, so base counters are read again
+            self._read_base()
+        logger.info(f"Compacted {folded} journaled operation(s) into {self.handler.filepath}")
+        return folded
+
+    def close(self) -> None:
+        """Syncs pending operations and closes the journal."""
+        self.journal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,163 @@
+import bisect
+import json
+import logging
+import os
+
+from . import atomic
+from . import constants as const
+from .handler import FixedWidthHandler
+
+
+logger = logging.getLogger(__package__)
+
+
+class Ledger:
+    """
+       Spreads transactions across numbered fixed-width segment files.
+
+       Every segment is a regular fixed-width file with its own header, counters
+       starting from 1 and footer. The manifest keeps counter range, count and
+       control sum of each segment, so global totals are known without opening
+       any segment.
+
+       Attributes:
+           directory (str): Directory holding manifest and segment files.
+           segment_size (int): Maximum number of transactions in one segment.
+           header (dict): Header record shared by all segments.
+           segments (list): Manifest entries of segments in counter order.
+    """
+
+    manifest_name = 'manifest.json'
+
+    def __init__(self, directory):
+        """Opens existing ledger stored in the directory."""
+        self.directory = directory
+        with open(self._manifest_path, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+        self.segment_size = manifest['segment_size']
+        self.header = manifest['header']
+        self.segments = manifest['segments']
+
+    @classmethod
+    def create(cls, directory, header, segment_size=None):
+        """Creates an empty ledger in the directory."""
+        segment_size = segment_size or const.TRANSACTION_LIMIT
+        if segment_size > 10 ** const.MAX_LENGTHS['Counter'] - 1:
+            raise ValueError(f"Segment size {segment_size} exceeds capacity of Counter field.")
+        os.makedirs(directory, exist_ok=True)
+        manifest = {'segment_size': segment_size, 'header': {**header, 'Field ID': '01'}, 'segments': []}
+        with open(os.path.join(directory, cls.manifest_name), 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=4)
+        logger.info(f"Ledger created in {directory}")
+        return cls(directory)
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, self.manifest_name)
+
+    def _save_manifest(self) -> None:
+        """Atomically replaces the manifest."""
+        manifest = {'segment_size': self.segment_size, 'header': self.header, 'segments': self.segments}
+        with atomic.write(self._manifest_path, 'w', encoding='utf-8', durable=True) as file:
+            json.dump(manifest, file, indent=4)
+
+    def _handler(self, segment) -> FixedWidthHandler:
+        handler = FixedWidthHandler(os.path.join(self.directory, segment['file']))
+        handler.transaction_limit = self.segment_size
+        return handler
+
+    def _new_segment(self) -> dict:
+        """Creates next empty segment file and registers it in the manifest."""
+        first = self.segments[-1]['last'] + 1 if self.segments else 1
+        segment = {'file': f"segment_{len(self.segments) + 1:06}.fwf",
+                   'first': first, 'last': first - 1, 'count': 0, 'control_sum': 0}
+        footer = {'Field ID': '03', 'Total Counter': f"{0:06}", 'Control sum': 0}
+        self._handler(segment).write_file(header=dict(self.header), transactions=[], footer=footer)
+        self.segments.append(segment)
+        logger.info(f"Segment {segment['file']} created")
+        return segment
+
+    def _locate(self, counter) -> (dict, str):
+        """Finds segment holding global counter, returning it with local counter."""
+        counter = int(counter)
+        index = bisect.bisect_right([segment['first'] for segment in self.segments], counter) - 1
+        if index < 0 or counter > self.segments[index]['last']:
+            message = f"No transaction with counter {counter} found."
+            logger.error(message)
+            raise ValueError(message)
+        segment = self.segments[index]
+        return segment, f"{counter - segment['first'] + 1:0{const.MAX_LENGTHS['Counter']}}"
+
+    def _refresh_segment(self, segment) -> None:
+        """Reloads segment's totals from its footer."""
+        footer = self._handler(segment).read_footer()
+        segment['count'] = int(footer['Total Counter'] or 0)
+        segment['control_sum'] = int(footer['Control sum'] or 0)
+        segment['last'] = segment['first'] + segment['count'] - 1
+
+    @property
+    def total_count(self) -> int:
+        """Number of transactions in all segments."""
+        return sum(segment['count'] for segment in self.segments)
+
+    @property
+    def control_sum(self) -> int:
+        """Sum of amounts in all segments."""
+        return sum(segment['control_sum'] for segment in self.segments)
+
+    def add_transaction(self, amount, currency) -> int:
+        """Adds a transaction to the last segment, opening a new one when it is full.
+        Returns global counter of the transaction."""
+        if not self.segments or self.segments[-1]['count'] >= self.segment_size:
+            self._new_segment()
+        segment = self.segments[-1]
+        self._handler(segment).add_transaction(amount=amount, currency=currency)
+        segment['count'] += 1
+        segment['last'] += 1
+        segment['control_sum'] += int(amount)
+        self._save_manifest()
+        return segment['last']
+
+    def update_field(self, record_type, field_name, field_value, counter=None) -> None:
+        """Updates header of every segment or a single transaction routed by its global counter."""
+        match record_type:
+            case 'header':
+                for segment in self.segments:
+                    self._handler(segment).update_field(record_type, field_name, field_value)
+                self.header[field_name] = field_value
+            case 'transaction':
+                if counter is None:
+                    raise ValueError("Counter is required for updating a transaction.")
+                segment, local_counter = self._locate(counter)
+                self._handler(segment).update_field(record_type, field_name, field_value, local_counter)
+                self._refresh_segment(segment)
+            case _:
+                message = f"Unknown record type: {record_type}"
+                logger.error(message)
+                raise ValueError(message)
+        self._save_manifest()
+
+    def get_transaction(self, counter) -> dict:
+        """Reads a single transaction by its global counter."""
+        segment, local_counter = self._locate(counter)
+        transaction = self._handler(segment).get_transaction(local_counter)
+        transaction['Counter'] = f"{int(counter):0{const.MAX_LENGTHS['Counter']}}"
+        return transaction
+
+    def iter_transactions(self, currency=None):
+        """Yields transactions of all segments with global counters."""
+        for segment in self.segments:
+            for transaction in self._handler(segment).iter_transactions(currency=currency):
+                counter = segment['first'] + int(transaction['Counter']) - 1
+                transaction['Counter'] = f"{counter:0{const.MAX_LENGTHS['Counter']}}"
+                yield transaction
+
+    def rebuild_manifest(self) -> None:
+        """Recomputes segment ranges and totals from segment footers, e.g. after a crash."""
+        first = 1
+        for segment in self.segments:
+            segment['first'] = first
+            self._refresh_segment(segment)
+            first = segment['last'] + 1
+        self._save_manifest()
+        logger.info(f"Manifest of {self.directory} rebuilt")
@@ -0,0 +1,163 @@
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+logger = logging.getLogger(__package__)
+
+
+class LockTimeoutError(Exception):
+    """Exception raised when a file lock cannot be acquired in time."""
+    def __init__(self, filepath, timeout, message="Timed out waiting for lock"):
+        self.filepath = filepath
+        self.timeout = timeout
+        self.message = message
+        super().__init__(f"{message} on {filepath} after {timeout}s")
+
+
+class LockConflictError(Exception):
+    """Exception raised when a lock is requested while an unfinished generator of the same owner
+    holds a conflicting one, which would otherwise wait for itself until timeout."""
+    def __init__(self, filepath, message="Lock is held by an unfinished iterator"):
+        self.filepath = filepath
+        self.message = message
+        super().__init__(f"{message} on {filepath}, exhaust or close the iterator first")
+
+
+class FileLock:
+    """
+       Advisory reader/writer lock shared between processes.
+
+       The lock is taken on a <file>.lock sidecar rather than the data file,
+       because atomic rewrites replace the data file with a new inode.
+       Without fcntl (e.g. on Windows) locking is a no-op.
+
+       Readers do not create the sidecar for a missing file, and they go without
+       a lock in read-only locations, which cannot have writers. An existing
+       sidecar is still opened for reading and locked there.
+    """
+
+    poll_interval = 0.01
+
+    def __init__(self, filepath, shared=False, timeout=None):
+        self.filepath = filepath
+        self.path = filepath + '.lock'
+        self.shared = shared
+        self.timeout = timeout
+        self._file = None
+
+    def acquire(self) -> None:
+        if fcntl is None:
+            return
+        if self.shared and not os.path.exists(self.filepath):
+            return
+        try:
+            self._file = open(self.path, 'a')
+        except OSError as e:
+            if not self.shared:
+                raise
+            try:
+                self._file = open(self.path, 'r')
+            except OSError:
+                logger.debug(f"Reading {self.filepath} without lock, sidecar cannot be created: {e}")
+                return
+        operation = (fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX) | fcntl.LOCK_NB
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(self._file.fileno(), operation)
+                return
+            except BlockingIOError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    self._file.close()
+                    self._file = None
+                    logger.error(f"Timed out waiting for lock on {self.filepath}")
+                    raise LockTimeoutError(self.filepath, self.timeout)
+                time.sleep(self.poll_interval)
+
+    def release(self) -> None:
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+def _check_generators(owner, shared) -> None:
+    """Fails fast when owner's suspended generators hold a lock conflicting with the requested one.
+    Such generator resumes only after the request, so waiting for it would end in a timeout."""
+    held = vars(owner).get('_generator_locks')
+    if held and not (shared and all(held)):
+        logger.error(f"Lock requested on {owner.filepath} while an unfinished iterator holds a conflicting one")
+        raise LockConflictError(owner.filepath)
+
+
+@contextmanager
+def hold(owner, shared):
+    """Holds lock of owner's file. Nested calls in the same thread reuse the outer lock.
+    Owner provides filepath, lock_timeout and a threading.local _lock_state."""
+    state = owner._lock_state
+    if getattr(state, 'depth', 0):
+        state.depth += 1
+        try:
+            yield
+        finally:
+            state.depth -= 1
+        return
+    _check_generators(owner, shared)
+    with FileLock(owner.filepath, shared=shared, timeout=owner.lock_timeout):
+        state.depth = 1
+        try:
+            yield
+        finally:
+            state.depth = 0
+
+
+def locked(shared):
+    """Decorator holding shared (readers) or exclusive (writers) lock for the duration of a method.
+    Generators hold the lock until they are exhausted or closed. Meanwhile conflicting requests
+    of the same owner, e.g. a write issued while iterating, raise LockConflictError."""
+    def decorator(method):
+        if inspect.isgeneratorfunction(method):
+            @functools.wraps(method)
+            def generator_wrapper(self, *args, **kwargs):
+                # Generators may be resumed from other threads, so they take their own lock
+                if getattr(self._lock_state, 'depth', 0):
+                    yield from method(self, *args, **kwargs)
+                    return
+                _check_generators(self, shared)
+                with FileLock(self.filepath, shared=shared, timeout=self.lock_timeout):
+                    # Registered per owner, as generators may be resumed from other threads
+                    held = vars(self).setdefault('_generator_locks', [])
+                    held.append(shared)
+                    try:
+                        yield from method(self, *args, **kwargs)
+                    finally:
+                        held.remove(shared)
+            return generator_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with hold(self, shared=shared):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def new_lock_state() -> threading.local:
+    return threading.local()
@@ -0,0 +1,167 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from . import atomic
+
+
+logger = logging.getLogger(__package__)
+
+
+class OperationStats:
+    """Totals of a single kind of operation."""
+    __slots__ = ('count', 'records', 'bytes', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.records = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> dict:
+        return {'count': self.count, 'records': self.records, 'bytes': self.bytes,
+                'seconds': self.seconds, 'records_per_second': self.records_per_second}
+
+
+class _Phase:
+    """Adds time spent inside the block to a phase."""
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.perf_counter() - self.start
+        with self.metrics._lock:
+            self.metrics.phases[self.name] += elapsed
+
+
+class _Operation:
+    """Times an operation and collects number of records and bytes it processed."""
+    __slots__ = ('metrics', 'name', 'records', 'bytes', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.records = 0
+        self.bytes = 0
+
+    def add(self, records=0, nbytes=0) -> None:
+        self.records += records
+        self.bytes += nbytes
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics._record(self.name, self.records, self.bytes, time.perf_counter() - self.start)
+
+
+class _NullTimer:
+    """Shared do-nothing phase and operation used while metrics are disabled."""
+    __slots__ = ()
+
+    def add(self, records=0, nbytes=0) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """
+       Per-phase timings and per-operation counts of file operations.
+
+       Disabled metrics hand out a shared no-op timer, so instrumented code pays
+       a single attribute check per operation. Hooks are called after every
+       operation with its name and OperationStats-like dict.
+
+       Attributes:
+           enabled (bool): Whether timings and counts are collected.
+           phases (dict): Phase name -> total seconds.
+           operations (dict): Operation name -> OperationStats.
+           hooks (list): Callables receiving (operation, stats) after every operation.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.hooks = []
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.phases = defaultdict(float)
+        self.operations = defaultdict(OperationStats)
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def add_hook(self, hook) -> None:
+        self.hooks.append(hook)
+
+    def phase(self, name):
+        """Context manager adding time spent inside to the phase, e.g. open, parse or fsync."""
+        return _Phase(self, name) if self.enabled else _NULL_TIMER
+
+    def operation(self, name):
+        """Context manager timing an operation. Records and bytes are registered with add()."""
+        return _Operation(self, name) if self.enabled else _NULL_TIMER
+
+    def _record(self, name, records, nbytes, seconds) -> None:
+        with self._lock:
+            stats = self.operations[name]
+            stats.count += 1
+            stats.records += records
+            stats.bytes += nbytes
+            stats.seconds += seconds
+        for hook in self.hooks:
+            hook(name, {'records': records, 'bytes': nbytes, 'seconds': seconds})
+
+    def report(self) -> dict:
+        """Collected timings and counts as a plain dict."""
+        with self._lock:
+            return {'phases': dict(self.phases),
+                    'operations': {name: stats.as_dict() for name, stats in self.operations.items()}}
+
+    def prometheus(self) -> str:
+        """Collected timings and counts in Prometheus text exposition format."""
+        report = self.report()
+        lines = ['# TYPE fixedfileio_phase_seconds_total counter']
+        lines += [f'fixedfileio_phase_seconds_total{{phase="{name}"}} {seconds}'
+                  for name, seconds in sorted(report['phases'].items())]
+        for metric, key in (('operations_total', 'count'), ('records_total', 'records'),
+                            ('bytes_total', 'bytes'), ('operation_seconds_total', 'seconds')):
+            lines.append(f'# TYPE fixedfileio_{metric} counter')
+            lines += [f'fixedfileio_{metric}{{operation="{name}"}} {stats[key]}'
+                      for name, stats in sorted(report['operations'].items())]
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path) -> None:
+        """Writes metrics for node_exporter's textfile collector, replacing the file atomically."""
+        with atomic.write(path, 'w', encoding='utf-8') as file:
+            file.write(self.prometheus())
+        logger.info(f"Metrics written into {path}")
+
+
+# Metrics shared by all handlers, disabled by default
+registry = Metrics()
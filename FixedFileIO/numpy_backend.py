@@ -0,0 +1,95 @@
+import logging
+
+from . import compressed
+from . import constants as const
+from .schema import TRANSACTION_SCHEMA
+from .table import CURRENCY_CODES, TransactionTable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+logger = logging.getLogger(__package__)
+
+# NumPy is optional, pure-Python path is used when it is missing
+HAS_NUMPY = np is not None
+
+
+def record_dtype(slices):
+    """Builds structured dtype of a single line (including newline) from slice definitions."""
+    fields = [(field, f"S{end - start}") for field, (start, end) in slices.items()]
+    return np.dtype(fields + [('Newline', 'S1')])
+
+
+def load_records(filepath, slices=const.TRANSACTIONS_SLICES):
+    """Loads the file as an array of records shaped by transaction slices.
+    First and last element hold header and footer lines."""
+    with compressed.open_file(filepath, 'rb') as file:
+        data = file.read()
+    # Last line may come without trailing newline
+    if not data.endswith(b'\n'):
+        data += b'\n'
+    if len(data) % const.RECORD_LENGTH or len(data) < 2 * const.RECORD_LENGTH:
+        message = f"File {filepath} does not consist of {const.LINE_LENGTH} characters long records."
+        logger.error(message)
+        raise ValueError(message)
+    return data, np.frombuffer(data, dtype=record_dtype(slices))
+
+
+def currency_codes(currencies):
+    """Maps array of currency bytes into codes of constants.CURRENCIES.
+    Returns codes and mask of recognized currencies."""
+    ordered = sorted(const.CURRENCIES)
+    known = np.array([currency.encode('utf-8') for currency in ordered], dtype='S3')
+    positions = np.searchsorted(known, currencies).clip(0, len(known) - 1)
+    valid = known[positions] == currencies
+    codes = np.array([CURRENCY_CODES[currency] for currency in ordered], dtype=np.uint8)[positions]
+    return codes, valid
+
+
+def to_table(records, field_id='02', schema=TRANSACTION_SCHEMA) -> TransactionTable:
+    """Converts transaction records into TransactionTable."""
+    codes, valid = currency_codes(records['Currency'])
+    if not valid.all():
+        raise ValueError(const.CURRENCY_ERROR)
+    reserved = records['Reserved']
+    blank = b' ' * records.dtype['Reserved'].itemsize
+    counters = records['Counter'].astype(np.int64)
+    # Counters are kept explicitly only when deleted records left gaps
+    sequential = (counters == np.arange(1, len(counters) + 1)).all()
+    return TransactionTable.from_columns(
+        amounts=records['Amount'].astype(np.int64).tobytes(),
+        currencies=codes.tobytes(),
+        reserved={int(index): bytes(reserved[index]) for index in np.nonzero(reserved != blank)[0]},
+        field_id=field_id,
+        counters=None if sequential else counters.tolist(),
+        schema=schema
+    )
+
+
+def validate_transactions(records, field_id='02', deleted_field_id='04') -> (bool, str, int):
+    """Checks every transaction with vectorized operations, counters included.
+    Returns status, failure message and control sum of amounts, deleted transactions are not summed."""
+    if not (records['Newline'] == b'\n').all():
+        return False, f"Required line length: {const.LINE_LENGTH}", None
+    live = records['Field ID'] == field_id.encode('utf-8')
+    if not (live | (records['Field ID'] == deleted_field_id.encode('utf-8'))).all():
+        return False, "Invalid Field ID in transaction.", None
+    counters = records['Counter']
+    if not (np.char.isdigit(counters) & (counters != b'000000')).all():
+        return False, "Counter format is not correct.", None
+    # Deleted records keep their counters, so the sequence is checked across all records
+    steps = np.diff(counters.astype(np.int64))
+    if not (steps == 1).all():
+        position = int(np.nonzero(steps != 1)[0][0])
+        return False, f"Counter {int(counters[position + 1])} does not follow {int(counters[position])}.", None
+    amounts = records['Amount']
+    if not np.char.isdigit(amounts).all():
+        return False, "Amount format is not correct.", None
+    _, valid = currency_codes(records['Currency'])
+    if not valid.all():
+        invalid = records['Currency'][~valid][0].decode('utf-8', 'replace')
+        return False, f"Invalid currency '{invalid}' in transaction.", None
+    return True, "Transactions are valid.", int(amounts[live].astype(np.int64).sum())
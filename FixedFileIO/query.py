@@ -0,0 +1,79 @@
+import heapq
+import logging
+
+from . import compressed
+from .schema import TRANSACTION_SCHEMA
+
+
+logger = logging.getLogger(__package__)
+
+
+class CurrencyStats:
+    """Running aggregates of transactions in a single currency."""
+    __slots__ = ('count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, amount) -> None:
+        self.count += 1
+        self.total += amount
+        if self.min is None or amount < self.min:
+            self.min = amount
+        if self.max is None or amount > self.max:
+            self.max = amount
+
+    def as_dict(self) -> dict:
+        return {'count': self.count, 'sum': self.total, 'min': self.min, 'max': self.max}
+
+
+def scan(filepath, currency=None, start=None, stop=None, min_amount=None, max_amount=None, field_id=b'02',
+         schema=TRANSACTION_SCHEMA):
+    """Yields (counter, amount, currency, line) of transactions matching filters.
+    Filters are checked on raw bytes, so no record is built for skipped lines.
+    Counter and amount ranges are inclusive. Fields are located by transaction schema."""
+    counter_start, counter_end = schema.slices['Counter']
+    amount_start, amount_end = schema.slices['Amount']
+    currency_start, currency_end = schema.slices['Currency']
+    wanted = currency.encode('utf-8') if currency is not None else None
+    with compressed.open_file(filepath, 'rb') as file:
+        for line in file:
+            if line[0:2] != field_id:
+                continue
+            code = line[currency_start:currency_end]
+            if wanted is not None and code != wanted:
+                continue
+            counter = int(line[counter_start:counter_end])
+            if (start is not None and counter < start) or (stop is not None and counter > stop):
+                continue
+            amount = int(line[amount_start:amount_end])
+            if (min_amount is not None and amount < min_amount) or (max_amount is not None and amount > max_amount):
+                continue
+            yield counter, amount, code.decode('utf-8'), line
+
+
+def aggregate(filepath, top=0, **filters) -> dict:
+    """Computes per-currency count, sum, min and max together with top-N amounts
+    in a single streaming pass. Memory is bounded by number of currencies and N."""
+    stats, heap = {}, []
+    for counter, amount, currency, _ in scan(filepath, **filters):
+        currency_stats = stats.get(currency)
+        if currency_stats is None:
+            currency_stats = stats[currency] = CurrencyStats()
+        currency_stats.add(amount)
+        if top:
+            # Heap keeps N largest amounts, earlier counters win ties
+            item = (amount, -counter, currency)
+            if len(heap) < top:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+    return {
+        'count': sum(currency_stats.count for currency_stats in stats.values()),
+        'currencies': {currency: stats[currency].as_dict() for currency in sorted(stats)},
+        'top': [{'Counter': f"{-counter:06}", 'Amount': amount, 'Currency': currency}
+                for amount, counter, currency in sorted(heap, reverse=True)]
+    }
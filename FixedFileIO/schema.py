@@ -0,0 +1,74 @@
+import struct
+from functools import lru_cache
+
+from . import constants as const
+
+
+class RecordSchema:
+    """
+       Record layout compiled once from slice definitions.
+
+       Holds a struct.Struct of the whole line together with per-field padding
+       rules, so a record is decoded with a single unpack and encoded with a
+       single pack. Custom layouts are defined by creating a new schema.
+
+       Attributes:
+           slices (dict): Field name -> (start, end) definitions.
+           fields (tuple): Field names in order of appearance.
+           widths (tuple): Widths of fields.
+           length (int): Length of the whole record.
+    """
+
+    def __init__(self, slices, zero_padded=const.ZERO_PADDED_FIELDS):
+        position = 0
+        for field, (start, end) in slices.items():
+            if start != position or end <= start:
+                raise ValueError(f"Field '{field}' must start at {position} and have positive width.")
+            position = end
+        self.slices = dict(slices)
+        self.fields = tuple(slices)
+        self.widths = tuple(end - start for start, end in slices.values())
+        self.length = position
+        self._bounds = tuple(slices.values())
+        self._struct = struct.Struct(''.join(f"{width}s" for width in self.widths))
+        self._padders = tuple(str.zfill if field in zero_padded else str.ljust for field in self.fields)
+
+    def decode(self, line) -> dict:
+        """Extracts stripped field values from a line (str or bytes)."""
+        if isinstance(line, str):
+            return {field: line[start:end].strip() for field, (start, end) in zip(self.fields, self._bounds)}
+        values = self._struct.unpack_from(line)
+        return {field: value.decode('utf-8').strip() for field, value in zip(self.fields, values)}
+
+    def _padded(self, record):
+        for field, width, pad in zip(self.fields, self.widths, self._padders):
+            value = pad(str(record.get(field, '')), width)
+            if len(value) > width:
+                raise ValueError(f"Value for {field} exceeds maximum length of {width}.")
+            yield value
+
+    def encode(self, record) -> str:
+        """Formats a record into a fixed-width line."""
+        return ''.join(self._padded(record))
+
+    def encode_bytes(self, record) -> bytes:
+        """Formats a record into a fixed-width line of bytes with a single pack."""
+        values = [value.encode('utf-8') for value in self._padded(record)]
+        if any(len(value) != width for value, width in zip(values, self.widths)):
+            raise ValueError("Encoded record does not fit into schema widths.")
+        return self._struct.pack(*values)
+
+
+@lru_cache(maxsize=None)
+def _compile(items) -> RecordSchema:
+    return RecordSchema(dict(items))
+
+
+def schema_for(slices) -> RecordSchema:
+    """Returns compiled schema of slice definitions, compiling it only once."""
+    return _compile(tuple(slices.items()))
+
+
+HEADER_SCHEMA = schema_for(const.HEADER_SLICES)
+TRANSACTION_SCHEMA = schema_for(const.TRANSACTIONS_SLICES)
+FOOTER_SCHEMA = schema_for(const.FOOTER_SLICES)
@@ -0,0 +1,193 @@
+import bisect
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from . import constants as const
+from .handler import FixedWidthHandler
+from .locking import LockConflictError, LockTimeoutError
+from .utils import TransactionLimitError
+
+
+logger = logging.getLogger(__package__)
+
+
+class LedgerService:
+    """
+       Keeps a parsed file in memory and serializes writes through a single writer.
+
+       Reads are answered from memory without touching disk. Writes go through
+       one writer thread which persists them with the in-place handler operations
+       and then applies them to the in-memory state.
+
+       Attributes:
+           handler (FixedWidthHandler): Handler used for persisting writes.
+    """
+
+    def __init__(self, filepath):
+        self.handler = FixedWidthHandler(filepath)
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ledger-writer')
+        self._load()
+
+    def _load(self) -> None:
+        header, transactions, footer = self.handler.read_file(table=True)
+        with self._lock:
+            self._header, self._transactions, self._footer = header, transactions, footer
+        logger.info(f"Ledger {self.handler.filepath} loaded into memory")
+
+    def close(self) -> None:
+        self._writer.shutdown(wait=True)
+
+    def header(self) -> dict:
+        with self._lock:
+            return dict(self._header)
+
+    def footer(self) -> dict:
+        with self._lock:
+            return dict(self._footer)
+
+    def transaction(self, counter) -> dict:
+        with self._lock:
+            return dict(self._transactions[self._transactions.position(counter)])
+
+    def transactions(self, currency=None, start=None, stop=None) -> list:
+        with self._lock:
+            # Deleted transactions leave gaps, so the range is searched by counter
+            first = (bisect.bisect_left(self._transactions, int(start), key=lambda row: row.counter)
+                     if start is not None else 0)
+            last = (bisect.bisect_right(self._transactions, int(stop), key=lambda row: row.counter)
+                    if stop is not None else len(self._transactions))
+            rows = self._transactions[first:last]
+            return [dict(row) for row in rows if currency is None or row.currency == currency]
+
+    def stats(self) -> dict:
+        """Per-currency count, sum, min and max computed from in-memory columns."""
+        with self._lock:
+            stats = {}
+            for amount, code in zip(self._transactions.amounts, self._transactions.currencies):
+                values = stats.setdefault(const.CURRENCIES[code], {'count': 0, 'sum': 0, 'min': amount, 'max': amount})
+                values['count'] += 1
+                values['sum'] += amount
+                values['min'] = min(values['min'], amount)
+                values['max'] = max(values['max'], amount)
+            return {'count': len(self._transactions), 'currencies': stats}
+
+    def _refresh_footer(self) -> None:
+        """Recomputes footer totals from in-memory columns. Caller holds the lock."""
+        self._footer['Total Counter'] = f"{len(self._transactions):0{const.MAX_LENGTHS['Total Counter']}}"
+        self._footer['Control sum'] = f"{self._transactions.control_sum():0{const.MAX_LENGTHS['Control sum']}}"
+
+    def _add(self, amount, currency) -> dict:
+        counter = self.handler.add_transaction(amount=amount, currency=currency)
+        with self._lock:
+            self._transactions.append(amount=amount, currency=currency, counter=counter)
+            self._refresh_footer()
+            return dict(self._transactions[-1])
+
+    def _update(self, record_type, field_name, field_value, counter) -> None:
+        self.handler.update_field(record_type=record_type, field_name=field_name,
+                                  field_value=field_value, counter=counter)
+        with self._lock:
+            if record_type == 'header':
+                self._header[field_name] = field_value
+                return
+            if record_type == 'transaction' and field_name in ('Amount', 'Currency'):
+                position = self._transactions.position(counter)
+                if field_name == 'Amount':
+                    self._transactions.amounts[position] = int(field_value)
+                    self._refresh_footer()
+                else:
+                    self._transactions.currencies[position] = const.CURRENCIES.index(field_value)
+                return
+        # Other fields are rare, reload to keep memory consistent with disk
+        self._load()
+
+    def add_transaction(self, amount, currency) -> dict:
+        """Adds a transaction through the single writer."""
+        return self._writer.submit(self._add, int(amount), currency).result()
+
+    def update_field(self, record_type, field_name, field_value, counter=None) -> None:
+        """Updates a field through the single writer."""
+        return self._writer.submit(self._update, record_type, field_name, field_value, counter).result()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """JSON API over in-memory ledger."""
+    service: LedgerService
+
+    def _reply(self, status, payload) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, action) -> None:
+        try:
+            self._reply(200, action())
+        except (KeyError, IndexError) as e:
+            self._reply(404, {'error': str(e).strip("'\"")})
+        except (ValueError, TypeError) as e:
+            self._reply(400, {'error': str(e)})
+        except (TransactionLimitError, LockConflictError) as e:
+            self._reply(409, {'error': str(e)})
+        except LockTimeoutError as e:
+            self._reply(503, {'error': str(e)})
+        except OSError as e:
+            logger.error(f"Request {self.path} failed: {e}")
+            self._reply(500, {'error': str(e)})
+
+    def _body(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split('/') if part]
+        match parts:
+            case ['header']:
+                self._dispatch(self.service.header)
+            case ['footer']:
+                self._dispatch(self.service.footer)
+            case ['stats']:
+                self._dispatch(self.service.stats)
+            case ['transactions']:
+                self._dispatch(lambda: self.service.transactions(currency=query.get('currency'),
+                                                                 start=query.get('start'),
+                                                                 stop=query.get('stop')))
+            case ['transactions', counter]:
+                self._dispatch(lambda: self.service.transaction(counter))
+            case _:
+                self._reply(404, {'error': f"Unknown resource {url.path}"})
+
+    def do_POST(self) -> None:
+        match [part for part in urlparse(self.path).path.split('/') if part]:
+            case ['transactions']:
+                self._dispatch(lambda: self.service.add_transaction(**self._body()))
+            case ['update']:
+                self._dispatch(lambda: self.service.update_field(**self._body()) or {'status': 'updated'})
+            case _:
+                self._reply(404, {'error': f"Unknown resource {self.path}"})
+
+    def log_message(self, format, *args) -> None:
+        logger.debug(format % args)
+
+
+def create_server(filepath, host='127.0.0.1', port=8080) -> ThreadingHTTPServer:
+    """Creates HTTP server exposing read/add/update/stats of the file kept in memory.
+
+       GET  /header, /footer, /stats, /transactions[?currency=&start=&stop=], /transactions/<counter>
+       POST /transactions {"amount", "currency"}
+       POST /update {"record_type", "field_name", "field_value", "counter"}
+    """
+    service = LedgerService(filepath)
+    request_handler = type('RequestHandler', (_RequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), request_handler)
+    server.service = service
+    return server
@@ -0,0 +1,207 @@
+import logging
+import os
+from contextlib import ExitStack
+
+from . import compressed
+from . import constants as const
+from . import locking
+from . import utils
+from .validation_cache import ValidationCache
+
+
+logger = logging.getLogger(__package__)
+
+
+class Session:
+    """
+       Unit of work loading the file once and collecting changes in memory.
+
+       Every change is validated right away and affected records are marked
+       dirty. Commit overwrites only dirty records, the appended tail and the
+       footer in place, or rewrites the whole file atomically when more than
+       rewrite_ratio of records changed. Deleted transactions are not loaded,
+       a full rewrite keeps them in place of their counters. The file stays
+       exclusively locked while the session is open.
+
+       Attributes:
+           handler (FixedWidthHandler): Handler of the file.
+           header (dict): Header record.
+           transactions (list): Transaction records, including added ones.
+           footer (dict): Footer record with running Total Counter and Control sum.
+           rewrite_ratio (float): Share of changed records above which commit rewrites the file.
+    """
+
+    rewrite_ratio = 0.25
+
+    def __init__(self, handler, rewrite_ratio=None):
+        self.handler = handler
+        if rewrite_ratio is not None:
+            self.rewrite_ratio = rewrite_ratio
+        self.header, self.transactions, self.footer = None, [], None
+        # Positions of dirty transactions
+        self._dirty = set()
+        self._dirty_header = False
+        self._loaded = 0
+        # Byte offsets of loaded transactions, in order of positions
+        self._offsets = []
+        self._records = 0
+        self._next_counter = 1
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        self._stack.enter_context(locking.hold(self.handler, shared=False))
+        try:
+            self.load()
+        except BaseException:
+            self._stack.close()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.commit()
+        finally:
+            self._stack.close()
+
+    def load(self) -> None:
+        """Reads the file, dropping uncommitted changes."""
+        self.header, self.transactions, self.footer = self.handler.read_file()
+        self._loaded = len(self.transactions)
+        self._read_layout()
+        self._next_counter = max(self._records, int(self.footer['Total Counter'] or 0)) + 1
+        self._dirty.clear()
+        self._dirty_header = False
+
+    def _read_layout(self) -> None:
+        """Records byte offsets of loaded transactions and number of records in the file, deleted ones included.
+        Offsets are read from the file, as counters need not match record positions."""
+        self._offsets = []
+        if compressed.is_compressed(self.handler.filepath):
+            self._records = self._loaded
+            return
+        field_id = self.handler.field_id_transaction.encode('utf-8')
+        size = 0
+        with open(self.handler.filepath, 'rb') as file:
+            for line in file:
+                if line[0:2] == field_id:
+                    self._offsets.append(size)
+                size += len(line)
+        self._records = size // const.RECORD_LENGTH - 2 if size and not size % const.RECORD_LENGTH else self._loaded
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty_header or self._dirty or len(self.transactions) > self._loaded)
+
+    def _position(self, counter) -> int:
+        """Position of transaction with given counter."""
+        counter = str(counter).zfill(const.MAX_LENGTHS['Counter'])
+        # Counters are sequential, so transaction's position comes straight from the counter
+        position = int(counter) - 1
+        if 0 <= position < len(self.transactions) and self.transactions[position]['Counter'] == counter:
+            return position
+        for position, transaction in enumerate(self.transactions):
+            if transaction['Counter'] == counter:
+                return position
+        message = f"No transaction with counter {counter} found."
+        logger.error(message)
+        raise ValueError(message)
+
+    def get_transaction(self, counter) -> dict:
+        return self.transactions[self._position(counter)]
+
+    def add_transaction(self, amount, currency) -> dict:
+        """Adds a transaction to the session, returning it with assigned Counter."""
+        new_transaction = self.handler._new_transaction(amount=amount, currency=currency)
+        # Check whether there are no more than 20000 transactions
+        if len(self.transactions) + 1 > self.handler.transaction_limit:
+            logger.error(f"Number of transactions reached limit - {self.handler.transaction_limit}")
+            raise utils.TransactionLimitError(self.handler.transaction_limit)
+        total_counter = int(self.footer['Total Counter'] or 0) + 1
+        control_sum = int(self.footer['Control sum'] or 0) + int(new_transaction['Amount'])
+        utils.check_fields_length(field_name='Control sum', value=control_sum)
+        new_transaction['Counter'] = f"{self._next_counter:0{const.MAX_LENGTHS['Counter']}}"
+        self._next_counter += 1
+        self.transactions.append(new_transaction)
+        self.footer['Total Counter'] = f"{total_counter:0{const.MAX_LENGTHS['Total Counter']}}"
+        self.footer['Control sum'] = control_sum
+        logger.debug("Add transaction: %s", new_transaction)
+        return new_transaction
+
+    def update_field(self, record_type, field_name, field_value, counter=None) -> None:
+        """Updates a field of header, transaction or footer in the session."""
+        value = self.handler._convert_value(record_type=record_type, field_name=field_name, field_value=field_value)
+        match record_type:
+            case 'header':
+                self.handler._update_header_field(header=self.header, field_name=field_name, value=value)
+                self._dirty_header = True
+            case 'transaction':
+                if counter is None:
+                    raise ValueError("Counter is required for updating a transaction.")
+                position = self._position(counter)
+                transaction = dict(self.transactions[position])
+                self.handler._update_transaction_field(transactions=[transaction], field_name=field_name,
+                                                       value=value, counter=transaction['Counter'])
+                if field_name == 'Amount':
+                    # Patch Control sum by Amount's delta
+                    control_sum = (int(self.footer['Control sum'] or 0) + value
+                                   - int(self.transactions[position]['Amount']))
+                    utils.check_fields_length(field_name='Control sum', value=control_sum)
+                    self.footer['Control sum'] = control_sum
+                if position < self._loaded:
+                    self._dirty.add(position)
+                self.transactions[position] = transaction
+            case 'footer':
+                self.handler._update_footer_field(footer=self.footer, field_name=field_name, value=value)
+            case _:
+                message = f"Unknown record type: {record_type}"
+                logger.error(message)
+                raise ValueError(message)
+
+    def _fixed_layout(self) -> bool:
+        """Whether loaded records sit on fixed offsets, so they can be overwritten in place."""
+        if compressed.is_compressed(self.handler.filepath):
+            return False
+        return (len(self._offsets) == self._loaded
+                and os.path.getsize(self.handler.filepath) == (self._records + 2) * const.RECORD_LENGTH)
+
+    def commit(self) -> None:
+        """Writes changes into the file."""
+        if not self.dirty:
+            return
+        appended = self.transactions[self._loaded:]
+        changed = len(self._dirty) + len(appended) + self._dirty_header
+        if changed > self.rewrite_ratio * max(len(self.transactions), 1) or not self._fixed_layout():
+            self.handler.write_file(self.header, self.transactions, self.footer)
+            self._loaded = len(self.transactions)
+            # Rewrite fills gaps between counters with deleted records, so offsets are read again
+            self._read_layout()
+            logger.info(f"Session committed with full rewrite of {changed} changed record(s)")
+        else:
+            self._flush_in_place(appended)
+            self._offsets.extend((self._records + 1 + position) * const.RECORD_LENGTH
+                                 for position in range(len(appended)))
+            self._records += len(appended)
+            self._loaded = len(self.transactions)
+            logger.info(f"Session committed {changed} changed record(s) in place")
+        last_counter = int(self.transactions[-1]['Counter']) if self.transactions else 0
+        self._next_counter = max(self._records, last_counter) + 1
+        self._dirty.clear()
+        self._dirty_header = False
+
+    def _flush_in_place(self, appended) -> None:
+        """Overwrites dirty records, then writes appended tail together with the footer."""
+        handler = self.handler
+        # Cached validation cannot tell in-place changes from appends, so it is dropped beforehand
+        ValidationCache.discard(handler.filepath)
+        with open(handler.filepath, 'r+b') as file:
+            if self._dirty_header:
+                handler._write_line(file, 0, self.header, handler.header_schema)
+            for position in sorted(self._dirty):
+                handler._write_line(file, self._offsets[position], self.transactions[position],
+                                    handler.transaction_schema)
+            lines = [handler.transaction_schema.encode_bytes(transaction) for transaction in appended]
+            lines.append(handler.footer_schema.encode_bytes(self.footer))
+            file.seek((self._records + 1) * const.RECORD_LENGTH)
+            file.write(b'\n'.join(lines) + b'\n')
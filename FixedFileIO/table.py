@@ -0,0 +1,190 @@
+import bisect
+from array import array
+from collections.abc import Mapping
+
+from . import constants as const
+from .schema import TRANSACTION_SCHEMA
+
+
+# Small-int codes of currencies, indices into constants.CURRENCIES
+CURRENCY_CODES = {currency: code for code, currency in enumerate(const.CURRENCIES)}
+
+
+class TransactionRow(Mapping):
+    """Lightweight proxy of a single table row, readable like a transaction dict."""
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    @property
+    def counter(self) -> int:
+        return self._table.counter(self._index)
+
+    @property
+    def amount(self) -> int:
+        return self._table.amounts[self._index]
+
+    @property
+    def currency(self) -> str:
+        return const.CURRENCIES[self._table.currencies[self._index]]
+
+    @property
+    def reserved(self) -> str:
+        return self._table.reserved(self._index)
+
+    def __getitem__(self, field) -> str:
+        match field:
+            case 'Field ID':
+                return self._table.field_id
+            case 'Counter':
+                return f"{self.counter:0{const.MAX_LENGTHS['Counter']}}"
+            case 'Amount':
+                return f"{self.amount:0{const.MAX_LENGTHS['Amount']}}"
+            case 'Currency':
+                return self.currency
+            case 'Reserved':
+                return self.reserved
+        raise KeyError(field)
+
+    def __iter__(self):
+        return iter(self._table.schema.fields)
+
+    def __len__(self) -> int:
+        return len(self._table.schema.fields)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class TransactionTable:
+    """Columnar container of transactions.
+
+       Attributes:
+           amounts (array): Amounts of transactions.
+           currencies (array): Currency codes, indices into constants.CURRENCIES.
+           field_id (str): Field ID of transaction records.
+           schema (RecordSchema): Layout of transaction lines.
+
+       Counter of a row is implicit (position + 1) until a row with another
+       counter is appended, e.g. after deleted records. Reserved areas are
+       kept as raw bytes only for rows where they are not blank.
+    """
+
+    def __init__(self, field_id='02', schema=TRANSACTION_SCHEMA):
+        self.field_id = field_id
+        self.schema = schema
+        self.amounts = array('q')
+        self.currencies = array('B')
+        self._reserved = {}
+        self._counters = None
+
+    @classmethod
+    def from_records(cls, records, field_id='02', schema=TRANSACTION_SCHEMA):
+        """Builds table from transaction dicts."""
+        table = cls(field_id=field_id, schema=schema)
+        for record in records:
+            table.append(amount=record['Amount'],
+                         currency=record['Currency'],
+                         reserved=record.get('Reserved', '').encode('utf-8'))
+        return table
+
+    @classmethod
+    def from_columns(cls, amounts, currencies, reserved=None, field_id='02', counters=None,
+                     schema=TRANSACTION_SCHEMA):
+        """Builds table from raw column buffers of amounts ('q'), currency codes ('B')
+        and optionally counters ('q') when they do not follow positions."""
+        table = cls(field_id=field_id, schema=schema)
+        table.amounts.frombytes(amounts)
+        table.currencies.frombytes(currencies)
+        table._reserved = dict(reserved or {})
+        if counters is not None:
+            table._counters = array('q', counters)
+        return table
+
+    def append(self, amount, currency, reserved=b'', counter=None) -> None:
+        """Appends a transaction to the table. Counter defaults to the one following the last row."""
+        try:
+            code = CURRENCY_CODES[currency]
+        except KeyError:
+            raise ValueError(const.CURRENCY_ERROR)
+        self.amounts.append(int(amount))
+        self.currencies.append(code)
+        if reserved.strip():
+            self._reserved[len(self.amounts) - 1] = reserved
+        if counter is None:
+            counter = self._counters[-1] + 1 if self._counters else len(self.amounts)
+        if self._counters is None and int(counter) != len(self.amounts):
+            # Counters stop following positions, so they are kept explicitly from now on
+            self._counters = array('q', range(1, len(self.amounts)))
+        if self._counters is not None:
+            self._counters.append(int(counter))
+
+    def append_line(self, line) -> None:
+        """Parses a transaction line and appends it to the table."""
+        amount_start, amount_end = self.schema.slices['Amount']
+        currency_start, currency_end = self.schema.slices['Currency']
+        reserved_start, reserved_end = self.schema.slices['Reserved']
+        counter_start, counter_end = self.schema.slices['Counter']
+        self.append(amount=line[amount_start:amount_end],
+                    currency=line[currency_start:currency_end],
+                    reserved=line[reserved_start:reserved_end].encode('utf-8'),
+                    counter=line[counter_start:counter_end])
+
+    def counter(self, index) -> int:
+        """Counter of given row."""
+        return self._counters[index] if self._counters is not None else index + 1
+
+    def position(self, counter) -> int:
+        """Row holding transaction with given counter."""
+        counter = int(counter)
+        position = counter - 1 if self._counters is None else bisect.bisect_left(self._counters, counter)
+        if 0 <= position < len(self) and self.counter(position) == counter:
+            return position
+        raise KeyError(f"No transaction with counter {counter} found.")
+
+    def reserved(self, index) -> str:
+        """Decodes Reserved area of given row."""
+        return self._reserved.get(index, b'').decode('utf-8').strip()
+
+    def control_sum(self) -> int:
+        """Sum of all amounts."""
+        return sum(self.amounts)
+
+    def totals_by_currency(self) -> dict:
+        """Sum of amounts per currency."""
+        totals = {}
+        for amount, code in zip(self.amounts, self.currencies):
+            totals[code] = totals.get(code, 0) + amount
+        return {const.CURRENCIES[code]: total for code, total in totals.items()}
+
+    def format_lines(self):
+        """Yields fixed-width lines of all rows with their counters."""
+        if self.schema is not TRANSACTION_SCHEMA:
+            # Custom layouts are formatted through the schema
+            for index in range(len(self)):
+                yield self.schema.encode(TransactionRow(self, index))
+            return
+        counter_length = const.MAX_LENGTHS['Counter']
+        amount_length = const.MAX_LENGTHS['Amount']
+        reserved_length = const.TRANSACTIONS_SLICES['Reserved'][1] - const.TRANSACTIONS_SLICES['Reserved'][0]
+        for index, (amount, code) in enumerate(zip(self.amounts, self.currencies)):
+            yield (f"{self.field_id}{self.counter(index):0{counter_length}}{amount:0{amount_length}}"
+                   f"{const.CURRENCIES[code]}{self.reserved(index).ljust(reserved_length)}")
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [TransactionRow(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Transaction index out of range")
+        return TransactionRow(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield TransactionRow(self, index)
@@ -1,7 +1,16 @@
 import logging
+import os
 import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 
+from . import compressed
 from . import constants as const
+from . import locking
+from . import metrics
+from . import numpy_backend
+from .schema import FOOTER_SCHEMA, HEADER_SCHEMA, TRANSACTION_SCHEMA, schema_for
+from .validation_cache import ValidationCache
 
 
 logger = logging.getLogger(__package__)
@@ -19,25 +28,27 @@ class TransactionLimitError(Exception):
 def get_values_as_dict(line, slices) -> dict:
     """Extracts substrings from a line based on the provided
      slices and returns them as a dictionary."""
-    values = {}
-    for key, (start, end) in slices.items():
-        values[key] = line[start:end].strip()
-    return values
+    try:
+        schema = schema_for(slices)
+    except ValueError:
+        # Slices with gaps or overlaps cannot be compiled, so fields are cut out one by one
+        return {key: line[start:end].strip() for key, (start, end) in slices.items()}
+    return schema.decode(line)
 
 
 def format_record(record, slices) -> str:
     """Formats a single record for writing to the file based on slice definitions."""
-    line = ''
-    for field, (start, end) in slices.items():
-        value = str(record.get(field, ''))
-        length = end - start
-
-        if field in ['Counter', 'Amount', 'Control sum']:
-            value = value.zfill(length)
-            line += value.rjust(length)
-        else:
-            line += value.ljust(length)
-    return line
+    try:
+        schema = schema_for(slices)
+    except ValueError:
+        # Slices with gaps or overlaps cannot be compiled, so fields are padded one by one
+        line = ''
+        for field, (start, end) in slices.items():
+            value = str(record.get(field, ''))
+            length = end - start
+            line += value.zfill(length) if field in const.ZERO_PADDED_FIELDS else value.ljust(length)
+        return line
+    return schema.encode(record)
 
 
 def check_fields_length(field_name, value) -> None:
@@ -68,10 +79,161 @@ def failure(log_message) -> bool:
     return False
 
 
+# Violation found during validation, line numbers start from 1
+Violation = namedtuple('Violation', ['line', 'record', 'field', 'message'])
+
+# Precompiled checks of raw (bytes) records
+_NAME_PATTERN = re.compile(rb'[A-Za-z\s]+')
+_ADDRESS_PATTERN = re.compile(r'[\w\s,./-]+')
+_COUNTER_PATTERN = re.compile(rb'(?!000000)\d{6}')
+_NUMBER_PATTERNS = {field: re.compile(rb'\d{%d}' % const.MAX_LENGTHS[field])
+                    for field in ('Amount', 'Total Counter', 'Control sum')}
+_CURRENCIES = frozenset(currency.encode('utf-8') for currency in const.CURRENCIES)
+
+
+class ValidationReport:
+    """Structured result of validation listing every violation.
+
+       Attributes:
+           errors (list): Violations in order of appearance.
+           num_transactions (int): Number of checked transactions.
+           total_amount (int): Sum of valid Amounts.
+           truncated (bool): Whether validation stopped after reaching max_errors.
+    """
+
+    def __init__(self):
+        self.errors = []
+        self.num_transactions = 0
+        self.total_amount = 0
+        self.truncated = False
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+    def __repr__(self) -> str:
+        return (f"ValidationReport(valid={self.valid}, errors={len(self.errors)}, "
+                f"num_transactions={self.num_transactions}, total_amount={self.total_amount})")
+
+
+class TransactionChecker:
+    """Checks raw transaction lines one at a time, accumulating count, sum and counter state.
+    Deleted records keep their place in the counter sequence but are neither counted nor summed."""
+
+    def __init__(self, errors, max_errors=None, field_id=b'02', previous_counter=0, deleted_field_id=b'04',
+                 schema=TRANSACTION_SCHEMA):
+        self.errors = errors
+        self.max_errors = max_errors
+        self.field_id = field_id
+        self.deleted_field_id = deleted_field_id
+        self.count = 0
+        self.deleted = 0
+        self.total_amount = 0
+        self.first_counter = None
+        self.last_counter = previous_counter
+        self._counter = schema.slices['Counter']
+        self._amount = schema.slices['Amount']
+        self._currency = schema.slices['Currency']
+
+    @property
+    def full(self) -> bool:
+        """Whether max_errors has been reached."""
+        return self.max_errors is not None and len(self.errors) >= self.max_errors
+
+    def _error(self, line_number, field, message) -> None:
+        if not self.full:
+            self.errors.append(Violation(line_number, 'transaction', field, message))
+
+    def check(self, line, line_number, sequential=True) -> None:
+        """Checks a single transaction line (bytes, newline stripped)."""
+        if len(line) == const.LINE_LENGTH and line[0:2] == self.deleted_field_id:
+            self.deleted += 1
+            self._check_counter(line, line_number, sequential)
+            return
+        self.count += 1
+        if len(line) != const.LINE_LENGTH:
+            self._error(line_number, None, f"Required line length: {const.LINE_LENGTH} Actual: {len(line)}")
+            return
+        if line[0:2] != self.field_id:
+            self._error(line_number, 'Field ID', "Invalid Field ID in transaction.")
+
+        self._check_counter(line, line_number, sequential)
+
+        amount = line[self._amount[0]:self._amount[1]]
+        if _NUMBER_PATTERNS['Amount'].fullmatch(amount):
+            self.total_amount += int(amount)
+        else:
+            self._error(line_number, 'Amount', "Amount format is not correct.")
+
+        currency = line[self._currency[0]:self._currency[1]]
+        if currency not in _CURRENCIES:
+            self._error(line_number, 'Currency',
+                        f"Invalid currency '{currency.decode('utf-8', 'replace')}' in transaction.")
+
+    def _check_counter(self, line, line_number, sequential) -> None:
+        counter = line[self._counter[0]:self._counter[1]]
+        if _COUNTER_PATTERN.fullmatch(counter):
+            counter = int(counter)
+            if self.first_counter is None:
+                self.first_counter = counter
+            elif sequential and counter != self.last_counter + 1:
+                self._error(line_number, 'Counter', f"Counter {counter} does not follow {self.last_counter}.")
+            self.last_counter = counter
+        else:
+            self._error(line_number, 'Counter', "Counter format is not correct.")
+
+
+def _validate_chunk(filepath, start, stop, first_line_number, max_errors=None,
+                    slices=const.TRANSACTIONS_SLICES) -> dict:
+    """Worker validating transactions stored in byte range [start, stop) of the file.
+    Layout is passed as slices, which are compiled again in the worker process."""
+    errors = []
+    checker = TransactionChecker(errors=errors, max_errors=max_errors, schema=schema_for(slices))
+    # Read in blocks of whole records to keep memory bounded
+    block_size = const.RECORD_LENGTH * 8192
+    line_number = first_line_number
+    with compressed.open_file(filepath, 'rb') as file:
+        file.seek(start)
+        position = start
+        while position < stop and not checker.full:
+            block = file.read(min(block_size, stop - position))
+            if not block:
+                break
+            for offset in range(0, len(block), const.RECORD_LENGTH):
+                record = block[offset:offset + const.RECORD_LENGTH]
+                checker.check(record[:-1] if record.endswith(b'\n') else record, line_number)
+                line_number += 1
+            position += len(block)
+    return {
+        'count': checker.count,
+        'deleted': checker.deleted,
+        'total_amount': checker.total_amount,
+        'first_counter': checker.first_counter,
+        'last_counter': checker.last_counter,
+        'errors': errors,
+        'truncated': checker.full
+    }
+
+
 class ValidationExecutor:
-    """Class used for validation proper file format"""
-    def __init__(self, filepath):
+    """Class used for validation proper file format.
+    backend='numpy' validates transactions with vectorized operations when NumPy is installed.
+    jobs > 1 validates transactions in chunks using a process pool.
+    Whole-file validation holds a shared lock, so writers cannot change the file midway.
+    Block-compressed files are validated on their decompressed content.
+    Transactions are checked against transaction_schema, so custom layouts are validated too."""
+
+    # Files with fewer records per worker are validated in a single process
+    min_chunk_records = 4096
+
+    def __init__(self, filepath, backend='python', jobs=1, lock_timeout=const.LOCK_TIMEOUT,
+                 transaction_schema=TRANSACTION_SCHEMA):
         self.filepath = filepath
+        self.transaction_schema = transaction_schema
+        self.backend = backend
+        self.jobs = jobs
+        self.lock_timeout = lock_timeout
+        self._lock_state = locking.new_lock_state()
 
     @staticmethod
     def _validate_line_length(line) -> bool:
@@ -80,7 +242,7 @@ class ValidationExecutor:
 
     def validate_header(self, line) -> bool:
         """Validation of file's header"""
-        slices = const.HEADER_SLICES
+        slices = HEADER_SCHEMA.slices
 
         if not self._validate_line_length(line):
             return failure(log_message=f"Required line length: 120 Actual: {len(line) - 1}")  # - \n
@@ -91,7 +253,7 @@ class ValidationExecutor:
         surname = line[slices['Surname'][0]:slices['Surname'][1]].strip()
         patronymic = line[slices['Patronymic'][0]:slices['Patronymic'][1]].strip()
         address = line[slices['Address'][0]:slices['Address'][1]].strip()
-        logger.debug(f"Values: {field_id}, {name}, {surname}, {patronymic}, {address}")
+        logger.debug("Values: %s, %s, %s, %s, %s", field_id, name, surname, patronymic, address)
 
         # Field ID validation
         if not re.match(r'^01$', field_id):
@@ -110,7 +272,7 @@ class ValidationExecutor:
 
     def validate_transactions(self, lines) -> bool:
         """Validation of file's transactions"""
-        slices = const.TRANSACTIONS_SLICES
+        slices = self.transaction_schema.slices
 
         # Check every line
         for line in lines:
@@ -123,7 +285,11 @@ class ValidationExecutor:
             amount = line[slices['Amount'][0]:slices['Amount'][1]]
             currency = line[slices['Currency'][0]:slices['Currency'][1]]
 
-            logger.debug(f"Values: {field_id}, {counter}, {amount}, {currency}")
+            logger.debug("Values: %s, %s, %s, %s", field_id, counter, amount, currency)
+
+            # Deleted transactions are skipped
+            if field_id == '04':
+                continue
 
             # Field ID validation
             if not re.match(r'^02$', field_id):
@@ -145,7 +311,7 @@ class ValidationExecutor:
 
     def validate_footer(self, line, num_transactions, total_amount) -> bool:
         """Validation of file's footer"""
-        slices = const.FOOTER_SLICES
+        slices = FOOTER_SCHEMA.slices
 
         if not self._validate_line_length(line):
             return failure(log_message=f"Required line length: 120 Actual: {len(line) - 1}")  # - \n
@@ -173,32 +339,248 @@ class ValidationExecutor:
 
         return success(log_message="Footer is valid.")
 
+    @staticmethod
+    def _check_header(line, errors) -> None:
+        """Collects violations of header line (bytes, newline stripped)."""
+        if len(line) != const.LINE_LENGTH:
+            errors.append(Violation(1, 'header', None,
+                                    f"Required line length: {const.LINE_LENGTH} Actual: {len(line)}"))
+            return
+        if line[0:2] != b'01':
+            errors.append(Violation(1, 'header', 'Field ID', "Invalid Field ID in header."))
+        for field in ('Name', 'Surname', 'Patronymic'):
+            start, end = HEADER_SCHEMA.slices[field]
+            if not _NAME_PATTERN.fullmatch(line[start:end].strip()):
+                errors.append(Violation(1, 'header', field, f"Invalid {field} in header"))
+        start, end = HEADER_SCHEMA.slices['Address']
+        if not _ADDRESS_PATTERN.fullmatch(line[start:end].decode('utf-8', 'replace').strip()):
+            errors.append(Violation(1, 'header', 'Address', "Invalid Address in header."))
+
+    @staticmethod
+    def _check_footer(line, line_number, num_transactions, total_amount, errors) -> None:
+        """Collects violations of footer line (bytes, newline stripped)."""
+        if len(line) != const.LINE_LENGTH:
+            errors.append(Violation(line_number, 'footer', None,
+                                    f"Required line length: {const.LINE_LENGTH} Actual: {len(line)}"))
+            return
+        if line[0:2] != b'03':
+            errors.append(Violation(line_number, 'footer', 'Field ID', "Invalid Field ID in footer."))
+
+        start, end = FOOTER_SCHEMA.slices['Total Counter']
+        total_counter = line[start:end]
+        if not _NUMBER_PATTERNS['Total Counter'].fullmatch(total_counter):
+            errors.append(Violation(line_number, 'footer', 'Total Counter', "Total Counter format is not correct."))
+        elif int(total_counter) != num_transactions:
+            errors.append(Violation(line_number, 'footer', 'Total Counter',
+                                    f"{int(total_counter)} not match the number of transactions {num_transactions}."))
+
+        start, end = FOOTER_SCHEMA.slices['Control sum']
+        control_sum = line[start:end]
+        if not _NUMBER_PATTERNS['Control sum'].fullmatch(control_sum):
+            errors.append(Violation(line_number, 'footer', 'Control sum', "Control sum format is not correct."))
+        elif int(control_sum) != total_amount:
+            errors.append(Violation(line_number, 'footer', 'Control sum',
+                                    f"Control sum {int(control_sum)} not match transactions sum {total_amount}."))
+
+    @locking.locked(shared=True)
+    def validate_stream(self, max_errors=None) -> ValidationReport:
+        """Validation of whole file in a single streaming pass over bytes.
+        Reports every violation (up to max_errors) including non-sequential counters."""
+        report = ValidationReport()
+        with compressed.open_file(self.filepath, 'rb') as file:
+            header = file.readline()
+            if not header:
+                report.errors.append(Violation(1, 'header', None, "File is empty."))
+                return report
+            self._check_header(header.rstrip(b'\n'), report.errors)
+
+            checker = TransactionChecker(errors=report.errors, max_errors=max_errors, schema=self.transaction_schema)
+            # Footer is the last line, so every line is checked once the next one arrives
+            previous, line_number = None, 1
+            for line in file:
+                if previous is not None:
+                    checker.check(previous.rstrip(b'\n'), line_number)
+                    if checker.full:
+                        report.truncated = True
+                        break
+                previous, line_number = line, line_number + 1
+
+        report.num_transactions = checker.count
+        report.total_amount = checker.total_amount
+        if previous is None:
+            report.errors.append(Violation(2, 'footer', None, "Footer is missing."))
+        elif not report.truncated:
+            self._check_footer(previous.rstrip(b'\n'), line_number,
+                               checker.count, checker.total_amount, report.errors)
+        if report.valid:
+            success(log_message=f"Validation OK. {report}")
+        else:
+            failure(log_message=f"Validation NOK. {report}")
+        return report
+
+    @locking.locked(shared=True)
+    def validate_parallel(self, jobs=None, max_errors=None) -> ValidationReport:
+        """Validation of whole file with transactions split into byte-range chunks
+        checked in a process pool. Footer is checked against merged totals."""
+        jobs = jobs or self.jobs or os.cpu_count()
+        with compressed.open_file(self.filepath, 'rb') as file:
+            header = file.readline()
+            size = file.seek(0, os.SEEK_END)
+            if size:
+                file.seek(size - 1)
+                # Last line may come without trailing newline
+                footer_offset = size - const.LINE_LENGTH - (1 if file.read(1) == b'\n' else 0)
+                file.seek(max(footer_offset, 0))
+                footer = file.readline().rstrip(b'\n')
+        # Chunking requires records on fixed positions, otherwise report precise errors sequentially
+        if not size or footer_offset < const.RECORD_LENGTH or footer_offset % const.RECORD_LENGTH:
+            return self.validate_stream(max_errors=max_errors)
+        num_records = footer_offset // const.RECORD_LENGTH - 1
+        jobs = max(1, min(jobs, num_records // self.min_chunk_records))
+        if jobs == 1:
+            return self.validate_stream(max_errors=max_errors)
+
+        report = ValidationReport()
+        self._check_header(header.rstrip(b'\n'), report.errors)
+        chunk_records = -(-num_records // jobs)
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = []
+            for first in range(0, num_records, chunk_records):
+                last = min(first + chunk_records, num_records)
+                futures.append(pool.submit(_validate_chunk, self.filepath,
+                                           (first + 1) * const.RECORD_LENGTH,
+                                           (last + 1) * const.RECORD_LENGTH,
+                                           first + 2, max_errors, self.transaction_schema.slices))
+            partials = [future.result() for future in futures]
+
+        # Merge partial results, checking that counters continue between chunks
+        previous_counter, line_number = None, 2
+        for partial in partials:
+            if (previous_counter is not None and partial['first_counter'] is not None
+                    and partial['first_counter'] != previous_counter + 1):
+                report.errors.append(Violation(line_number, 'transaction', 'Counter',
+                                               f"Counter {partial['first_counter']} does not follow "
+                                               f"{previous_counter}."))
+            report.errors.extend(partial['errors'])
+            report.num_transactions += partial['count']
+            report.total_amount += partial['total_amount']
+            report.truncated = report.truncated or partial['truncated']
+            previous_counter = partial['last_counter']
+            line_number += partial['count'] + partial['deleted']
+        report.errors.sort(key=lambda error: error.line)
+
+        if max_errors is not None and len(report.errors) >= max_errors:
+            del report.errors[max_errors:]
+            report.truncated = True
+        if not report.truncated:
+            self._check_footer(footer, num_records + 2, report.num_transactions,
+                               report.total_amount, report.errors)
+        if report.valid:
+            success(log_message=f"Validation OK. {report}")
+        else:
+            failure(log_message=f"Validation NOK. {report}")
+        return report
+
+    def _run_numpy(self) -> dict:
+        """Validation of whole file loaded with a single np.frombuffer call"""
+        try:
+            data, records = numpy_backend.load_records(self.filepath, slices=self.transaction_schema.slices)
+        except ValueError as e:
+            return {'Header': failure(log_message=str(e)), 'Transactions': False, 'Footer': False}
+        lines = data.decode('utf-8').splitlines(keepends=True)
+        status, message, total_amount = numpy_backend.validate_transactions(records[1:-1])
+        return {
+            'Header': self.validate_header(line=lines[0]),
+            'Transactions': success(log_message=message) if status else failure(log_message=message),
+            'Footer': self.validate_footer(line=lines[-1],
+                                           num_transactions=int((records[1:-1]['Field ID'] == b'02').sum()),
+                                           total_amount=total_amount)
+        }
+
+    def _validate_tail(self, cache) -> ValidationReport:
+        """Validation of records appended since cached validation,
+        continuing from the cached running count, sum and counter."""
+        report = ValidationReport()
+        checker = TransactionChecker(errors=report.errors, previous_counter=cache.last_counter,
+                                     schema=self.transaction_schema)
+        checker.count, checker.total_amount = cache.num_transactions, cache.total_amount
+        if cache.num_transactions:
+            # Appended counters have to follow the cached last one
+            checker.first_counter = cache.last_counter
+        line_number = cache.footer_offset // const.RECORD_LENGTH + 1
+        with open(self.filepath, 'rb') as file:
+            file.seek(cache.footer_offset)
+            # Footer is the last line, so every line is checked once the next one arrives
+            previous = None
+            for line in file:
+                if previous is not None:
+                    checker.check(previous.rstrip(b'\n'), line_number)
+                    line_number += 1
+                previous = line
+        report.num_transactions = checker.count
+        report.total_amount = checker.total_amount
+        self._check_footer(previous.rstrip(b'\n'), line_number, checker.count, checker.total_amount, report.errors)
+        logger.info(f"Validated {checker.count - cache.num_transactions} appended transaction(s)")
+        return report
+
+    @staticmethod
+    def _results(report) -> dict:
+        """Header, Transactions and Footer results of the report"""
+        failed = {error.record for error in report.errors}
+        return {
+            'Header': 'header' not in failed,
+            'Transactions': 'transaction' not in failed,
+            'Footer': 'footer' not in failed
+        }
+
+    def _validate_whole(self) -> ValidationReport:
+        """Validation of whole file in a single streaming pass or parallel chunks"""
+        with metrics.registry.operation('validate') as operation, metrics.registry.phase('validate'):
+            report = self.validate_parallel() if self.jobs > 1 else self.validate_stream()
+            operation.add(records=report.num_transactions, nbytes=os.path.getsize(self.filepath))
+        return report
+
+    def _run_python(self) -> dict:
+        """Validation of whole file in a single streaming pass or parallel chunks"""
+        return self._results(self._validate_whole())
+
+    @locking.locked(shared=True)
+    def run_cached(self) -> (bool, dict):
+        """Validation of whole file reusing the result cached in <file>.valid.
+        Unchanged file is not validated again and appended records are validated alone."""
+        stamp = ValidationCache.file_stamp(self.filepath)
+        cache = ValidationCache.load(self.filepath)
+        if cache is not None and cache.stamp == stamp:
+            results = cache.results
+            logger.info("Validation result taken from cache")
+        else:
+            if cache is not None and cache.is_append(stamp):
+                with metrics.registry.operation('validate') as operation, metrics.registry.phase('validate'):
+                    report = self._validate_tail(cache)
+                    operation.add(records=report.num_transactions - cache.num_transactions,
+                                  nbytes=stamp['size'] - cache.stamp['size'])
+            else:
+                cache = ValidationCache(self.filepath)
+                report = self._validate_whole()
+            results = self._results(report)
+            cache.save(stamp, results, num_transactions=report.num_transactions, total_amount=report.total_amount)
+
+        if all(results.values()):
+            return success(log_message=f"Validation OK. Results: {results}"), results
+        return failure(log_message=f"Validation NOK. Results: {results}"), results
+
+    @locking.locked(shared=True)
     def run(self) -> (bool, dict):
         """Validation of whole file"""
-        with open(self.filepath, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-
-            num_transactions = len(lines) - 2  # - (header+footer)
-
-            # Indices of Amount field
-            amount_start = const.TRANSACTIONS_SLICES['Amount'][0]
-            amount_end = const.TRANSACTIONS_SLICES['Amount'][1]
-            # Sum of transactions Amounts
-            try:
-                total_amount = sum(int(line[amount_start:amount_end]) for line in lines if line.startswith('02'))
-            except ValueError:
-                logger.error(f"Unavailable to count total_amount")
-                total_amount = None
-
-            # List of results of particular validations
-            results = {
-                'Header': self.validate_header(line=lines[0]),
-                'Transactions': self.validate_transactions(lines=lines[1:-1]),
-                'Footer': self.validate_footer(line=lines[-1],
-                                               num_transactions=num_transactions,
-                                               total_amount=total_amount)
-            }
-
-            if all(results):
-                return success(log_message=f"Validation OK. Results: {results}"), results
-            return failure(log_message=f"Validation NOK. Results: {results}"), results
+        if self.backend == 'numpy' and not numpy_backend.HAS_NUMPY:
+            logger.warning("NumPy is not installed, falling back to pure-Python validation")
+        if self.backend == 'numpy' and numpy_backend.HAS_NUMPY:
+            with metrics.registry.operation('validate') as operation, metrics.registry.phase('validate'):
+                results = self._run_numpy()
+                operation.add(nbytes=os.path.getsize(self.filepath))
+        else:
+            results = self._run_python()
+
+        if all(results.values()):
+            return success(log_message=f"Validation OK. Results: {results}"), results
+        return failure(log_message=f"Validation NOK. Results: {results}"), results
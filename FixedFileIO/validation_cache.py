@@ -0,0 +1,130 @@
+import hashlib
+import json
+import logging
+import os
+
+from . import atomic
+from . import constants as const
+
+
+logger = logging.getLogger(__package__)
+
+
+def _record_hash(file, offset) -> str:
+    """Hash of a single record starting at given byte offset."""
+    file.seek(offset)
+    return hashlib.sha1(file.read(const.RECORD_LENGTH)).hexdigest()
+
+
+class ValidationCache:
+    """
+       Result of the last validation stored next to the file as <file>.valid.
+
+       The result is reused while inode, size, mtime and footer hash of the
+       file match its stamp. When records were only appended since, the cached
+       running count and sum let the new tail be validated alone.
+
+       Attributes:
+           stamp (dict): Inode, size, mtime and footer hash of the validated file.
+           results (dict): Header, Transactions and Footer validation results.
+           num_transactions (int): Number of validated transactions.
+           total_amount (int): Sum of validated Amounts.
+           last_counter (int): Counter of the last transaction.
+           header_hash (str): Hash of the header record.
+           tail_hash (str): Hash of the last transaction record.
+    """
+
+    version = 1
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.path = filepath + '.valid'
+        self.stamp = None
+        self.results = {}
+        self.num_transactions = 0
+        self.total_amount = 0
+        self.last_counter = 0
+        self.header_hash = None
+        self.tail_hash = None
+
+    @property
+    def valid(self) -> bool:
+        return bool(self.results) and all(self.results.values())
+
+    @property
+    def footer_offset(self) -> int:
+        """Byte offset of the footer at the time of validation."""
+        return self.stamp['size'] - const.RECORD_LENGTH
+
+    @staticmethod
+    def file_stamp(filepath) -> dict:
+        """Current inode, size, mtime and footer hash of the data file."""
+        stat = os.stat(filepath)
+        with open(filepath, 'rb') as file:
+            footer_hash = _record_hash(file, max(stat.st_size - const.RECORD_LENGTH, 0))
+        return {'inode': stat.st_ino, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                'footer_hash': footer_hash}
+
+    @classmethod
+    def load(cls, filepath):
+        """Loads cached result, returning None when it is missing or unreadable."""
+        cache = cls(filepath)
+        try:
+            with open(cache.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            if data.get('version') != cls.version:
+                return None
+            for name in ('stamp', 'results', 'num_transactions', 'total_amount',
+                         'last_counter', 'header_hash', 'tail_hash'):
+                setattr(cache, name, data[name])
+        except (OSError, ValueError, KeyError):
+            return None
+        return cache
+
+    @staticmethod
+    def discard(filepath) -> None:
+        """Removes cached result, e.g. before the file is modified in place."""
+        try:
+            os.remove(filepath + '.valid')
+        except FileNotFoundError:
+            pass
+
+    def is_append(self, stamp) -> bool:
+        """Whether the only change since validation are records appended in place of the footer."""
+        if not self.valid or stamp['inode'] != self.stamp['inode'] or stamp['size'] <= self.stamp['size']:
+            return False
+        # Appending keeps every record on a fixed position
+        if stamp['size'] % const.RECORD_LENGTH or self.stamp['size'] % const.RECORD_LENGTH:
+            return False
+        try:
+            with open(self.filepath, 'rb') as file:
+                if _record_hash(file, 0) != self.header_hash:
+                    return False
+                return (not self.num_transactions
+                        or _record_hash(file, self.footer_offset - const.RECORD_LENGTH) == self.tail_hash)
+        except OSError:
+            return False
+
+    def save(self, stamp, results, num_transactions, total_amount) -> None:
+        """Stores validation result of the file in the state described by stamp.
+        Result which cannot be written, e.g. in a read-only location, is only not cached."""
+        self.stamp, self.results = stamp, results
+        self.num_transactions, self.total_amount = num_transactions, total_amount
+        with open(self.filepath, 'rb') as file:
+            self.header_hash = _record_hash(file, 0)
+            last_offset = stamp['size'] - 2 * const.RECORD_LENGTH
+            if num_transactions and last_offset >= const.RECORD_LENGTH:
+                self.tail_hash = _record_hash(file, last_offset)
+                file.seek(last_offset + 2)
+                counter = file.read(const.MAX_LENGTHS['Counter'])
+                self.last_counter = int(counter) if counter.isdigit() else 0
+            else:
+                self.tail_hash, self.last_counter = None, 0
+        data = {'version': self.version, 'stamp': self.stamp, 'results': self.results,
+                'num_transactions': self.num_transactions, 'total_amount': self.total_amount,
+                'last_counter': self.last_counter, 'header_hash': self.header_hash, 'tail_hash': self.tail_hash}
+        try:
+            with atomic.write(self.path, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+        except OSError as e:
+            logger.warning(f"Validation result of {self.filepath} not cached: {e}")
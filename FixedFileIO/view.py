@@ -0,0 +1,138 @@
+import logging
+import mmap
+from collections.abc import Mapping, Sequence
+
+from . import constants as const
+
+
+logger = logging.getLogger(__package__)
+
+
+class RecordView(Mapping):
+    """Read-only record backed by mapped bytes. Fields are decoded on access."""
+    __slots__ = ('_buffer', '_offset', '_slices')
+
+    def __init__(self, buffer, offset, slices):
+        self._buffer = buffer
+        self._offset = offset
+        self._slices = slices
+
+    def __getitem__(self, field) -> str:
+        start, end = self._slices[field]
+        return self._buffer[self._offset + start:self._offset + end].decode('utf-8').strip()
+
+    def __iter__(self):
+        return iter(self._slices)
+
+    def __len__(self) -> int:
+        return len(self._slices)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class TransactionView(Sequence):
+    """Lazy sequence of transactions. Supports len(), indexing by position
+     or counter (str) and slicing without parsing the whole file.
+     Positions cover deleted transactions too, lookup by counter skips them."""
+
+    def __init__(self, buffer, start, count, field_id='02', slices=const.TRANSACTIONS_SLICES):
+        self._buffer = buffer
+        self._start = start
+        self._count = count
+        self._field_id = field_id.encode('utf-8')
+        self._slices = slices
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _offset(self, position) -> int:
+        """Byte offset of transaction on given position."""
+        return self._start + position * const.RECORD_LENGTH
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._count)
+            if step == 1:
+                return TransactionView(self._buffer, self._offset(start), max(stop - start, 0),
+                                       self._field_id.decode('utf-8'), self._slices)
+            return [self[position] for position in range(start, stop, step)]
+        if isinstance(key, str):
+            return self.by_counter(key)
+        if key < 0:
+            key += self._count
+        if not 0 <= key < self._count:
+            raise IndexError("Transaction index out of range")
+        return RecordView(self._buffer, self._offset(key), self._slices)
+
+    def by_counter(self, counter) -> RecordView:
+        """Returns transaction with given counter."""
+        counter_start, counter_end = self._slices['Counter']
+        encoded = str(counter).zfill(counter_end - counter_start).encode('utf-8')
+
+        def matches(position):
+            offset = self._offset(position)
+            return (self._buffer[offset:offset + 2] == self._field_id
+                    and self._buffer[offset + counter_start:offset + counter_end] == encoded)
+
+        # Counters are sequential, so check expected position first
+        expected = int(encoded) - int(self[0]['Counter']) if self._count else -1
+        if 0 <= expected < self._count and matches(expected):
+            return self[expected]
+        for position in range(self._count):
+            if matches(position):
+                return self[position]
+        raise KeyError(f"No transaction with counter {counter} found.")
+
+    def column(self, field):
+        """Yields values of a single field for every transaction."""
+        start, end = self._slices[field]
+        for position in range(self._count):
+            offset = self._offset(position)
+            yield self._buffer[offset + start:offset + end].decode('utf-8').strip()
+
+
+class MappedFile:
+    """Memory-mapped, read-only access to fixed-width file.
+
+       Attributes:
+           header (RecordView): Header record.
+           transactions (TransactionView): Lazy sequence of transaction records.
+           footer (RecordView): Footer record.
+    """
+
+    def __init__(self, filepath, field_id_transaction='02', header_slices=const.HEADER_SLICES,
+                 transaction_slices=const.TRANSACTIONS_SLICES, footer_slices=const.FOOTER_SLICES):
+        self.filepath = filepath
+        with open(filepath, 'rb') as file:
+            try:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                message = f"Cannot map empty file {filepath}."
+                logger.error(message)
+                raise ValueError(message)
+
+        size = len(self._mmap)
+        # Last line may come without trailing newline
+        footer_offset = size - const.LINE_LENGTH - (1 if self._mmap[size - 1:size] == b'\n' else 0)
+        if footer_offset < const.RECORD_LENGTH or footer_offset % const.RECORD_LENGTH:
+            self.close()
+            message = f"File {filepath} does not consist of {const.LINE_LENGTH} characters long records."
+            logger.error(message)
+            raise ValueError(message)
+
+        self.header = RecordView(self._mmap, 0, header_slices)
+        self.transactions = TransactionView(self._mmap, const.RECORD_LENGTH,
+                                            footer_offset // const.RECORD_LENGTH - 1,
+                                            field_id_transaction, transaction_slices)
+        self.footer = RecordView(self._mmap, footer_offset, footer_slices)
+
+    def close(self) -> None:
+        """Releases the mapping."""
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
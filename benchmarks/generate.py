@@ -0,0 +1,47 @@
+import argparse
+import random
+
+from FixedFileIO import constants as const
+from FixedFileIO.schema import FOOTER_SCHEMA, HEADER_SCHEMA, TRANSACTION_SCHEMA
+
+
+# Highest counter that fits into the Counter field
+MAX_RECORDS = 10 ** const.MAX_LENGTHS['Counter'] - 1
+# Keeps Control sum of MAX_RECORDS transactions within its field
+MAX_AMOUNT = 10 ** const.MAX_LENGTHS['Control sum'] // (MAX_RECORDS + 1) - 1
+
+HEADER = {'Field ID': '01', 'Name': 'John', 'Surname': 'Doe', 'Patronymic': 'Michael', 'Address': 'Main St. 1'}
+
+
+def generate(filepath: str, count: int, seed: int = 0, chunk_size: int = 10000) -> int:
+    """Writes a valid fixed-width file with count transactions. The same seed always gives the same file.
+    Returns Control sum of the file."""
+    if not 0 <= count <= MAX_RECORDS:
+        raise ValueError(f"Number of records has to be between 0 and {MAX_RECORDS}.")
+    rng = random.Random(seed)
+    control_sum = 0
+    with open(filepath, 'w', encoding='utf-8') as file:
+        file.write(HEADER_SCHEMA.encode(HEADER) + '\n')
+        for first in range(1, count + 1, chunk_size):
+            lines = []
+            for counter in range(first, min(first + chunk_size, count + 1)):
+                amount = rng.randint(1, MAX_AMOUNT)
+                control_sum += amount
+                lines.append(TRANSACTION_SCHEMA.encode({'Field ID': '02', 'Counter': counter, 'Amount': amount,
+                                                        'Currency': rng.choice(const.CURRENCIES)}))
+            file.write('\n'.join(lines) + '\n')
+        file.write(FOOTER_SCHEMA.encode({'Field ID': '03', 'Total Counter': count, 'Control sum': control_sum}) + '\n')
+    return control_sum
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Generates a valid fixed-width file for benchmarks.')
+    parser.add_argument('filepath', help='Path of the generated file.')
+    parser.add_argument('count', type=int, help=f'Number of transactions, up to {MAX_RECORDS}.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of generated amounts and currencies.')
+    args = parser.parse_args()
+    generate(args.filepath, args.count, seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
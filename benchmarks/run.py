@@ -0,0 +1,186 @@
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from FixedFileIO.handler import FixedWidthHandler
+from FixedFileIO.utils import ValidationExecutor
+
+from .generate import MAX_RECORDS, generate
+
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+# Number of single-record calls timed by add_transaction and update_field
+CALLS = 100
+
+
+def _handler(filepath) -> FixedWidthHandler:
+    handler = FixedWidthHandler(filepath)
+    # Benchmarks go up to the counter maximum, past the default limit
+    handler.transaction_limit = MAX_RECORDS
+    return handler
+
+
+def _read_file(filepath, size):
+    handler = _handler(filepath)
+    return lambda: handler.read_file(), size
+
+
+def _write_file(filepath, size):
+    handler = _handler(filepath)
+    header, transactions, footer = handler.read_file()
+    return lambda: handler.write_file(header, transactions, footer), size
+
+
+def _add_transaction(filepath, size):
+    if size + CALLS > MAX_RECORDS:
+        return None
+    handler = _handler(filepath)
+
+    def add():
+        for _ in range(CALLS):
+            handler.add_transaction(amount=1, currency='USD')
+    return add, CALLS
+
+
+def _update_field(filepath, size):
+    if not size:
+        return None
+    handler = _handler(filepath)
+    counters = [1 + i * size // CALLS for i in range(CALLS)]
+
+    def update():
+        for counter in counters:
+            handler.update_field('transaction', 'Amount', '1', counter)
+    return update, CALLS
+
+
+def _validate(filepath, size):
+    validation = ValidationExecutor(filepath)
+    return lambda: validation.run(), size
+
+
+# Operation name -> setup returning (function, number of records it processes) or None when not applicable
+OPERATIONS = {
+    'read_file': _read_file,
+    'write_file': _write_file,
+    'add_transaction': _add_transaction,
+    'update_field': _update_field,
+    'validate': _validate,
+}
+
+
+def measure(operation, filepath, size, repeat) -> dict:
+    """Best time of repeat runs and peak traced memory of a separate run, each on a fresh copy of the file."""
+    seconds = None
+    with tempfile.TemporaryDirectory() as directory:
+        for run in range(repeat + 1):
+            copy = os.path.join(directory, f"run{run}.fwf")
+            shutil.copyfile(filepath, copy)
+            setup = OPERATIONS[operation](copy, size)
+            if setup is None:
+                return None
+            function, records = setup
+            if run == repeat:
+                # Tracing slows allocations down, so memory is measured apart from timing
+                tracemalloc.start()
+                function()
+                peak_bytes = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            else:
+                start = time.perf_counter()
+                function()
+                elapsed = time.perf_counter() - start
+                seconds = elapsed if seconds is None else min(seconds, elapsed)
+    return {'operation': operation, 'size': size, 'records': records, 'seconds': seconds,
+            'records_per_second': records / seconds if seconds else 0.0, 'peak_bytes': peak_bytes}
+
+
+def scaling(results) -> dict:
+    """Slope of log(time) against log(size) between smallest and largest size.
+    1.0 means linear, 0.0 constant time as expected of add_transaction and update_field."""
+    exponents = {}
+    for operation in OPERATIONS:
+        rows = sorted((row for row in results if row['operation'] == operation), key=lambda row: row['size'])
+        if len(rows) >= 2 and rows[0]['seconds'] and rows[-1]['seconds'] and rows[0]['size'] != rows[-1]['size']:
+            exponents[operation] = (math.log(rows[-1]['seconds'] / rows[0]['seconds'])
+                                    / math.log(rows[-1]['size'] / rows[0]['size']))
+    return exponents
+
+
+def run(sizes, repeat=3, seed=0, operations=None) -> dict:
+    """Benchmarks operations on generated files of given sizes."""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            filepath = os.path.join(directory, f"bench_{size}.fwf")
+            generate(filepath, size, seed=seed)
+            for operation in operations or OPERATIONS:
+                row = measure(operation, filepath, size, repeat)
+                if row is not None:
+                    results.append(row)
+                    print(f"{operation:>16} {size:>8} records: {row['seconds']:.6f}s "
+                          f"{row['records_per_second']:>14.0f} rec/s {row['peak_bytes']:>12} B peak",
+                          file=sys.stderr)
+    return {
+        'meta': {'python': platform.python_version(), 'platform': platform.platform(), 'repeat': repeat,
+                 'seed': seed, 'timestamp': datetime.now(timezone.utc).isoformat()},
+        'results': results,
+        'scaling': scaling(results)
+    }
+
+
+def compare(current, baseline, threshold=0.1) -> list:
+    """Lists operations whose time grew by more than threshold (0.1 = 10%) against the baseline."""
+    previous = {(row['operation'], row['size']): row for row in baseline['results']}
+    regressions = []
+    for row in current['results']:
+        base = previous.get((row['operation'], row['size']))
+        if base is None or not base['seconds']:
+            continue
+        ratio = row['seconds'] / base['seconds']
+        if ratio > 1 + threshold:
+            regressions.append({'operation': row['operation'], 'size': row['size'],
+                                'baseline': base['seconds'], 'current': row['seconds'], 'ratio': ratio})
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmarks FixedWidthHandler operations.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help=f'Numbers of records of benchmarked files, up to {MAX_RECORDS}.')
+    parser.add_argument('--operations', nargs='+', choices=list(OPERATIONS), help='Benchmarked operations.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs, the best one is reported.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of generated files.')
+    parser.add_argument('--output', help='Write results as JSON into given file instead of stdout.')
+    parser.add_argument('--compare', help='Baseline results to compare against.')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Allowed slowdown against baseline.')
+    args = parser.parse_args()
+
+    results = run(args.sizes, repeat=args.repeat, seed=args.seed, operations=args.operations)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=4)
+    else:
+        print(json.dumps(results, indent=4))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            regressions = compare(results, json.load(file), threshold=args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['operation']} {regression['size']} records: "
+                  f"{regression['baseline']:.6f}s -> {regression['current']:.6f}s "
+                  f"(x{regression['ratio']:.2f})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,14 @@
 import argparse
+import csv
 import json
 import logging
 import os
-from datetime import datetime
+import sys
+from logging.handlers import RotatingFileHandler
 
+from FixedFileIO import metrics
 from FixedFileIO.handler import FixedWidthHandler
+from FixedFileIO.server import create_server
 from FixedFileIO.utils import ValidationExecutor
 
 
@@ -13,17 +17,17 @@ logger = logging.getLogger("main")
 
 def read_values_cli(handler: FixedWidthHandler) -> None:
     """CLI function for display file's values"""
-    header, transactions, footer = handler.read_file()
-    print(header)
+    print(handler.read_header())
 
     # Initialize set of currencies
     currencies = set()
 
-    # Popping 'Reserved' field
-    for transaction in transactions:
+    # Stream transactions without 'Reserved' field
+    for transaction in handler.iter_transactions():
         transaction.pop('Reserved', None)
         currencies.add(transaction['Currency'])
         print(transaction)
+    footer = handler.read_footer()
     footer.pop('Reserved', None)
     print(footer)
 
@@ -32,6 +36,45 @@ def read_values_cli(handler: FixedWidthHandler) -> None:
         logger.warning(f"Control sum is not representative due to different currencies: {currencies}")
 
 
+def _query_filters(args: argparse.Namespace) -> dict:
+    """Auxiliary function collecting query filters from CLI arguments"""
+    return {
+        'currency': args.currency.upper() if args.currency else None,
+        'start': args.start,
+        'stop': args.stop,
+        'min_amount': args.min_amount,
+        'max_amount': args.max_amount
+    }
+
+
+def query_cli(handler: FixedWidthHandler, args: argparse.Namespace) -> None:
+    """CLI function for display transactions matching filters"""
+    for transaction in handler.query(**_query_filters(args)):
+        transaction.pop('Reserved', None)
+        print(transaction)
+
+
+def stats_cli(handler: FixedWidthHandler, args: argparse.Namespace) -> None:
+    """CLI function for display per-currency statistics"""
+    stats = handler.stats(top=args.top, **_query_filters(args))
+    print(f"Transactions: {stats['count']}")
+    for currency, values in stats['currencies'].items():
+        print(f"{currency}: count={values['count']} sum={values['sum']} min={values['min']} max={values['max']}")
+    for position, transaction in enumerate(stats['top'], start=1):
+        print(f"Top {position}: {transaction}")
+
+
+def export_cli(handler: FixedWidthHandler, args: argparse.Namespace) -> None:
+    """CLI function for exporting file into CSV, JSON Lines or columnar binary"""
+    target = args.source or '-'
+    fmt = args.format
+    if fmt is None:
+        # Format follows target's extension, stdout defaults to CSV
+        extension = os.path.splitext(target)[1].lower()
+        fmt = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.bin': 'columnar'}.get(extension, 'csv')
+    handler.export(target=target, fmt=fmt)
+
+
 def add_transaction_cli(handler: FixedWidthHandler) -> None:
     """CLI function for managing add transactions"""
     # Check whether amount is numeric
@@ -45,6 +88,46 @@ def add_transaction_cli(handler: FixedWidthHandler) -> None:
     handler.add_transaction(amount=amount, currency=currency)
 
 
+def _read_rows(filepath: str):
+    """Auxiliary generator streaming rows of CSV or JSON Lines file as dicts with titled keys"""
+    extension = os.path.splitext(filepath)[1].lower()
+    with open(filepath, 'r', encoding='utf-8', newline='') as file:
+        if extension == '.csv':
+            rows = csv.DictReader(file)
+        elif extension in ('.jsonl', '.ndjson'):
+            rows = (json.loads(line) for line in file if line.strip())
+        else:
+            raise ValueError(f"Unsupported source format '{extension}'. Use .csv or .jsonl file.")
+        for row in rows:
+            yield {key.strip().replace('_', ' ').title(): value for key, value in row.items()}
+
+
+def import_transactions_cli(handler: FixedWidthHandler, source: str) -> None:
+    """CLI function for importing transactions from CSV or JSON Lines file"""
+    rows = _read_rows(source)
+    added = handler.add_transactions((row['Amount'], str(row['Currency']).strip().upper()) for row in rows)
+    print(f"Imported {added} transactions.")
+
+
+def apply_changes_cli(handler: FixedWidthHandler, source: str) -> None:
+    """CLI function for applying batch of field updates from CSV or JSON Lines patch file"""
+    # Load permissions for updating fields
+    field_permissions = _load_field_permissions()
+
+    changes = []
+    for row in _read_rows(source):
+        field_name = str(row['Field']).strip().title()
+        if field_permissions.get(field_name, False):
+            raise KeyError(f"Updating field '{field_name}' is not allowed.")
+        value = str(row['Value'])
+        changes.append((str(row['Record Type']).strip().lower(),
+                        field_name,
+                        value if not field_name == "Currency" else value.upper(),
+                        row.get('Counter') or None))
+    applied = handler.update_fields(changes)
+    print(f"Applied {applied} changes.")
+
+
 def update_field_cli(handler: FixedWidthHandler) -> None:
     """CLI function for managing update file fields"""
     # Load permissions for updating fields
@@ -67,6 +150,12 @@ def update_field_cli(handler: FixedWidthHandler) -> None:
                          counter=counter)
 
 
+def delete_transaction_cli(handler: FixedWidthHandler) -> None:
+    """CLI function for deleting a transaction"""
+    counter = input("Enter the transaction counter: ").zfill(6)
+    handler.delete_transaction(counter)
+
+
 def _load_field_permissions(filepath: str = 'configs/permissions.json') -> dict:
     """Auxiliary function for load permissions"""
     with open(filepath, 'r') as file:
@@ -105,46 +194,52 @@ def change_permissions_cli() -> None:
         print("Invalid response")
 
 
-def setup_logger(filepath: str) -> None:
+def serve_cli(filepath: str, host: str, port: int) -> None:
+    """CLI function for serving file's ledger over local HTTP JSON API"""
+    server = create_server(filepath=filepath, host=host, port=port)
+    logger.info(f"Serving {filepath} on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
+
+
+def setup_logger(filepath: str, debug: bool = False) -> None:
     # Create logs directory if not exists
     if not os.path.exists('logs'):
         os.makedirs('logs')
 
-    # Set logs filename with current time
-    current_time = datetime.now().strftime("%d-%m-%Y_%H-%M-%S")
-    log_filename = f"logs/{os.path.basename(filepath)}_{current_time}.log"
+    # Single log per file, rotated instead of creating a new one on every run
+    log_filename = f"logs/{os.path.basename(filepath)}.log"
 
-    # Logger configs
+    # Logger configs, per-record messages are logged only with --debug
     logging.basicConfig(
-        level=logging.INFO,
+        level=logging.DEBUG if debug else logging.INFO,
         format=f"%(asctime)s - %(name)s - {filepath} -%(levelname)s - %(message)s",
         handlers=[
-            logging.FileHandler(log_filename),
+            RotatingFileHandler(log_filename, maxBytes=10 * 1024 * 1024, backupCount=3),
             logging.StreamHandler()
         ]
     )
 
 
-def main() -> None:
-    # Parser configs
-    parser = argparse.ArgumentParser(description='CLI for Fixed File IO operations.')
-    parser.add_argument('action', choices=['read', 'add', 'update', 'settings'], help='Action to perform.')
-    parser.add_argument('filepath', help='Path to the fixed-width file.')
-
-    # Initializations
-    args = parser.parse_args()
+def report_metrics(args: argparse.Namespace) -> None:
+    if args.profile:
+        # Kept off stdout, which may carry exported records
+        print(json.dumps(metrics.registry.report(), indent=4), file=sys.stderr)
+    if args.prometheus:
+        metrics.registry.write_prometheus(args.prometheus)
 
-    # Validation not needed for changing settings
-    if args.action == 'settings':
-        change_permissions_cli()
-        return
 
-    setup_logger(filepath=args.filepath)
+def run_action(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
     handler = FixedWidthHandler(filepath=args.filepath)
-    validation = ValidationExecutor(filepath=args.filepath)
+    validation = ValidationExecutor(filepath=args.filepath, jobs=args.jobs)
 
     # Validation check
-    status, _ = validation.run()
+    status, _ = validation.run() if args.no_cache else validation.run_cached()
     if not status:
         return
 
@@ -156,6 +251,67 @@ def main() -> None:
             add_transaction_cli(handler)
         case 'update':
             update_field_cli(handler)
+        case 'delete':
+            delete_transaction_cli(handler)
+        case 'compact':
+            print(f"Dropped {handler.compact()} deleted transactions.")
+        case 'serve':
+            serve_cli(args.filepath, host=args.host, port=args.port)
+        case 'export':
+            export_cli(handler, args)
+        case 'stats':
+            stats_cli(handler, args)
+        case 'query':
+            query_cli(handler, args)
+        case 'import':
+            if args.source is None:
+                parser.error("import action requires source file")
+            import_transactions_cli(handler, args.source)
+        case 'apply':
+            if args.source is None:
+                parser.error("apply action requires patch file")
+            apply_changes_cli(handler, args.source)
+
+
+def main() -> None:
+    # Parser configs
+    parser = argparse.ArgumentParser(description='CLI for Fixed File IO operations.')
+    parser.add_argument('action', choices=['read', 'add', 'update', 'delete', 'compact', 'import', 'apply',
+                                           'export', 'stats', 'query', 'serve', 'settings'],
+                        help='Action to perform.')
+    parser.add_argument('filepath', help='Path to the fixed-width file.')
+    parser.add_argument('source', nargs='?', help='Source file for import and apply actions (.csv or .jsonl), '
+                                                  'target file of export action (stdout by default).')
+    parser.add_argument('--format', choices=['csv', 'jsonl', 'columnar'], help='Format of export action.')
+    parser.add_argument('--currency', help='Filter stats and query by currency.')
+    parser.add_argument('--start', type=int, help='Filter stats and query by minimal counter.')
+    parser.add_argument('--stop', type=int, help='Filter stats and query by maximal counter.')
+    parser.add_argument('--min-amount', type=int, help='Filter stats and query by minimal amount.')
+    parser.add_argument('--max-amount', type=int, help='Filter stats and query by maximal amount.')
+    parser.add_argument('--top', type=int, default=0, help='Number of largest amounts displayed by stats.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address the serve action listens on.')
+    parser.add_argument('--port', type=int, default=8080, help='Port the serve action listens on.')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of worker processes used for validation.')
+    parser.add_argument('--no-cache', action='store_true', help='Validate whole file ignoring cached result.')
+    parser.add_argument('--profile', action='store_true', help='Display per-phase timings and counts of operations.')
+    parser.add_argument('--prometheus', help='Write metrics into Prometheus textfile at given path.')
+    parser.add_argument('--debug', action='store_true', help='Log every read and written record.')
+
+    # Initializations
+    args = parser.parse_args()
+
+    # Validation not needed for changing settings
+    if args.action == 'settings':
+        change_permissions_cli()
+        return
+
+    setup_logger(filepath=args.filepath, debug=args.debug)
+    if args.profile or args.prometheus:
+        metrics.registry.enable()
+    try:
+        run_action(parser, args)
+    finally:
+        report_metrics(args)
 
 
 if __name__ == '__main__':
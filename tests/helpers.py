@@ -0,0 +1,13 @@
+import os
+
+
+def make_file(directory, amounts, currency='USD'):
+    """Creates a valid fixed-width file with given transaction amounts."""
+    lines = ['01' + 'John'.ljust(28) + 'Doe'.ljust(30) + 'Michael'.ljust(30) + 'Main St.'.ljust(30)]
+    for counter, amount in enumerate(amounts, start=1):
+        lines.append(f"02{counter:06}{amount:012}{currency}".ljust(120))
+    lines.append(f"03{len(amounts):06}{sum(amounts):012}".ljust(120))
+    filepath = os.path.join(directory, 'testfile.fwf')
+    with open(filepath, 'w', encoding='utf-8') as file:
+        file.write('\n'.join(lines) + '\n')
+    return filepath
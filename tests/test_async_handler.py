@@ -0,0 +1,88 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from FixedFileIO import locking
+from FixedFileIO.async_handler import AsyncFixedWidthHandler
+from tests.helpers import make_file
+
+
+class TestAsyncFixedWidthHandler(unittest.TestCase):
+
+    def setUp(self):
+        """Test configuration."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_concurrent_files(self):
+        """Tests that one loop drives many files while adds to one file are serialized"""
+        paths = []
+        for number in range(5):
+            directory = os.path.join(self.tmpdir.name, str(number))
+            os.mkdir(directory)
+            paths.append(make_file(directory, [100]))
+
+        async def scenario():
+            handlers = [AsyncFixedWidthHandler(path) for path in paths]
+            await asyncio.gather(*(handler.add_transaction(amount, 'EUR')
+                                   for handler in handlers for amount in range(1, 11)))
+            reports = await asyncio.gather(*(handler.validate() for handler in handlers))
+            handlers[0].batch_size = 2
+            counters = [transaction['Counter'] async for transaction in handlers[0].iter_transactions(start=10)]
+            return reports, counters
+
+        reports, counters = asyncio.run(scenario())
+        self.assertTrue(all(report.valid and report.num_transactions == 11 for report in reports))
+        self.assertEqual(counters, ['000010', '000011'])
+
+    def test_write_while_iterating_fails_fast(self):
+        """Tests that a write issued inside unfinished async iteration raises instead of waiting for itself"""
+        handler = AsyncFixedWidthHandler(make_file(self.tmpdir.name, [1, 2, 3]))
+        handler.batch_size = 1
+
+        async def scenario():
+            async for _ in handler.iter_transactions():
+                await handler.update_field('transaction', 'Amount', '5', 1)
+
+        with self.assertRaises(locking.LockConflictError):
+            asyncio.run(scenario())
+
+    def test_writers_wait_for_iteration_of_other_task(self):
+        """Tests that writes of other tasks wait for iteration, which does not hold slots of other files"""
+        directory = os.path.join(self.tmpdir.name, 'other')
+        os.mkdir(directory)
+        handler = AsyncFixedWidthHandler(make_file(self.tmpdir.name, [1, 2, 3]))
+        other = AsyncFixedWidthHandler(make_file(directory, [5]))
+        handler.batch_size = 2
+
+        async def scenario():
+            release = asyncio.Event()
+            started = asyncio.Event()
+            seen = []
+
+            async def iterate():
+                async for transaction in handler.iter_transactions():
+                    seen.append(transaction['Counter'])
+                    started.set()
+                    await release.wait()
+
+            iteration = asyncio.create_task(iterate())
+            await started.wait()
+            writes = [asyncio.create_task(handler.add_transaction(amount, 'USD')) for amount in (7, 8)]
+            await asyncio.sleep(0)
+            # Writes queued on the busy file leave the only slot to other files
+            footer = await asyncio.wait_for(other.read_file(), timeout=5)
+            release.set()
+            await iteration
+            return seen, await asyncio.gather(*writes), footer[2]['Total Counter']
+
+        concurrency, AsyncFixedWidthHandler.concurrency = AsyncFixedWidthHandler.concurrency, 1
+        try:
+            seen, counters, total = asyncio.run(scenario())
+        finally:
+            AsyncFixedWidthHandler.concurrency = concurrency
+        self.assertEqual(seen, ['000001', '000002', '000003'])
+        self.assertEqual(sorted(counters), ['000004', '000005'])
+        self.assertEqual(total, '000001')
@@ -0,0 +1,31 @@
+import os
+import tempfile
+import unittest
+from benchmarks.generate import generate
+from benchmarks.run import compare, run
+from FixedFileIO.utils import ValidationExecutor
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_generated_file_is_valid_and_deterministic(self):
+        """Tests that generator writes the same valid file for the same seed"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            first, second = os.path.join(tmpdir, 'first.fwf'), os.path.join(tmpdir, 'second.fwf')
+            self.assertEqual(generate(first, 50, seed=7), generate(second, 50, seed=7))
+            with open(first, 'rb') as file_a, open(second, 'rb') as file_b:
+                self.assertEqual(file_a.read(), file_b.read())
+            self.assertTrue(ValidationExecutor(first).run()[0])
+
+    def test_run_and_compare(self):
+        """Tests that results are reported per operation and slowdowns are flagged"""
+        results = run([20], repeat=1)
+        self.assertEqual({row['operation'] for row in results['results']},
+                         {'read_file', 'write_file', 'add_transaction', 'update_field', 'validate'})
+        self.assertEqual(compare(results, results), [])
+        baseline = {'results': [dict(row, seconds=row['seconds'] / 2) for row in results['results']]}
+        self.assertEqual(len(compare(results, baseline, threshold=0.5)), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+import zlib
+from unittest.mock import patch
+from FixedFileIO import compressed
+from FixedFileIO.handler import FixedWidthHandler
+from FixedFileIO.utils import ValidationExecutor
+from tests.helpers import make_file
+
+
+class TestCompressed(unittest.TestCase):
+
+    def setUp(self):
+        """Test configuration."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.plain = make_file(self.tmpdir.name, list(range(1, 101)))
+        self.filepath = os.path.join(self.tmpdir.name, 'testfile.fwz')
+        compressed.compress_file(self.plain, self.filepath, block_records=16)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_transparent_reads_and_validation(self):
+        """Tests that compressed file reads and validates like the plain one"""
+        self.assertTrue(compressed.is_compressed(self.filepath))
+        self.assertLess(os.path.getsize(self.filepath), os.path.getsize(self.plain))
+        self.assertEqual(FixedWidthHandler(self.filepath).read_file(), FixedWidthHandler(self.plain).read_file())
+        self.assertTrue(ValidationExecutor(self.filepath).run()[0])
+
+    def test_lookup_decompresses_single_block(self):
+        """Tests that lookup by counter decompresses only the block holding the record"""
+        calls = []
+
+        def decompress(data):
+            calls.append(len(data))
+            return zlib.decompress(data)
+        with patch.dict(compressed.CODECS, {'zlib': (zlib.compress, decompress)}):
+            transaction = FixedWidthHandler(self.filepath).get_transaction(50)
+        self.assertEqual(transaction['Amount'], '000000000050')
+        self.assertEqual(len(calls), 1)
+
+    def test_writes_keep_file_compressed(self):
+        """Tests that add and update rewrite compressed file with correct footer"""
+        handler = FixedWidthHandler(self.filepath)
+        handler.add_transaction(1000, 'EUR')
+        handler.update_field('transaction', 'Amount', '0', 1)
+        self.assertTrue(compressed.is_compressed(self.filepath))
+        footer = handler.read_footer()
+        self.assertEqual((footer['Total Counter'], footer['Control sum']), ('000101', '000000006049'))
+        self.assertTrue(ValidationExecutor(self.filepath).run()[0])
+
+        handler = FixedWidthHandler(self.plain, compression='lzma')
+        handler.write_file(*handler.read_file())
+        self.assertEqual(compressed.codec_of(self.plain), 'lzma')
+
+
+if __name__ == '__main__':
+    unittest.main()
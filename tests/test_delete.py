@@ -0,0 +1,163 @@
+import os
+import tempfile
+import unittest
+from FixedFileIO import compressed
+from FixedFileIO.handler import FixedWidthHandler
+from FixedFileIO.server import LedgerService
+from FixedFileIO.utils import ValidationExecutor
+from tests.helpers import make_file
+
+
+class TestDelete(unittest.TestCase):
+
+    def setUp(self):
+        """Test configuration."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = make_file(self.tmpdir.name, list(range(1, 21)))
+        self.handler = FixedWidthHandler(self.filepath, compact_threshold=None)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read_lines(self) -> list:
+        with open(self.filepath, encoding='utf-8') as file:
+            return file.read().splitlines()
+
+    def test_delete_in_place(self):
+        """Tests that deletion rewrites only the record and footer, which readers and validators skip"""
+        original = self.read_lines()
+        self.handler.delete_transaction(5)
+        lines = self.read_lines()
+        self.assertEqual(len(lines), len(original))
+        self.assertEqual(lines[5], '04' + original[5][2:])
+        self.assertEqual(lines[1:5] + lines[6:21], original[1:5] + original[6:21])
+        self.assertEqual(lines[-1][:20], '03000019000000000205')
+
+        _, transactions, footer = self.handler.read_file()
+        self.assertEqual(len(transactions), 19)
+        self.assertNotIn('000005', [transaction['Counter'] for transaction in transactions])
+        _, table, _ = self.handler.read_file(table=True)
+        self.assertEqual(table[4].counter, 6)
+        self.assertEqual(table.position(6), 4)
+        with self.assertRaises(KeyError):
+            table.position(5)
+        with self.assertRaises(ValueError):
+            self.handler.get_transaction(5)
+        self.assertEqual(self.handler.control_sum_range(), 205)
+        self.assertTrue(ValidationExecutor(self.filepath).run()[0])
+        self.assertTrue(ValidationExecutor(self.filepath).validate_stream().valid)
+        with self.assertRaises(ValueError):
+            self.handler.delete_transaction(5)
+
+    def test_add_after_delete_continues_numbering(self):
+        """Tests that added transactions follow the last record, not the live count"""
+        self.handler.delete_transaction(20)
+        self.assertEqual(self.handler.add_transaction(amount=7, currency='EUR'), '000021')
+        self.assertEqual(self.read_lines()[-1][:20], '03000020000000000197')
+        self.assertTrue(ValidationExecutor(self.filepath).run()[0])
+
+    def test_compact_renumbers(self):
+        """Tests that compaction drops deleted records and renumbers the rest in order"""
+        for counter in (2, 3, 10):
+            self.handler.delete_transaction(counter)
+        self.assertEqual(self.handler.compact(), 3)
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 19)
+        self.assertEqual([line[2:8] for line in lines[1:-1]], [f"{counter:06}" for counter in range(1, 18)])
+        self.assertEqual([int(line[8:20]) for line in lines[1:4]], [1, 4, 5])
+        self.assertEqual(lines[-1][:20], '03000017000000000195')
+        self.assertTrue(ValidationExecutor(self.filepath).run()[0])
+        self.assertEqual(self.handler.compact(), 0)
+
+    def test_background_compaction_past_threshold(self):
+        """Tests that deletions beyond the threshold compact the file in background"""
+        handler = FixedWidthHandler(self.filepath, compact_threshold=0.1)
+        handler.delete_transaction(1)
+        self.assertIsNone(handler._compaction)
+        handler.delete_transaction(2)
+        handler.delete_transaction(3)
+        handler._compaction.join(timeout=10)
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 19)
+        self.assertFalse([line for line in lines if line.startswith('04')])
+        self.assertTrue(ValidationExecutor(self.filepath).run()[0])
+        self.assertFalse([name for name in os.listdir(self.tmpdir.name) if name.endswith('.tmp')])
+
+    def test_no_background_compaction_by_default(self):
+        """Tests that counters stay unchanged after many deletions unless compaction is enabled"""
+        handler = FixedWidthHandler(self.filepath)
+        for counter in range(5, 15):
+            handler.delete_transaction(counter)
+        self.assertIsNone(handler._compaction)
+        handler.update_field('transaction', 'Amount', '999', 15)
+        self.assertEqual(self.read_lines()[15][:20], '02000015000000000999')
+
+    def test_delete_compressed(self):
+        """Tests that deletion from a compressed file keeps counters of remaining transactions"""
+        filepath = os.path.join(self.tmpdir.name, 'testfile.fwz')
+        compressed.compress_file(self.filepath, filepath, block_records=8)
+        handler = FixedWidthHandler(filepath)
+        handler.delete_transaction(4)
+        handler.delete_transaction(5)
+        self.assertTrue(compressed.is_compressed(filepath))
+        _, transactions, footer = handler.read_file()
+        self.assertEqual([int(transaction['Amount']) for transaction in transactions[2:4]], [3, 6])
+        self.assertEqual(transactions[3]['Counter'], '000006')
+        self.assertEqual(footer['Total Counter'], '000018')
+        self.assertTrue(ValidationExecutor(filepath).run()[0])
+        with self.assertRaises(ValueError):
+            handler.delete_transaction(4)
+        self.assertEqual(handler.compact(), 2)
+        self.assertEqual(handler.get_transaction(4)['Amount'], '000000000006')
+
+    def test_rewrites_keep_counters(self):
+        """Tests that compressed appends and full rewrites keep counters following a deleted transaction"""
+        filepath = os.path.join(self.tmpdir.name, 'testfile.fwz')
+        compressed.compress_file(self.filepath, filepath, block_records=8)
+        handler = FixedWidthHandler(filepath)
+        handler.delete_transaction(2)
+        self.assertEqual(handler.add_transaction(50, 'USD'), '000021')
+        _, transactions, footer = handler.read_file()
+        self.assertEqual((transactions[1]['Counter'], transactions[1]['Amount']), ('000003', '000000000003'))
+        self.assertEqual(footer['Total Counter'], '000020')
+        self.assertTrue(compressed.is_compressed(filepath))
+        self.assertTrue(ValidationExecutor(filepath).run()[0])
+
+        self.handler.delete_transaction(2)
+        with self.handler.session(rewrite_ratio=0) as session:
+            session.update_field('transaction', 'Amount', '40', 4)
+        self.assertEqual(self.handler.get_transaction(4)['Amount'], '000000000040')
+        lines = self.read_lines()
+        self.assertEqual((len(lines), lines[2][:8]), (22, '04000002'))
+        self.assertTrue(ValidationExecutor(self.filepath).run()[0])
+        with self.handler.session() as session:
+            self.assertEqual(session.add_transaction(1, 'USD')['Counter'], '000021')
+
+    def test_server_with_deleted_transactions(self):
+        """Tests that in-memory service looks transactions up by counter across gaps"""
+        self.handler.delete_transaction(3)
+        service = LedgerService(self.filepath)
+        try:
+            self.assertEqual(service.transaction(4)['Amount'], '000000000004')
+            with self.assertRaises(KeyError):
+                service.transaction(3)
+            self.assertEqual([row['Counter'] for row in service.transactions(start=2, stop=5)],
+                             ['000002', '000004', '000005'])
+            self.assertEqual(service.add_transaction(9, 'USD')['Counter'], '000021')
+            service.update_field('transaction', 'Amount', '40', 4)
+            self.assertEqual(service.transaction(4)['Amount'], '000000000040')
+        finally:
+            service.close()
+        self.assertTrue(ValidationExecutor(self.filepath).run()[0])
+
+    def test_session_after_delete(self):
+        """Tests that session writes in place at record positions kept by deleted transactions"""
+        self.handler.delete_transaction(2)
+        with self.handler.session() as session:
+            session.update_field('transaction', 'Amount', '30', 3)
+            self.assertEqual(session.add_transaction(1, 'USD')['Counter'], '000021')
+        lines = self.read_lines()
+        self.assertEqual(lines[2][:2], '04')
+        self.assertEqual(lines[3][:20], '02000003000000000030')
+        self.assertEqual(lines[-1][:20], '03000020000000000236')
+        self.assertTrue(ValidationExecutor(self.filepath).run()[0])
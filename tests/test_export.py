@@ -0,0 +1,52 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from FixedFileIO.export import read_columnar
+from FixedFileIO.handler import FixedWidthHandler
+from tests.helpers import make_file
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        """Test configuration."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.handler = FixedWidthHandler(make_file(self.tmpdir.name, [100, 250, 75], currency='PLN'))
+        self.target = os.path.join(self.tmpdir.name, 'export')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_export_jsonl_and_csv(self):
+        """Tests that records are exported in file order with numeric fields as numbers"""
+        self.handler.export(self.target, fmt='jsonl')
+        with open(self.target, encoding='utf-8') as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual([record['record_type'] for record in records],
+                         ['header', 'transaction', 'transaction', 'transaction', 'footer'])
+        self.assertEqual(records[2], {'record_type': 'transaction', 'counter': 2, 'amount': 250, 'currency': 'PLN'})
+        self.assertEqual(records[-1], {'record_type': 'footer', 'total_counter': 3, 'control_sum': 425})
+
+        self.handler.export(self.target, fmt='csv')
+        with open(self.target, encoding='utf-8', newline='') as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(rows[0]['name'], 'John')
+        self.assertEqual([row['amount'] for row in rows[1:4]], ['100', '250', '75'])
+
+    def test_export_columnar(self):
+        """Tests that columnar dump round-trips through read_columnar"""
+        self.handler.export(self.target, fmt='columnar')
+        header, columns, footer = read_columnar(self.target)
+        self.assertEqual(header['surname'], 'Doe')
+        self.assertEqual(list(columns['counter']), [1, 2, 3])
+        self.assertEqual(list(columns['amount']), [100, 250, 75])
+        self.assertEqual({columns['currencies'][code] for code in columns['currency']}, {'PLN'})
+        self.assertEqual(footer['control_sum'], 425)
+        with self.assertRaises(ValueError):
+            self.handler.export(self.target, fmt='xml')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
+import os
+import tempfile
 import unittest
 from unittest.mock import patch
 from FixedFileIO.handler import FixedWidthHandler
+from FixedFileIO.utils import TransactionLimitError
+from tests.helpers import make_file
 
 
 class TestFixedWidthHandler(unittest.TestCase):
@@ -10,7 +14,7 @@ class TestFixedWidthHandler(unittest.TestCase):
         self.filepath = 'testfile.fwf'
         self.handler = FixedWidthHandler(self.filepath)
 
-    @patch('FixedFileIO.handler.open',
+    @patch('FixedFileIO.compressed.open',
            unittest.mock.mock_open(read_data="01Name    \n02Transact\n03Footer  "), create=True)
     @patch('FixedFileIO.handler.logger')
     def test_read_file_success(self, mock_logger):
@@ -21,28 +25,127 @@ class TestFixedWidthHandler(unittest.TestCase):
         self.assertIsNotNone(footer)
         mock_logger.info.assert_called_with("File successfully loaded")
 
-    @patch('FixedFileIO.handler.open', unittest.mock.mock_open(), create=True)
     @patch('FixedFileIO.handler.logger')
     def test_write_file_success(self, mock_logger):
         """Verifies that the `write_file` method correctly formats data"""
         header = {'Field ID': '01', 'Name': 'Name'}
         transactions = [{'Field ID': '02', 'Amount': '100', 'Currency': 'USD'}]
         footer = {'Field ID': '03', 'Total Counter': '1', 'Control sum': '100'}
-        self.handler.write_file(header, transactions, footer)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            handler = FixedWidthHandler(os.path.join(tmpdir, self.filepath))
+            handler.write_file(header, transactions, footer)
+            with open(handler.filepath, encoding='utf-8') as file:
+                lines = file.read().splitlines()
+            self.assertEqual(sorted(os.listdir(tmpdir)), [self.filepath, self.filepath + '.lock'])
+        self.assertEqual([len(line) for line in lines], [120, 120, 120])
         mock_logger.info.assert_called_with("File successfully wrote")
 
-    @patch('FixedFileIO.handler.FixedWidthHandler.write_file')
-    @patch('FixedFileIO.handler.FixedWidthHandler.read_file')
-    def test_add_transaction_success(self, mock_read_file, mock_write_file):
-        """Tests that the `add_transaction` method successfully adds a new transaction"""
-        mock_read_file.return_value = ({}, [], {})
-        self.handler.add_transaction('100', 'USD')
-        mock_write_file.assert_called()
-
-    @patch('FixedFileIO.handler.FixedWidthHandler.write_file')
-    @patch('FixedFileIO.handler.FixedWidthHandler.read_file')
-    def test_update_field_success(self, mock_read_file, mock_write_file):
-        """Confirms that the `update_field` method can correctly update values"""
-        mock_read_file.return_value = ({'Field ID': '01', 'Name': 'OldName'}, [], {})
-        self.handler.update_field('header', 'Name', 'NewName', None)
-        mock_write_file.assert_called()
+    def test_write_file_failure_keeps_original(self):
+        """Verifies that a failed `write_file` leaves the original file untouched"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            handler = FixedWidthHandler(make_file(tmpdir, [100]))
+            with open(handler.filepath, encoding='utf-8') as file:
+                original = file.read()
+            with self.assertRaises(ValueError):
+                handler.write_file({'Field ID': '01'}, [{'Amount': 'abc', 'Currency': 'USD'}], {})
+            with open(handler.filepath, encoding='utf-8') as file:
+                self.assertEqual(file.read(), original)
+            self.assertFalse([name for name in os.listdir(tmpdir) if name.endswith('.tmp')])
+
+    def test_add_transaction_success(self):
+        """Tests that the `add_transaction` method appends a transaction and regenerates footer"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            handler = FixedWidthHandler(make_file(tmpdir, [100, 250]))
+            handler.add_transaction(300, 'EUR')
+            with open(handler.filepath, 'r', encoding='utf-8') as file:
+                lines = file.read().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[3][:23], '02000003000000000300EUR')
+        self.assertEqual(lines[4][:20], '03000003000000000650')
+        self.assertTrue(all(len(line) == 120 for line in lines))
+
+    def test_add_transaction_limit(self):
+        """Tests that the `add_transaction` method refuses to exceed transaction limit"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            handler = FixedWidthHandler(make_file(tmpdir, [100, 250]))
+            handler.transaction_limit = 2
+            with self.assertRaises(TransactionLimitError):
+                handler.add_transaction(300, 'EUR')
+
+    def test_update_field_success(self):
+        """Confirms that the `update_field` method can correctly update values in place"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            handler = FixedWidthHandler(make_file(tmpdir, [100, 250]))
+            handler.update_field('header', 'Name', 'NewName', None)
+            handler.update_field('transaction', 'Amount', '50', '000002')
+            header, transactions, footer = handler.read_file()
+        self.assertEqual(header['Name'], 'NewName')
+        self.assertEqual(transactions[1]['Amount'], '000000000050')
+        self.assertEqual(footer['Control sum'], '000000000150')
+
+    def test_update_field_missing_counter(self):
+        """Confirms that the `update_field` method rejects unknown transaction counter"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            handler = FixedWidthHandler(make_file(tmpdir, [100, 250]))
+            with self.assertRaises(ValueError):
+                handler.update_field('transaction', 'Amount', '50', '000007')
+
+    def test_iter_transactions_filters(self):
+        """Tests that `iter_transactions` streams records with currency and counter filters"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            handler = FixedWidthHandler(make_file(tmpdir, [100, 250, 300, 400]))
+            handler.update_field('transaction', 'Currency', 'EUR', '000003')
+            self.assertEqual([t['Counter'] for t in handler.iter_transactions(start=2, stop=3)],
+                             ['000002', '000003'])
+            self.assertEqual([t['Counter'] for t in handler.iter_transactions(currency='EUR')], ['000003'])
+            self.assertEqual(handler.read_header()['Surname'], 'Doe')
+            self.assertEqual(handler.read_footer()['Total Counter'], '000004')
+
+    def test_add_transactions_batch_is_atomic(self):
+        """Tests that `add_transactions` appends whole batch or nothing"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            handler = FixedWidthHandler(make_file(tmpdir, [100]))
+            self.assertEqual(handler.add_transactions([(200, 'USD'), ('300', 'EUR')]), 2)
+            with open(handler.filepath, encoding='utf-8') as file:
+                content = file.read()
+            with self.assertRaises(ValueError):
+                handler.add_transactions([(400, 'USD'), (500, 'XXX')])
+            # Amounts which are not whole numbers are rejected instead of truncated
+            for amount in (12.99, True, '12.99', None):
+                with self.assertRaises(ValueError):
+                    handler.add_transactions([(400, 'USD'), (amount, 'USD')])
+            with open(handler.filepath, encoding='utf-8') as file:
+                self.assertEqual(file.read(), content)
+            self.assertEqual(handler.add_transactions([(5.0, 'USD')]), 1)
+            footer = handler.read_footer()
+        self.assertEqual((footer['Total Counter'], footer['Control sum']), ('000004', '000000000605'))
+
+    def test_update_fields_batch(self):
+        """Tests that `update_fields` applies all changes in one rewrite and recomputes Control sum"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            handler = FixedWidthHandler(make_file(tmpdir, [100, 250, 300]))
+            applied = handler.update_fields([('transaction', 'Amount', '50', '1'),
+                                             ('transaction', 'Currency', 'EUR', '000003'),
+                                             ('header', 'Name', 'Jane', None)])
+            self.assertEqual(applied, 3)
+            with self.assertRaises(ValueError):
+                handler.update_fields([('transaction', 'Amount', '1', '000001'),
+                                       ('transaction', 'Amount', '1', '000009')])
+            header, transactions, footer = handler.read_file()
+        self.assertEqual(header['Name'], 'Jane')
+        self.assertEqual([t['Amount'] for t in transactions], ['000000000050', '000000000250', '000000000300'])
+        self.assertEqual(transactions[2]['Currency'], 'EUR')
+        self.assertEqual(footer['Control sum'], '000000000600')
+
+    def test_stats_and_query(self):
+        """Tests per-currency aggregates, top amounts and filters computed in a streaming pass"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            handler = FixedWidthHandler(make_file(tmpdir, [100, 250, 300, 400]))
+            handler.update_field('transaction', 'Currency', 'EUR', '000002')
+            stats = handler.stats(top=2)
+            self.assertEqual(stats['currencies'], {'EUR': {'count': 1, 'sum': 250, 'min': 250, 'max': 250},
+                                                   'USD': {'count': 3, 'sum': 800, 'min': 100, 'max': 400}})
+            self.assertEqual([t['Counter'] for t in stats['top']], ['000004', '000003'])
+            self.assertEqual(handler.stats(start=3, currency='USD')['count'], 2)
+            self.assertEqual([t['Counter'] for t in handler.query(min_amount=200, max_amount=300)],
+                             ['000002', '000003'])
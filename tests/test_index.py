@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+from FixedFileIO.handler import FixedWidthHandler
+from FixedFileIO.index import SidecarIndex
+from tests.helpers import make_file
+
+
+class TestSidecarIndex(unittest.TestCase):
+
+    def setUp(self):
+        """Test configuration."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.handler = FixedWidthHandler(make_file(self.tmpdir.name, [100, 250, 300, 400]), use_index=True)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_lookups_and_range_sums(self):
+        """Tests counter lookup, currency postings and range sums answered by the index"""
+        self.assertEqual(self.handler.get_transaction(3)['Amount'], '000000000300')
+        self.assertEqual(self.handler.control_sum_range(2, 3), 550)
+        self.assertEqual(self.handler.control_sum_range(), 1050)
+        self.assertTrue(os.path.exists(self.handler.filepath + '.idx'))
+        self.assertIsNotNone(SidecarIndex.load(self.handler.filepath))
+
+    def test_incremental_updates_keep_index_fresh(self):
+        """Tests that add and update keep index consistent with a full rebuild"""
+        self.handler.add_transactions([(50, 'EUR'), (70, 'USD')])
+        self.handler.update_field('transaction', 'Amount', '10', '000002')
+        self.handler.update_field('transaction', 'Currency', 'EUR', '000001')
+        index = SidecarIndex.load(self.handler.filepath)
+        self.assertIsNotNone(index)
+        rebuilt = SidecarIndex.build(self.handler.filepath)
+        self.assertEqual((index.offsets, index.prefix_sums), (rebuilt.offsets, rebuilt.prefix_sums))
+        self.assertEqual([t['Counter'] for t in self.handler.transactions_by_currency('EUR')], ['000001', '000005'])
+
+    def test_unindexed_field_update_discards_index(self):
+        """Tests that updates of fields the index cannot follow make it rebuilt"""
+        self.handler.index()
+        self.handler.update_field('transaction', 'Field ID', '04', '000002')
+        self.assertFalse(os.path.exists(self.handler.filepath + '.idx'))
+        self.assertEqual(self.handler.control_sum_range(), 800)
+        self.handler.update_field('transaction', 'Counter', '000009', '000004')
+        self.assertEqual(self.handler.get_transaction(9)['Amount'], '000000000400')
+        self.assertEqual(self.handler.control_sum_range(5, 9), 400)
+
+    def test_stale_index_is_rebuilt(self):
+        """Tests that changes made without index invalidate it"""
+        self.handler.index()
+        FixedWidthHandler(self.handler.filepath).update_field('transaction', 'Amount', '1', '000004')
+        self.assertIsNone(SidecarIndex.load(self.handler.filepath))
+        self.assertEqual(self.handler.control_sum_range(4, 4), 1)
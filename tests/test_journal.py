@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from FixedFileIO.handler import FixedWidthHandler
+from FixedFileIO.journal import Journal, JournaledHandler
+from FixedFileIO.utils import ValidationExecutor
+from tests.helpers import make_file
+
+
+class TestJournaledHandler(unittest.TestCase):
+
+    def setUp(self):
+        """Test configuration."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = make_file(self.tmpdir.name, [100, 250])
+        with open(self.filepath, encoding='utf-8') as file:
+            self.original = file.read()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_reads_merge_journal_and_recover(self):
+        """Tests that journaled operations leave base file intact and are replayed on open"""
+        with JournaledHandler(self.filepath, commit_every=10) as handler:
+            handler.add_transaction(300, 'EUR')
+            handler.update_field('transaction', 'Amount', '50', '000001')
+            with self.assertRaises(ValueError):
+                handler.update_field('transaction', 'Amount', '50', '000004')
+        with open(self.filepath, encoding='utf-8') as file:
+            self.assertEqual(file.read(), self.original)
+        # Torn record left by a crash is discarded on recovery
+        with open(self.filepath + '.journal', 'ab') as file:
+            file.write(b'{"op": "add", "amo')
+        with JournaledHandler(self.filepath) as handler:
+            header, transactions, footer = handler.read_file()
+        self.assertEqual([t['Counter'] for t in transactions], ['000001', '000002', '000003'])
+        self.assertEqual(footer['Control sum'], '000000000600')
+
+    def test_compact_folds_journal(self):
+        """Tests that compaction rewrites base file and empties journal"""
+        with JournaledHandler(self.filepath, commit_interval_ms=5) as handler:
+            handler.add_transaction(300, 'EUR')
+            handler.update_field('header', 'Name', 'Jane')
+            self.assertEqual(handler.compact(), 2)
+        self.assertEqual(os.path.getsize(self.filepath + '.journal'), 0)
+        self.assertTrue(ValidationExecutor(self.filepath).validate_stream().valid)
+        with JournaledHandler(self.filepath) as handler:
+            header, transactions, _ = handler.read_file()
+        self.assertEqual((header['Name'], len(transactions)), ('Jane', 3))
+
+    def test_crash_during_compact_does_not_replay_folded(self):
+        """Tests that operations folded before a crash are not replayed on top of the new base file"""
+        handler = JournaledHandler(self.filepath)
+        handler.add_transaction(300, 'EUR')
+        with patch.object(Journal, 'discard_through', side_effect=OSError("crash")):
+            with self.assertRaises(OSError):
+                handler.compact()
+        handler.journal._file.close()
+        self.assertTrue(os.path.exists(self.filepath + '.journal.fold'))
+        with JournaledHandler(self.filepath) as handler:
+            _, transactions, footer = handler.read_file()
+            handler.add_transaction(5, 'USD')
+        self.assertEqual(footer['Control sum'], '000000000650')
+        self.assertEqual(len(transactions), 3)
+        self.assertFalse(os.path.exists(self.filepath + '.journal.fold'))
+        with JournaledHandler(self.filepath) as handler:
+            self.assertEqual(handler.read_file()[2]['Control sum'], '000000000655')
+
+    def test_adds_follow_deleted_records(self):
+        """Tests that journaled adds are numbered after deleted records of the base file"""
+        handler = FixedWidthHandler(self.filepath)
+        handler.add_transaction(50, 'USD')
+        handler.delete_transaction(2)
+        with JournaledHandler(self.filepath) as handler:
+            handler.add_transaction(300, 'EUR')
+            handler.update_field('transaction', 'Amount', '7', '000003')
+            handler.update_field('transaction', 'Amount', '8', '000004')
+            with self.assertRaises(ValueError):
+                handler.update_field('transaction', 'Amount', '9', '000002')
+            _, transactions, footer = handler.read_file()
+            self.assertEqual([(t['Counter'], int(t['Amount'])) for t in transactions],
+                             [('000001', 100), ('000003', 7), ('000004', 8)])
+            self.assertEqual(footer['Control sum'], '000000000115')
+            handler.compact()
+            handler.add_transaction(1, 'USD')
+            # Folding keeps counters, deleted record stays in place of its counter
+            self.assertEqual([t['Counter'] for t in handler.read_file()[1]], ['000001', '000003', '000004', '000005'])
+        self.assertTrue(ValidationExecutor(self.filepath).validate_stream().valid)
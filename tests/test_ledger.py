@@ -0,0 +1,41 @@
+import tempfile
+import unittest
+from FixedFileIO.ledger import Ledger
+from FixedFileIO.utils import ValidationExecutor
+
+
+class TestLedger(unittest.TestCase):
+
+    def setUp(self):
+        """Test configuration."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        header = {'Name': 'John', 'Surname': 'Doe', 'Patronymic': 'Michael', 'Address': 'Main St.'}
+        self.ledger = Ledger.create(self.tmpdir.name, header=header, segment_size=2)
+        for amount in [100, 200, 300, 400, 500]:
+            self.ledger.add_transaction(amount, 'USD')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_add_spreads_across_segments(self):
+        """Tests that transactions are spread across valid segment files"""
+        self.assertEqual(len(self.ledger.segments), 3)
+        self.assertEqual((self.ledger.total_count, self.ledger.control_sum), (5, 1500))
+        for segment in self.ledger.segments:
+            self.assertTrue(ValidationExecutor(f"{self.tmpdir.name}/{segment['file']}").run()[0])
+        self.assertEqual([t['Counter'] for t in self.ledger.iter_transactions()],
+                         ['000001', '000002', '000003', '000004', '000005'])
+
+    def test_update_routes_to_segment(self):
+        """Tests that update is routed by global counter and manifest totals follow"""
+        self.ledger.update_field('transaction', 'Amount', '50', '000004')
+        self.assertEqual(self.ledger.get_transaction(4)['Amount'], '000000000050')
+        reopened = Ledger(self.tmpdir.name)
+        self.assertEqual(reopened.control_sum, 1150)
+        self.assertEqual(reopened.segments[1]['control_sum'], 350)
+        with self.assertRaises(ValueError):
+            reopened.get_transaction(6)
+        # Transaction missing inside segment's range raises the same way
+        reopened._handler(reopened.segments[1]).delete_transaction(1)
+        with self.assertRaises(ValueError):
+            reopened.get_transaction(3)
@@ -0,0 +1,96 @@
+import builtins
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from FixedFileIO import locking
+from FixedFileIO.handler import FixedWidthHandler
+from FixedFileIO.utils import ValidationExecutor
+from tests.helpers import make_file
+
+
+def _add_many(filepath, count):
+    handler = FixedWidthHandler(filepath)
+    for _ in range(count):
+        handler.add_transaction(amount=1, currency='USD')
+
+
+@unittest.skipUnless(locking.fcntl, "fcntl is not available")
+class TestLocking(unittest.TestCase):
+
+    def setUp(self):
+        """Test configuration."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = make_file(self.tmpdir.name, [100])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_concurrent_writers_in_processes(self):
+        """Tests that appends from several processes never interleave"""
+        processes = [multiprocessing.Process(target=_add_many, args=(self.filepath, 25)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        status, _ = ValidationExecutor(self.filepath).run()
+        self.assertTrue(status)
+        self.assertEqual(FixedWidthHandler(self.filepath).read_footer()['Total Counter'], '000101')
+
+    def test_readers_in_read_only_location(self):
+        """Tests that readers go without lock when the sidecar cannot be created, while writers fail"""
+        def read_only(path, mode='r', *args, **kwargs):
+            if mode != 'r':
+                raise PermissionError(13, "Permission denied", path)
+            return builtins.open(path, mode, *args, **kwargs)
+
+        handler = FixedWidthHandler(self.filepath)
+        with patch('FixedFileIO.locking.open', side_effect=read_only, create=True):
+            self.assertEqual(handler.read_footer()['Total Counter'], '000001')
+            self.assertFalse(os.path.exists(self.filepath + '.lock'))
+            with self.assertRaises(PermissionError):
+                handler.add_transaction(5, 'USD')
+        handler.add_transaction(5, 'USD')
+        with patch('FixedFileIO.locking.open', side_effect=read_only, create=True):
+            # Sidecar created by a writer is still locked by readers
+            with locking.FileLock(self.filepath, shared=True) as lock:
+                self.assertIsNotNone(lock._file)
+        missing = os.path.join(self.tmpdir.name, 'missing.fwf')
+        with locking.FileLock(missing, shared=True):
+            self.assertFalse(os.path.exists(missing + '.lock'))
+
+    def test_lock_timeout(self):
+        """Tests that writers time out behind a reader while readers share the lock"""
+        handler = FixedWidthHandler(self.filepath, lock_timeout=0.05)
+        with locking.FileLock(self.filepath, shared=True):
+            self.assertEqual(handler.read_footer()['Total Counter'], '000001')
+            with self.assertRaises(locking.LockTimeoutError):
+                handler.add_transaction(amount=1, currency='USD')
+        handler.add_transaction(amount=1, currency='USD')
+
+    def test_generator_holds_shared_lock(self):
+        """Tests that an unfinished iteration keeps writers out until it is closed"""
+        handler = FixedWidthHandler(self.filepath, lock_timeout=0.05)
+        transactions = handler.iter_transactions()
+        next(transactions)
+        with self.assertRaises(locking.LockTimeoutError):
+            FixedWidthHandler(self.filepath, lock_timeout=0.05).update_field('transaction', 'Amount', '5', 1)
+        transactions.close()
+        handler.update_field('transaction', 'Amount', '5', 1)
+        self.assertEqual(handler.read_footer()['Control sum'], '000000000005')
+
+    def test_write_while_iterating_fails_fast(self):
+        """Tests that a write of the same handler during its own iteration raises instead of timing out"""
+        handler = FixedWidthHandler(self.filepath)
+        transactions = handler.iter_transactions()
+        next(transactions)
+        with self.assertRaises(locking.LockConflictError):
+            handler.update_field('transaction', 'Amount', '5', 1)
+        self.assertEqual(handler.read_footer()['Total Counter'], '000001')
+        transactions.close()
+        handler.update_field('transaction', 'Amount', '5', 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+from FixedFileIO import metrics
+from FixedFileIO.handler import FixedWidthHandler
+from FixedFileIO.utils import ValidationExecutor
+from tests.helpers import make_file
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        """Test configuration."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = make_file(self.tmpdir.name, [100, 250])
+        metrics.registry.reset()
+
+    def tearDown(self):
+        metrics.registry.disable()
+        metrics.registry.reset()
+        metrics.registry.hooks.clear()
+        self.tmpdir.cleanup()
+
+    def test_disabled_metrics_collect_nothing(self):
+        """Tests that disabled metrics hand out shared no-op timers"""
+        self.assertIs(metrics.registry.phase('parse'), metrics.registry.operation('read_file'))
+        FixedWidthHandler(self.filepath).read_file()
+        self.assertEqual(metrics.registry.report(), {'phases': {}, 'operations': {}})
+
+    def test_enabled_metrics_and_hook(self):
+        """Tests that operations record phases, counts, bytes and call hooks"""
+        calls = []
+        metrics.registry.enable()
+        metrics.registry.add_hook(lambda operation, stats: calls.append((operation, stats['records'])))
+        handler = FixedWidthHandler(self.filepath)
+        header, transactions, footer = handler.read_file()
+        handler.write_file(header, transactions, footer)
+        handler.add_transaction(300, 'EUR')
+        ValidationExecutor(self.filepath).run()
+
+        report = metrics.registry.report()
+        self.assertTrue({'open', 'parse', 'format', 'write', 'fsync', 'validate'} <= set(report['phases']))
+        self.assertEqual(report['operations']['read_file']['bytes'], 4 * 121)
+        self.assertEqual(report['operations']['validate']['records'], 3)
+        self.assertEqual(calls, [('read_file', 2), ('write_file', 2), ('add_transactions', 1), ('validate', 3)])
+
+        path = os.path.join(self.tmpdir.name, 'fixedfileio.prom')
+        metrics.registry.write_prometheus(path)
+        with open(path, encoding='utf-8') as file:
+            text = file.read()
+        self.assertIn('fixedfileio_operations_total{operation="read_file"} 1', text)
+        self.assertIn('fixedfileio_records_total{operation="add_transactions"} 1', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import tempfile
+import unittest
+from FixedFileIO import numpy_backend
+from FixedFileIO.handler import FixedWidthHandler
+from FixedFileIO.utils import ValidationExecutor
+from tests.helpers import make_file
+
+
+@unittest.skipUnless(numpy_backend.HAS_NUMPY, "NumPy is not installed")
+class TestNumpyBackend(unittest.TestCase):
+
+    def setUp(self):
+        """Test configuration."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = make_file(self.tmpdir.name, [100, 250, 300])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_read_file_matches_python(self):
+        """Tests that NumPy backend parses the same records as pure-Python one"""
+        handler = FixedWidthHandler(self.filepath)
+        self.assertEqual(handler.read_file(backend='numpy'), handler.read_file())
+
+    def test_validation(self):
+        """Tests that vectorized validation accepts valid and rejects corrupted file"""
+        self.assertTrue(ValidationExecutor(self.filepath, backend='numpy').run()[0])
+        FixedWidthHandler(self.filepath).update_field('transaction', 'Amount', '5', '000001')
+        with open(self.filepath, 'r+b') as file:
+            file.seek(121 * 2 + 20)
+            file.write(b'XYZ')
+        status, results = ValidationExecutor(self.filepath, backend='numpy').run()
+        self.assertFalse(status)
+        self.assertFalse(results['Transactions'])
+
+    def test_validation_checks_counter_sequence(self):
+        """Tests that vectorized validation rejects counters out of sequence, deleted records included"""
+        FixedWidthHandler(self.filepath).delete_transaction(2)
+        self.assertTrue(ValidationExecutor(self.filepath, backend='numpy').run()[0])
+        with open(self.filepath, 'r+b') as file:
+            file.seek(121 * 3 + 2)
+            file.write(b'000005')
+        status, results = ValidationExecutor(self.filepath, backend='numpy').run()
+        self.assertFalse(status)
+        self.assertFalse(results['Transactions'])
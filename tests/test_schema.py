@@ -0,0 +1,70 @@
+import tempfile
+import unittest
+from FixedFileIO.handler import FixedWidthHandler
+from FixedFileIO.schema import TRANSACTION_SCHEMA, RecordSchema
+from FixedFileIO.utils import ValidationExecutor, format_record, get_values_as_dict
+from tests.helpers import make_file
+
+
+class TestRecordSchema(unittest.TestCase):
+
+    def test_encode_decode_roundtrip(self):
+        """Tests that schema pads numeric fields with zeros and decodes both str and bytes"""
+        record = {'Field ID': '02', 'Counter': 7, 'Amount': 1500, 'Currency': 'EUR'}
+        line = TRANSACTION_SCHEMA.encode(record)
+        self.assertEqual(line, '02000007000000001500EUR'.ljust(120))
+        self.assertEqual(TRANSACTION_SCHEMA.encode_bytes(record), line.encode('utf-8'))
+        expected = {'Field ID': '02', 'Counter': '000007', 'Amount': '000000001500', 'Currency': 'EUR', 'Reserved': ''}
+        self.assertEqual(TRANSACTION_SCHEMA.decode(line), expected)
+        self.assertEqual(TRANSACTION_SCHEMA.decode(line.encode('utf-8')), expected)
+
+    def test_invalid_layouts_and_values(self):
+        """Tests that overlapping slices and too long values are rejected"""
+        with self.assertRaises(ValueError):
+            RecordSchema({'Field ID': (0, 2), 'Name': (1, 10)})
+        with self.assertRaises(ValueError):
+            TRANSACTION_SCHEMA.encode({'Amount': 10 ** 13})
+
+    def test_helpers_accept_non_contiguous_slices(self):
+        """Tests that legacy helpers still cut out and pad fields of slices with gaps"""
+        slices = {'Field ID': (0, 2), 'Amount': (8, 20)}
+        self.assertEqual(get_values_as_dict('02000007000000001500EUR', slices),
+                         {'Field ID': '02', 'Amount': '000000001500'})
+        self.assertEqual(format_record({'Field ID': '02', 'Amount': 15}, slices), '02000000000015')
+
+    def test_custom_transaction_layout(self):
+        """Tests that handler reads custom layout defined by a new schema"""
+        schema = RecordSchema({'Field ID': (0, 2), 'Counter': (2, 8), 'Amount': (8, 20),
+                               'Currency': (20, 23), 'Note': (23, 33), 'Reserved': (33, 120)})
+        with tempfile.TemporaryDirectory() as tmpdir:
+            handler = FixedWidthHandler(make_file(tmpdir, [100]), transaction_schema=schema)
+            handler.update_fields([('transaction', 'Currency', 'EUR', '000001')])
+            _, transactions, _ = handler.read_file()
+        self.assertEqual(transactions[0]['Note'], '')
+        self.assertEqual(transactions[0]['Currency'], 'EUR')
+
+    def test_reordered_layout_across_readers(self):
+        """Tests that queries, index, table, mapped view and validation follow handler's transaction schema"""
+        schema = RecordSchema({'Field ID': (0, 2), 'Counter': (2, 8), 'Currency': (8, 11),
+                               'Amount': (11, 23), 'Reserved': (23, 120)})
+        with tempfile.TemporaryDirectory() as tmpdir:
+            handler = FixedWidthHandler(make_file(tmpdir, []), transaction_schema=schema)
+            handler.add_transactions([(100, 'USD'), (250, 'EUR'), (300, 'USD')])
+            with open(handler.filepath, encoding='utf-8') as file:
+                self.assertEqual(file.read().splitlines()[2][:23], '02000002EUR000000000250')
+
+            self.assertEqual(handler.stats()['currencies']['USD']['sum'], 400)
+            self.assertEqual([t['Counter'] for t in handler.query(currency='USD')], ['000001', '000003'])
+            self.assertEqual(handler.get_transaction(2)['Amount'], '000000000250')
+            _, table, _ = handler.read_file(table=True)
+            self.assertEqual(table.control_sum(), 650)
+            header, _, footer = handler.read_file()
+            handler.write_file(header, table, footer)
+            with handler.read_mapped() as mapped:
+                self.assertEqual(mapped.transactions['000003']['Currency'], 'USD')
+            self.assertTrue(ValidationExecutor(handler.filepath, transaction_schema=schema).run()[0])
+            self.assertTrue(ValidationExecutor(handler.filepath, transaction_schema=schema).validate_stream().valid)
+
+            indexed = FixedWidthHandler(handler.filepath, transaction_schema=schema, use_index=True)
+            self.assertEqual(indexed.control_sum_range(2, 3), 550)
+            self.assertEqual([t['Amount'] for t in indexed.transactions_by_currency('EUR')], ['000000000250'])
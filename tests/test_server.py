@@ -0,0 +1,66 @@
+import json
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from FixedFileIO.handler import FixedWidthHandler
+from FixedFileIO.locking import LockTimeoutError
+from FixedFileIO.server import create_server
+from tests.helpers import make_file
+
+
+class TestLedgerServer(unittest.TestCase):
+
+    def setUp(self):
+        """Test configuration."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = make_file(self.tmpdir.name, [100, 250])
+        self.server = create_server(self.filepath, port=0)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.server.service.close()
+        self.tmpdir.cleanup()
+
+    def request(self, path, payload=None):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        with urlopen(Request(self.url + path, data=data)) as response:
+            return json.loads(response.read())
+
+    def test_reads_and_writes(self):
+        """Tests that writes persist to disk and reads are answered from memory"""
+        added = self.request('/transactions', {'amount': 300, 'currency': 'EUR'})
+        self.assertEqual(added['Counter'], '000003')
+        self.request('/update', {'record_type': 'transaction', 'field_name': 'Amount',
+                                 'field_value': '50', 'counter': '000001'})
+        self.assertEqual(self.request('/transactions/1')['Amount'], '000000000050')
+        self.assertEqual(self.request('/footer')['Control sum'], '000000000600')
+        self.assertEqual(self.request('/stats')['currencies']['EUR']['sum'], 300)
+        self.assertEqual(FixedWidthHandler(self.filepath).read_footer()['Control sum'], '000000000600')
+
+    def test_errors(self):
+        """Tests that invalid requests are reported with HTTP status codes"""
+        with self.assertRaises(HTTPError) as context:
+            self.request('/transactions', {'amount': 1, 'currency': 'XXX'})
+        self.assertEqual(context.exception.code, 400)
+        with self.assertRaises(HTTPError) as context:
+            self.request('/transactions/9')
+        self.assertEqual(context.exception.code, 404)
+        self.server.service.handler.transaction_limit = 2
+        with self.assertRaises(HTTPError) as context:
+            self.request('/transactions', {'amount': 1, 'currency': 'EUR'})
+        self.assertEqual(context.exception.code, 409)
+        with patch.object(FixedWidthHandler, 'update_field', side_effect=LockTimeoutError(self.filepath, 30)):
+            with self.assertRaises(HTTPError) as context:
+                self.request('/update', {'record_type': 'header', 'field_name': 'Name', 'field_value': 'Jane'})
+        self.assertEqual(context.exception.code, 503)
+        with patch.object(FixedWidthHandler, 'update_field', side_effect=OSError("disk full")):
+            with self.assertRaises(HTTPError) as context:
+                self.request('/update', {'record_type': 'header', 'field_name': 'Name', 'field_value': 'Jane'})
+        self.assertEqual(context.exception.code, 500)
+        self.assertEqual(json.loads(context.exception.read())['error'], 'disk full')
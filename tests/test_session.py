@@ -0,0 +1,96 @@
+import tempfile
+import unittest
+from unittest.mock import patch
+from FixedFileIO.handler import FixedWidthHandler
+from FixedFileIO.utils import TransactionLimitError, ValidationExecutor
+from tests.helpers import make_file
+
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        """Test configuration."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.handler = FixedWidthHandler(make_file(self.tmpdir.name, list(range(1, 21))))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read_lines(self) -> list:
+        with open(self.handler.filepath, encoding='utf-8') as file:
+            return file.read().splitlines()
+
+    def test_commit_in_place(self):
+        """Tests that few changes are flushed in place without rewriting the file"""
+        original = self.read_lines()
+        with patch.object(FixedWidthHandler, 'write_file') as mock_write:
+            with self.handler.session() as session:
+                session.update_field('transaction', 'Amount', '100', 5)
+                added = session.add_transaction(7, 'EUR')
+                session.update_field('header', 'Name', 'Jane')
+        mock_write.assert_not_called()
+        self.assertEqual(added['Counter'], '000021')
+        lines = self.read_lines()
+        self.assertEqual(lines[0][2:6], 'Jane')
+        self.assertEqual(lines[5][8:20], '000000000100')
+        self.assertEqual(lines[1:5] + lines[6:21], original[1:5] + original[6:21])
+        self.assertEqual(lines[-1][:20], '03000021000000000312')
+        self.assertTrue(ValidationExecutor(self.handler.filepath).run()[0])
+
+    def test_commit_rewrites_when_many_changed(self):
+        """Tests that many changes are committed with a single full rewrite"""
+        with patch.object(FixedWidthHandler, 'write_file', wraps=self.handler.write_file) as mock_write:
+            with self.handler.session(rewrite_ratio=0.1) as session:
+                for counter in range(1, 6):
+                    session.update_field('transaction', 'Currency', 'PLN', counter)
+        mock_write.assert_called_once()
+        self.assertTrue(ValidationExecutor(self.handler.filepath).run()[0])
+        self.assertEqual(len(list(self.handler.iter_transactions(currency='PLN'))), 5)
+
+    def test_invalid_change_and_error_discard_session(self):
+        """Tests that invalid changes are refused and errors leave the file untouched"""
+        original = self.read_lines()
+        with self.assertRaises(RuntimeError):
+            with self.handler.session() as session:
+                with self.assertRaises(ValueError):
+                    session.add_transaction(5, 'XXX')
+                self.handler.transaction_limit = 20
+                with self.assertRaises(TransactionLimitError):
+                    session.add_transaction(5, 'USD')
+                session.update_field('transaction', 'Amount', '1', 1)
+                raise RuntimeError
+        self.assertEqual(self.read_lines(), original)
+
+
+    def test_counter_change_keeps_record_position(self):
+        """Tests that a changed Counter is written over the record it was loaded from"""
+        original = self.read_lines()
+        with self.handler.session() as session:
+            session.update_field('transaction', 'Counter', '000010', 2)
+        lines = self.read_lines()
+        self.assertEqual(lines[2][:20], '02000010000000000002')
+        self.assertEqual(lines[10], original[10])
+
+    def test_updates_after_committed_counter_change(self):
+        """Tests that records are written at offsets they were loaded from once their counters changed"""
+        with self.handler.session() as session:
+            session.update_field('transaction', 'Counter', '000025', 2)
+            session.commit()
+            session.update_field('transaction', 'Amount', '77', 25)
+            session.update_field('transaction', 'Amount', '88', 9)
+        lines = self.read_lines()
+        self.assertEqual(lines[2][:20], '02000025000000000077')
+        self.assertEqual(lines[9][:20], '02000009000000000088')
+        # Counters not starting at 1 are located by their offsets too
+        with self.handler.session() as session:
+            session.update_field('transaction', 'Counter', '000030', 1)
+        with self.handler.session() as session:
+            session.update_field('transaction', 'Amount', '5', 30)
+            session.update_field('transaction', 'Amount', '6', 3)
+        lines = self.read_lines()
+        self.assertEqual([line[:20] for line in lines[1:4]],
+                         ['02000030000000000005', '02000025000000000077', '02000003000000000006'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import tempfile
+import unittest
+from FixedFileIO.handler import FixedWidthHandler
+from FixedFileIO.table import TransactionTable
+from tests.helpers import make_file
+
+
+class TestTransactionTable(unittest.TestCase):
+
+    def test_rows_and_totals(self):
+        """Tests that table rows read like transaction dicts and totals come from arrays"""
+        table = TransactionTable()
+        table.append(100, 'USD')
+        table.append(250, 'EUR', reserved=b'note')
+        table.append(300, 'USD')
+        self.assertEqual(dict(table[1]), {'Field ID': '02', 'Counter': '000002', 'Amount': '000000000250',
+                                          'Currency': 'EUR', 'Reserved': 'note'})
+        self.assertEqual(table.control_sum(), 650)
+        self.assertEqual(table.totals_by_currency(), {'USD': 400, 'EUR': 250})
+        with self.assertRaises(ValueError):
+            table.append(1, 'XXX')
+
+    def test_read_write_table(self):
+        """Tests that handler reads into and writes from a table without changing the file"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            handler = FixedWidthHandler(make_file(tmpdir, [100, 250, 300]))
+            with open(handler.filepath, encoding='utf-8') as file:
+                original = file.read()
+            header, transactions, footer = handler.read_file(table=True)
+            self.assertIsInstance(transactions, TransactionTable)
+            handler.write_file(header, transactions, footer)
+            with open(handler.filepath, encoding='utf-8') as file:
+                self.assertEqual(file.read(), original)
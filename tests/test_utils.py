@@ -1,5 +1,7 @@
+import tempfile
 import unittest
 from FixedFileIO import utils
+from tests.helpers import make_file
 
 
 class TestUtils(unittest.TestCase):
@@ -34,3 +36,38 @@ class TestUtils(unittest.TestCase):
             utils.validate_field_value('Amount', '40THOUSANDS')
         with self.assertRaises(ValueError):
             utils.validate_field_value('Name', 'John7')
+
+    def test_validate_stream_reports_all_violations(self):
+        """Tests that validate_stream lists every violation with line number and field"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = make_file(tmpdir, [100, 250, 300])
+            with open(filepath, 'r+b') as file:
+                file.seek(121 * 2 + 2)
+                file.write(b'000005')  # Non-sequential counter
+                file.seek(121 * 3 + 20)
+                file.write(b'XYZ')
+            report = utils.ValidationExecutor(filepath).validate_stream()
+            self.assertFalse(report.valid)
+            self.assertEqual([(error.line, error.field) for error in report.errors],
+                             [(3, 'Counter'), (4, 'Counter'), (4, 'Currency')])
+            self.assertEqual(report.total_amount, 650)
+            truncated = utils.ValidationExecutor(filepath).validate_stream(max_errors=1)
+            self.assertEqual(len(truncated.errors), 1)
+            self.assertTrue(truncated.truncated)
+            self.assertTrue(utils.ValidationExecutor(make_file(tmpdir, [1, 2])).validate_stream().valid)
+
+    def test_validate_parallel_matches_stream(self):
+        """Tests that chunked validation merges totals and finds counter gaps between chunks"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = make_file(tmpdir, list(range(1, 9)))
+            executor = utils.ValidationExecutor(filepath, jobs=2)
+            executor.min_chunk_records = 1
+            report = executor.validate_parallel()
+            self.assertTrue(report.valid)
+            self.assertEqual((report.num_transactions, report.total_amount), (8, 36))
+            with open(filepath, 'r+b') as file:
+                file.seek(121 * 5 + 2)
+                file.write(b'000009')
+            self.assertEqual([(error.line, error.field) for error in executor.validate_parallel().errors],
+                             [(6, 'Counter'), (7, 'Counter')])
+            self.assertEqual(executor.validate_parallel().errors, executor.validate_stream().errors)
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from FixedFileIO.handler import FixedWidthHandler
+from FixedFileIO.utils import ValidationExecutor
+from tests.helpers import make_file
+
+
+class TestValidationCache(unittest.TestCase):
+
+    def setUp(self):
+        """Test configuration."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = make_file(self.tmpdir.name, [100, 250])
+        self.validation = ValidationExecutor(self.filepath)
+        self.assertTrue(self.validation.run_cached()[0])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_unchanged_file_is_not_read(self):
+        """Tests that cached result is reused for unchanged file"""
+        with patch.object(ValidationExecutor, 'validate_stream') as mock_stream:
+            status, results = self.validation.run_cached()
+        self.assertTrue(status)
+        self.assertEqual(results, {'Header': True, 'Transactions': True, 'Footer': True})
+        mock_stream.assert_not_called()
+
+    def test_appended_tail_is_validated_alone(self):
+        """Tests that appends are validated from cached count and sum"""
+        FixedWidthHandler(self.filepath).add_transactions([(300, 'EUR'), (5, 'PLN')])
+        with patch.object(ValidationExecutor, 'validate_stream') as mock_stream:
+            self.assertTrue(self.validation.run_cached()[0])
+        mock_stream.assert_not_called()
+
+        # Appended counter breaking the sequence is caught by tail validation
+        with open(self.filepath, 'r+b') as file:
+            file.seek(-121, os.SEEK_END)
+            file.write(b'02000007000000000001USD'.ljust(120) + b'\n' + b'03000005000000000656'.ljust(120) + b'\n')
+        with patch.object(ValidationExecutor, 'validate_stream') as mock_stream:
+            status, results = self.validation.run_cached()
+        self.assertFalse(status)
+        self.assertFalse(results['Transactions'])
+        mock_stream.assert_not_called()
+
+    def test_in_place_update_revalidates(self):
+        """Tests that in-place updates drop cached result"""
+        FixedWidthHandler(self.filepath).update_field('transaction', 'Amount', '50', 1)
+        self.assertFalse(os.path.exists(self.filepath + '.valid'))
+        FixedWidthHandler(self.filepath).add_transaction(300, 'EUR')
+        self.assertTrue(self.validation.run_cached()[0])
+        self.assertTrue(os.path.exists(self.filepath + '.valid'))
+
+
+    def test_unwritable_cache_validates_uncached(self):
+        """Tests that validation goes on uncached when the result cannot be stored"""
+        os.remove(self.filepath + '.valid')
+        with patch('FixedFileIO.atomic.tempfile.mkstemp', side_effect=PermissionError(13, "Permission denied")):
+            self.assertTrue(self.validation.run_cached()[0])
+            FixedWidthHandler(self.filepath).add_transaction(5, 'USD')
+            self.assertTrue(self.validation.run_cached()[0])
+        self.assertFalse(os.path.exists(self.filepath + '.valid'))
+
+
+if __name__ == '__main__':
+    unittest.main()
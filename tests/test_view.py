@@ -0,0 +1,32 @@
+import tempfile
+import unittest
+from FixedFileIO.handler import FixedWidthHandler
+from tests.helpers import make_file
+
+
+class TestMappedFile(unittest.TestCase):
+
+    def setUp(self):
+        """Test configuration."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.handler = FixedWidthHandler(make_file(self.tmpdir.name, [100, 250, 300]))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_indexing(self):
+        """Tests that transactions can be accessed by position, counter and slice"""
+        with self.handler.read_mapped() as mapped:
+            self.assertEqual(mapped.header['Name'], 'John')
+            self.assertEqual(len(mapped.transactions), 3)
+            self.assertEqual(mapped.transactions[-1]['Amount'], '000000000300')
+            self.assertEqual(mapped.transactions['000002']['Amount'], '000000000250')
+            self.assertEqual([t['Counter'] for t in mapped.transactions[1:]], ['000002', '000003'])
+            self.assertEqual(mapped.footer['Control sum'], '000000000650')
+
+    def test_column(self):
+        """Tests that a single column is decoded without building records"""
+        with self.handler.read_mapped() as mapped:
+            self.assertEqual(list(mapped.transactions.column('Currency')), ['USD'] * 3)
+            with self.assertRaises(KeyError):
+                mapped.transactions.by_counter('000009')